@@ -0,0 +1,165 @@
+"""Decks inside zip archives, read in place without unpacking them to disk.
+
+A deck inside an archive is addressed as `<archive path>::<member name>`,
+for example `D:\\Songs\\Library.zip::Hymns/Amazing Grace.pptx`, so it can sit
+in the file list, the extraction cache and the import results like any
+other path. Members are read straight from the archive into memory when
+they are extracted; nothing is written to a temporary folder.
+"""
+import fnmatch
+import io
+import os
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from contextlib import contextmanager
+
+MEMBER_SEPARATOR = "::"
+ARCHIVE_PATTERNS = ("*.zip",)
+# Folders added by archivers that never hold real decks (macOS resource forks).
+IGNORED_FOLDERS = ("__MACOSX",)
+
+# Member listings of recently opened archives, keyed by path, size and mtime.
+_listings = OrderedDict()
+_listings_lock = threading.Lock()
+_LISTING_CACHE_SIZE = 8
+
+
+def is_archive(path):
+    """Returns True if a path names a zip archive, by extension."""
+    name = os.path.basename(path).lower()
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in ARCHIVE_PATTERNS)
+
+
+def member_path(archive, member):
+    """Returns the path that addresses one member of an archive."""
+    return f"{archive}{MEMBER_SEPARATOR}{member}"
+
+
+def split_member(path):
+    """Returns `(archive path, member name)` for a member path, or None for a plain file."""
+    archive, separator, member = path.partition(MEMBER_SEPARATOR)
+    if not separator or not member or not is_archive(archive):
+        return None
+    return archive, member
+
+
+def is_member(path):
+    return split_member(path) is not None
+
+
+def display_name(path):
+    """Returns the name shown for a path: the file name, with its archive for members."""
+    parts = split_member(path)
+    if parts is None:
+        return os.path.basename(path)
+    archive, member = parts
+    return f"{member.rsplit('/', 1)[-1]} ({os.path.basename(archive)})"
+
+
+def _listing(archive):
+    """Returns `{member name: ZipInfo}` for an archive, reusing it while the archive is unchanged."""
+    st = os.stat(archive)
+    key = (os.path.abspath(archive), st.st_size, st.st_mtime_ns)
+    with _listings_lock:
+        listing = _listings.get(key)
+        if listing is not None:
+            _listings.move_to_end(key)
+            return listing
+    with zipfile.ZipFile(archive) as zf:
+        listing = {info.filename: info for info in zf.infolist()}
+    with _listings_lock:
+        _listings[key] = listing
+        while len(_listings) > _LISTING_CACHE_SIZE:
+            _listings.popitem(last=False)
+    return listing
+
+
+def member_info(path):
+    """Returns the `zipfile.ZipInfo` of a member path; raises `OSError` if it is missing."""
+    archive, member = split_member(path)
+    try:
+        return _listing(archive)[member]
+    except KeyError:
+        raise FileNotFoundError(f"no member {member!r} in {archive}") from None
+    except zipfile.BadZipFile as e:
+        raise OSError(f"{archive}: {e}") from None
+
+
+def iter_members(archive, include, exclude=()):
+    """Yields the member paths of an archive whose file names match `include`.
+
+    Members are read from the archive's directory one at a time, in archive
+    order. Members inside a folder that matches `exclude`, or whose own name
+    does, are skipped. Raises `OSError` or `zipfile.BadZipFile` if the
+    archive cannot be read.
+    """
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            *folders, name = info.filename.split("/")
+            if any(folder in IGNORED_FOLDERS for folder in folders):
+                continue
+            if exclude and any(_matches(part, exclude) for part in folders + [name]):
+                continue
+            if _matches(name, include):
+                yield member_path(archive, info.filename)
+
+
+def _matches(name, patterns):
+    name = name.lower()
+    return any(fnmatch.fnmatchcase(name, pattern.lower()) for pattern in patterns)
+
+
+def read_member(path):
+    """Returns the bytes of a member path."""
+    archive, member = split_member(path)
+    with zipfile.ZipFile(archive) as zf:
+        return zf.read(member)
+
+
+def open_member(path):
+    """Returns a member's contents as an in-memory, seekable binary file.
+
+    Deck readers need to seek around inside the deck's own zip, which an
+    archive's member stream cannot do, so the member is read into memory.
+    """
+    return io.BytesIO(read_member(path))
+
+
+@contextmanager
+def open_binary(path):
+    """Opens a plain file or a member path for streaming binary reads."""
+    parts = split_member(path)
+    if parts is None:
+        with open(path, "rb") as f:
+            yield f
+        return
+    archive, member = parts
+    with zipfile.ZipFile(archive) as zf, zf.open(member) as f:
+        yield f
+
+
+def stat_key(path):
+    """Returns `(size, mtime_ns)` of a plain file or a member path; raises `OSError`.
+
+    Zip archives store modification times to two seconds, so a member's
+    CRC-32 is added to its time: a repacked member with the same size and
+    time but different contents still gets a new key.
+    """
+    if not is_member(path):
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+    info = member_info(path)
+    mtime = time.mktime(info.date_time + (0, 0, -1))
+    return info.file_size, int(mtime) * 1_000_000_000 + info.CRC
+
+
+def file_size(path):
+    """Returns the size in bytes of a plain file or a member path, or 0 if it cannot be read."""
+    try:
+        return stat_key(path)[0]
+    except OSError:
+        return 0
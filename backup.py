@@ -0,0 +1,121 @@
+"""Online backups of songs.db with the SQLite backup API.
+
+The database is copied a batch of pages at a time through
+`sqlite3.Connection.backup`, so a backup is a consistent snapshot even while
+VerseVIEW is writing, and progress can be reported between batches. Backups
+are written next to the database as `songs.db.backup_<timestamp>` (with a
+`.gz` suffix when compressed); snapshots taken automatically before an
+import are tagged `_preimport`. Older backups are pruned so that only the
+newest few of each kind are kept.
+"""
+import glob
+import gzip
+import os
+import shutil
+import sqlite3
+from datetime import datetime
+
+BACKUP_MARKER = ".backup_"
+SNAPSHOT_LABEL = "preimport"
+PAGES_PER_STEP = 1024
+DEFAULT_KEEP = 10
+DEFAULT_SNAPSHOT_KEEP = 5
+
+
+def backup_path_for(db_path, compress=False, label=None):
+    """Returns a new timestamped backup path next to `db_path`."""
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    path = f"{db_path}{BACKUP_MARKER}{timestamp}"
+    if label:
+        path += f"_{label}"
+    candidate = path
+    counter = 1
+    # Two backups within the same second must not overwrite each other.
+    while os.path.exists(candidate) or os.path.exists(candidate + ".gz"):
+        candidate = f"{path}_{counter}"
+        counter += 1
+    return candidate + ".gz" if compress else candidate
+
+
+def backup_database(db_path, backup_path=None, compress=False, label=None,
+                    pages=PAGES_PER_STEP, progress=None):
+    """Copies `db_path` with the SQLite backup API and returns the backup's path.
+
+    `pages` pages are copied per step, and `progress(copied, total)` is
+    called after each step. With `compress` the copy is gzipped. The backup
+    is written to a temporary file first, so a failed backup never leaves a
+    partial file under a backup name.
+    """
+    if not os.path.isfile(db_path):
+        raise FileNotFoundError(f"Database not found: {db_path}")
+    backup_path = backup_path or backup_path_for(db_path, compress, label)
+    temp_path = backup_path + ".partial"
+    packed_path = temp_path + ".gz"
+    source = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    try:
+        target = sqlite3.connect(temp_path)
+        try:
+            def report(status, remaining, total):
+                if progress is not None:
+                    progress(total - remaining, total)
+            source.backup(target, pages=pages, progress=report)
+        finally:
+            target.close()
+        if compress:
+            with open(temp_path, "rb") as raw, gzip.open(packed_path, "wb", compresslevel=6) as packed:
+                shutil.copyfileobj(raw, packed, 1024 * 1024)
+            os.remove(temp_path)
+            os.replace(packed_path, backup_path)
+        else:
+            os.replace(temp_path, backup_path)
+    except BaseException:
+        for path in (temp_path, packed_path):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    finally:
+        source.close()
+    return backup_path
+
+
+def list_backups(db_path, label=None):
+    """Returns the manual backups of `db_path`, oldest first, or the pre-import snapshots with `label=SNAPSHOT_LABEL`."""
+    pattern = glob.escape(db_path + BACKUP_MARKER) + "*"
+    backups = []
+    for path in glob.glob(pattern):
+        if ".partial" in path:
+            continue
+        is_snapshot = f"_{SNAPSHOT_LABEL}" in os.path.basename(path)
+        if (label == SNAPSHOT_LABEL) != is_snapshot:
+            continue
+        try:
+            backups.append((os.path.getmtime(path), path))
+        except OSError:
+            continue
+    return [path for _, path in sorted(backups)]
+
+
+def prune_backups(db_path, keep=DEFAULT_KEEP, label=None):
+    """Deletes all but the newest `keep` backups of one kind and returns the deleted paths.
+
+    Manual backups and pre-import snapshots (`label=SNAPSHOT_LABEL`) are
+    pruned separately, so frequent imports never push out a manual backup.
+    """
+    if keep is None or keep < 0:
+        return []
+    backups = list_backups(db_path, label)
+    removed = []
+    for path in backups[:max(len(backups) - keep, 0)]:
+        try:
+            os.remove(path)
+            removed.append(path)
+        except OSError:
+            continue
+    return removed
+
+
+def snapshot_before_import(db_path, keep=DEFAULT_SNAPSHOT_KEEP, progress=None):
+    """Takes a compressed pre-import snapshot and prunes older ones; returns the snapshot path."""
+    path = backup_database(db_path, compress=True, label=SNAPSHOT_LABEL, progress=progress)
+    prune_backups(db_path, keep, SNAPSHOT_LABEL)
+    return path
@@ -0,0 +1,297 @@
+"""Benchmark suite over a synthetic deck corpus and synthetic songs.db files.
+
+Generates .pptx decks with a configurable number of slides, text shapes per
+slide and lines per shape, and songs.db files with the full `sm` schema at
+several sizes, then times extraction, duplicate lookups, the import write
+path and file-list operations. Results are printed, and written with
+`--output`, as JSON so runs can be compared between commits:
+
+    python benchmark.py --output before.json
+    python benchmark.py --compare before.json
+
+With `--compare` the exit code is 1 when any benchmark is slower than the
+baseline by more than `--tolerance`.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import extractors
+import pipeline
+import songdb
+
+DEFAULT_DB_SIZES = (1000, 10000, 100000)
+DEFAULT_TOLERANCE = 0.2
+WORDS = (
+    "grace", "glory", "holy", "lord", "praise", "light", "love", "mercy", "king", "heaven",
+    "sing", "joy", "peace", "faith", "hope", "name", "power", "spirit", "amazing", "forever",
+)
+
+
+def lyric_line(rng, words=6):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def make_deck(path, slides=10, shapes=2, lines=4, seed=0):
+    """Writes a .pptx with `slides` slides of `shapes` text boxes holding `lines` lines each."""
+    from pptx import Presentation
+    from pptx.util import Inches
+
+    rng = random.Random(seed)
+    prs = Presentation()
+    blank = prs.slide_layouts[6]
+    for _ in range(slides):
+        slide = prs.slides.add_slide(blank)
+        for shape_index in range(shapes):
+            box = slide.shapes.add_textbox(Inches(1), Inches(1 + shape_index * 2), Inches(8), Inches(2))
+            frame = box.text_frame
+            frame.text = lyric_line(rng)
+            for _ in range(lines - 1):
+                frame.add_paragraph().text = lyric_line(rng)
+    prs.save(path)
+
+
+def make_corpus(folder, decks=50, slides=10, shapes=2, lines=4):
+    """Writes `decks` synthetic decks into `folder` and returns their paths."""
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for index in range(decks):
+        path = os.path.join(folder, f"Synthetic Song {index:05d}.pptx")
+        make_deck(path, slides, shapes, lines, seed=index)
+        paths.append(path)
+    return paths
+
+
+def make_songs_db(path, songs, slides=6, lines=4, seed=0):
+    """Writes a songs.db with an `sm` table of `songs` synthetic songs."""
+    rng = random.Random(seed)
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE sm (id INTEGER PRIMARY KEY, name TEXT, cat TEXT, font TEXT, font2 TEXT, "
+        "timestamp TEXT, yvideo TEXT, bkgndfname TEXT, key TEXT, copy TEXT, notes TEXT, lyrics TEXT, "
+        "lyrics2 TEXT, title2 TEXT, tags TEXT, slideseq TEXT, rating INTEGER, chordsavailable INTEGER, "
+        "usagecount INTEGER, subcat TEXT)"
+    )
+    rows = []
+    for song_id in range(1, songs + 1):
+        lyrics = "<slide>".join(
+            "<BR>".join(lyric_line(rng) for _ in range(lines)) for _ in range(slides)
+        )
+        rows.append(songdb.build_song_row(song_id, f"Library Song {song_id:06d}", lyrics, "autoadd", "Calibri"))
+    conn.executemany(songdb.INSERT_SONG_SQL, rows)
+    conn.commit()
+    conn.close()
+
+
+def measure(fn, repeat=3):
+    """Returns the best wall-clock time of `repeat` calls to `fn`."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def result(name, seconds, ops, **params):
+    """Builds one benchmark record."""
+    return {"name": name, "params": params, "seconds": round(seconds, 6), "ops": ops,
+            "ops_per_sec": round(ops / seconds, 1) if seconds > 0 else None}
+
+
+def bench_extraction(decks, repeat):
+    records = []
+    for engine, extract in extractors.PPTX_ENGINES.items():
+        records.append(result(f"extract_text_pptx[{engine}]",
+                              measure(lambda: [extract(path) for path in decks], repeat), len(decks)))
+    records.append(result("extract_lyrics", measure(
+        lambda: [extractors.extract_lyrics(path) for path in decks], repeat), len(decks)))
+    return records
+
+
+def bench_lookups(db_path, size, repeat, lookups=200):
+    conn = sqlite3.connect(db_path)
+    rng = random.Random(size)
+    # Half the names exist, half do not.
+    names = [f"Library Song {rng.randint(1, size):06d}" if i % 2 else f"Missing Song {i}" for i in range(lookups)]
+    records = [
+        result("song_exists", measure(lambda: [songdb.song_exists(conn, name) for name in names], repeat),
+               lookups, songs=size),
+        result("get_next_id", measure(lambda: [songdb.get_next_id(conn) for _ in range(lookups)], repeat),
+               lookups, songs=size),
+        result("SongNameIndex.load", measure(lambda: songdb.SongNameIndex(conn), repeat), 1, songs=size),
+    ]
+    index = songdb.SongNameIndex(conn)
+    records.append(result("SongNameIndex.contains", measure(lambda: [index.contains(name) for name in names], repeat),
+                          lookups, songs=size))
+    conn.close()
+    return records
+
+
+def bench_insert(db_path, size, repeat, songs=500, slides=6, lines=4):
+    """Times the import write path: planning and writing `songs` new songs through `SongImportWriter`."""
+    rng = random.Random(-size)
+    decks = [
+        (f"New Song {i:05d}.pptx", "<slide>".join("<BR>".join(lyric_line(rng) for _ in range(lines))
+                                                  for _ in range(slides)))
+        for i in range(songs)
+    ]
+    work_path = db_path + ".work"
+
+    def run():
+        shutil.copyfile(db_path, work_path)
+        writer = pipeline.SongImportWriter(work_path, "autoadd", "Calibri", check_similar=False)
+        writer.open()
+        for path, lyrics in decks:
+            writer.apply(path, lyrics)
+        writer.close()
+
+    # The copy is part of every run, so time it on its own and subtract it.
+    copy_seconds = measure(lambda: shutil.copyfile(db_path, work_path), repeat)
+    seconds = max(measure(run, repeat) - copy_seconds, 0.0)
+    os.remove(work_path)
+    return [result("inject_all.write", seconds, songs, songs=size)]
+
+
+def bench_file_list(count, repeat, chunk=500):
+    """Times adding files to the main window's list in scan-sized chunks, then removing every other one."""
+    try:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtWidgets import QApplication
+        import gui
+        app = QApplication.instance() or QApplication([])
+        window = gui.SongDBInjector()
+    except ImportError as e:
+        return [{"name": "file_list", "skipped": str(e)}]
+    # The paths are made up, so keep the preview from trying to extract them.
+    window.preview_thread.stop()
+    paths = [os.path.join("C:\\Songs", f"Song {i:06d}.pptx") for i in range(count)]
+
+    def add():
+        window.file_model.clear()
+        for start in range(0, count, chunk):
+            window.add_files_to_list(paths[start:start + chunk])
+            app.processEvents()
+
+    def remove():
+        window.file_model.remove_rows(range(0, len(window.files), 2))
+        window.update_file_list()
+        app.processEvents()
+
+    records = [result("add_files_to_list", measure(add, repeat), count, files=count)]
+    seconds = 0.0
+    for _ in range(repeat):
+        add()
+        start = time.perf_counter()
+        remove()
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if not seconds else min(seconds, elapsed)
+    records.append(result("remove_rows+update_file_list", seconds, count // 2, files=count))
+    window.close()
+    return records
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_suite(workdir, db_sizes=DEFAULT_DB_SIZES, decks=50, slides=10, shapes=2, lines=4, files=100000,
+              repeat=3, progress=None):
+    """Builds the synthetic corpus and databases in `workdir`, runs every benchmark and returns the report."""
+    report = lambda message: progress(message) if progress else None
+    records = []
+    report(f"generating {decks} decks")
+    deck_paths = make_corpus(os.path.join(workdir, "decks"), decks, slides, shapes, lines)
+    report("timing extraction")
+    for record in bench_extraction(deck_paths, repeat):
+        record["params"].update(decks=decks, slides=slides, shapes=shapes, lines=lines)
+        records.append(record)
+    for size in db_sizes:
+        db_path = os.path.join(workdir, f"songs_{size}.db")
+        report(f"generating songs.db with {size} songs")
+        make_songs_db(db_path, size)
+        report(f"timing lookups and inserts against {size} songs")
+        records += bench_lookups(db_path, size, repeat)
+        records += bench_insert(db_path, size, repeat)
+    if files:
+        report(f"timing the file list with {files} files")
+        records += bench_file_list(files, repeat)
+    return {
+        "commit": git_commit(), "python": platform.python_version(), "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": records,
+    }
+
+
+def record_key(record):
+    return record["name"], json.dumps(record.get("params", {}), sort_keys=True)
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Returns `(name, params, baseline seconds, seconds, ratio)` for each benchmark slower than `tolerance` allows."""
+    before = {record_key(record): record for record in baseline["results"] if "seconds" in record}
+    regressions = []
+    for record in report["results"]:
+        old = before.get(record_key(record))
+        if old is None or "seconds" not in record or not old["seconds"]:
+            continue
+        ratio = record["seconds"] / old["seconds"]
+        if ratio > 1 + tolerance:
+            regressions.append((record["name"], record["params"], old["seconds"], record["seconds"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--db-sizes", type=int, nargs="+", default=list(DEFAULT_DB_SIZES),
+                        help="songs in each synthetic songs.db")
+    parser.add_argument("--decks", type=int, default=50, help="synthetic decks to extract")
+    parser.add_argument("--slides", type=int, default=10, help="slides per deck")
+    parser.add_argument("--shapes", type=int, default=2, help="text boxes per slide")
+    parser.add_argument("--lines", type=int, default=4, help="lines per text box")
+    parser.add_argument("--files", type=int, default=100000, help="paths for the file-list benchmark (0 skips it)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the fastest is reported")
+    parser.add_argument("--workdir", help="where to generate the corpus (a temporary folder if omitted)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="a previous JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown against the baseline, as a fraction")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="vvsa-bench-")
+    try:
+        report = run_suite(workdir, args.db_sizes, args.decks, args.slides, args.shapes, args.lines,
+                           args.files, args.repeat, progress=lambda message: print(message, file=sys.stderr))
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for name, params, before, after, ratio in regressions:
+            print(f"REGRESSION: {name} {params}: {before:.4f}s -> {after:.4f}s ({ratio:.2f}x)", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+"""Streaming export of the songs in songs.db, and merging an export into another songs.db.
+
+`export_songs()` copies every row of `sm` into a bundle: a JSON-lines file
+(gzipped when the name ends in `.gz`) or a small sqlite database with an `sm`
+table of the same columns. Rows stream from one cursor inside a single read
+transaction, so the bundle is a consistent snapshot even while VerseVIEW is
+writing, and the table is never held in memory.
+
+`merge_bundle()` applies a bundle to another songs.db the way an import
+would: new songs get IDs from one block reserved after `MAX(id)` (as
+`songdb.get_next_id` does), names are matched with `songdb.normalize_name`,
+and songs whose lyrics already match are never rewritten. A name that
+already exists with different lyrics is resolved by the collision policy.
+"""
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import backup
+import search
+import songdb
+
+BUNDLE_VERSION = 1
+FORMATS = ("jsonl", "sqlite")
+COLLISION_POLICIES = ("skip", "overwrite", "rename")
+BATCH_SIZE = 500
+
+_SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+_COLUMNS = ", ".join(songdb.SM_COLUMNS)
+_LYRICS = songdb.SM_COLUMNS.index("lyrics")
+_SLIDESEQ = songdb.SM_COLUMNS.index("slideseq")
+_NAME = songdb.SM_COLUMNS.index("name")
+
+
+class BundleError(ValueError):
+    """Raised for a file that is not a readable song bundle."""
+
+
+def bundle_format(path):
+    """Returns "sqlite" or "jsonl" for a bundle path, by extension."""
+    return "sqlite" if path.lower().endswith(_SQLITE_SUFFIXES) else "jsonl"
+
+
+def _open_text(path, mode, compressed):
+    if compressed:
+        return gzip.open(path, mode + "t", compresslevel=6, encoding="utf-8")
+    return open(path, mode, encoding="utf-8", newline="\n")
+
+
+def _header(db_path, count):
+    return {"bundle": BUNDLE_VERSION, "columns": list(songdb.SM_COLUMNS), "songs": count,
+            "source": os.path.abspath(db_path), "created": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def export_songs(db_path, bundle_path, format=None, progress=None):
+    """Streams every song in `db_path` into a bundle and returns the number exported.
+
+    `format` is "jsonl" or "sqlite"; by default it follows the extension
+    (`.db`, `.sqlite` and `.sqlite3` are sqlite). The bundle is written to a
+    temporary file and renamed into place once complete. `progress(done,
+    total)` is called after every batch of rows.
+    """
+    format = format or bundle_format(bundle_path)
+    if format not in FORMATS:
+        raise ValueError(f"unknown bundle format: {format}")
+    source = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    temp_path = bundle_path + ".part"
+    try:
+        # One read transaction, so the count and the rows come from the same snapshot.
+        source.execute("BEGIN")
+        total = source.execute("SELECT COUNT(*) FROM sm").fetchone()[0]
+        rows = source.execute(f"SELECT {_COLUMNS} FROM sm ORDER BY id")
+        if format == "sqlite":
+            count = _export_sqlite(rows, temp_path, _header(db_path, total), total, progress)
+        else:
+            count = _export_jsonl(rows, temp_path, bundle_path.lower().endswith(".gz"),
+                                  _header(db_path, total), total, progress)
+        os.replace(temp_path, bundle_path)
+        return count
+    finally:
+        source.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _batches(rows):
+    while True:
+        batch = rows.fetchmany(BATCH_SIZE)
+        if not batch:
+            return
+        yield batch
+
+
+def _export_jsonl(rows, path, compressed, header, total, progress):
+    count = 0
+    with _open_text(path, "w", compressed) as f:
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for batch in _batches(rows):
+            for row in batch:
+                f.write(json.dumps(dict(zip(songdb.SM_COLUMNS, row)), ensure_ascii=False) + "\n")
+            count += len(batch)
+            if progress:
+                progress(count, total)
+    return count
+
+
+def _export_sqlite(rows, path, header, total, progress):
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(f"CREATE TABLE sm ({', '.join(songdb.SM_COLUMNS)}, PRIMARY KEY (id))")
+        conn.execute("CREATE TABLE bundle_meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.executemany("INSERT INTO bundle_meta VALUES (?, ?)",
+                         [(key, json.dumps(value)) for key, value in header.items()])
+        count = 0
+        for batch in _batches(rows):
+            conn.executemany(songdb.INSERT_SONG_SQL, batch)
+            count += len(batch)
+            if progress:
+                progress(count, total)
+        conn.commit()
+        return count
+    finally:
+        conn.close()
+
+
+class _Rows:
+    """Iterates over the rows of an open bundle; `close()` releases the file."""
+
+    def __init__(self, rows, close):
+        self._rows = rows
+        self.close = close
+
+    def __iter__(self):
+        return self._rows
+
+
+def read_bundle(bundle_path):
+    """Returns `(header, rows)` for a bundle; `rows` yields `sm` row tuples in `SM_COLUMNS` order.
+
+    Rows are read one batch at a time, and `rows.close()` closes the bundle.
+    Columns missing from the bundle are None. Raises `BundleError` if the
+    file is not a bundle.
+    """
+    if bundle_format(bundle_path) == "sqlite":
+        return _read_sqlite(bundle_path)
+    return _read_jsonl(bundle_path)
+
+
+def _read_jsonl(path):
+    f = _open_text(path, "r", path.lower().endswith(".gz"))
+    try:
+        header = json.loads(f.readline() or "null")
+    except (OSError, ValueError) as e:
+        f.close()
+        raise BundleError(f"{path}: not a song bundle ({e})") from None
+    if not isinstance(header, dict) or header.get("bundle") != BUNDLE_VERSION:
+        f.close()
+        raise BundleError(f"{path}: not a version {BUNDLE_VERSION} song bundle")
+
+    rows = (
+        tuple(song.get(column) for column in songdb.SM_COLUMNS)
+        for song in (json.loads(line) for line in f if line.strip())
+    )
+    return header, _Rows(rows, f.close)
+
+
+def _read_sqlite(path):
+    conn = None
+    try:
+        conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+        header = {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM bundle_meta")}
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(sm)")}
+    except sqlite3.Error as e:
+        if conn is not None:
+            conn.close()
+        raise BundleError(f"{path}: not a song bundle ({e})") from None
+    if header.get("bundle") != BUNDLE_VERSION:
+        conn.close()
+        raise BundleError(f"{path}: not a version {BUNDLE_VERSION} song bundle")
+    selected = ", ".join(column if column in columns else "NULL" for column in songdb.SM_COLUMNS)
+
+    rows = (row for batch in _batches(conn.execute(f"SELECT {selected} FROM sm ORDER BY id")) for row in batch)
+    return header, _Rows(rows, conn.close)
+
+
+class MergeResult:
+    """The outcome of `merge_bundle`.
+
+    `counts` maps "added", "overwritten", "renamed", "unchanged" and
+    "skipped" to the number of songs. `error` is the exception that aborted
+    the merge (nothing is written then), or None. `snapshot` is the path of
+    the pre-merge snapshot, or None, and `seconds` how long the merge took.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.error = None
+        self.snapshot = None
+        self.seconds = 0.0
+
+    def count(self, action):
+        self.counts[action] = self.counts.get(action, 0) + 1
+
+
+def merge_bundle(bundle_path, db_path, collisions="skip", dry_run=False, on_song=None, progress=None,
+                 snapshot_keep=None):
+    """Applies a bundle to `db_path` and returns a `MergeResult`.
+
+    Every song is planned like an imported deck: "insert" when its name is
+    new, "unchanged" when a song with that name already has the same lyrics,
+    and otherwise by `collisions`: "skip" keeps the existing song,
+    "overwrite" replaces the lyrics and slide order of the songs that
+    differ, and "rename" inserts the song as "Name (2)" (or the next free
+    number), unless one of those renamed songs already has the same lyrics,
+    so merging a bundle twice adds nothing. Inserted songs keep every column
+    of the bundle except the ID. All writes share one
+    transaction, committed at the end; with `dry_run` it is rolled back
+    instead, so nothing is written.
+    `on_song(name, action)` is called for every song, and `progress(done)`
+    after every batch. With `snapshot_keep` a compressed snapshot of the
+    database is taken first, as before an import.
+    """
+    if collisions not in COLLISION_POLICIES:
+        raise ValueError(f"unknown collision policy: {collisions}")
+    result = MergeResult()
+    started = time.perf_counter()
+    _, rows = read_bundle(bundle_path)
+    try:
+        if snapshot_keep is not None and not dry_run:
+            result.snapshot = backup.snapshot_before_import(db_path, snapshot_keep)
+        _merge_rows(rows, db_path, collisions, dry_run, on_song, progress, result)
+    finally:
+        rows.close()
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def _merge_rows(rows, db_path, collisions, dry_run, on_song, progress, result):
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        index = songdb.SongNameIndex(conn)
+        next_id = songdb.get_next_id(conn)
+        inserts, updates = [], []
+        pending = set()  # songs written to the batch but not to the database yet
+        updated_ids = []
+        done = 0
+
+        def flush():
+            _write(conn, inserts, updates)
+            inserts.clear()
+            updates.clear()
+            pending.clear()
+
+        def stored(song_ids):
+            # A song repeated in the bundle must be compared with what was merged before it.
+            if pending.intersection(song_ids):
+                flush()
+            return songdb.stored_lyrics(conn, song_ids)
+
+        for row in rows:
+            lyrics = songdb.expand_slides(row[_LYRICS], row[_SLIDESEQ])
+            action, name, song_ids = _plan(index, stored, row[_NAME] or "", lyrics, collisions)
+            if action in ("insert", "rename"):
+                inserts.append((next_id,) + row[1:_NAME] + (name,) + row[_NAME + 1:])
+                index.add(next_id, name)
+                pending.add(next_id)
+                next_id += 1
+            elif action == "overwrite":
+                updates.extend((row[_LYRICS], row[_SLIDESEQ] or "", song_id) for song_id in song_ids)
+                pending.update(song_ids)
+                updated_ids.extend(song_ids)
+            label = {"insert": "added", "overwrite": "overwritten", "rename": "renamed"}.get(action, action)
+            result.count(label)
+            if on_song is not None:
+                on_song(name, label)
+            done += 1
+            if len(inserts) + len(updates) >= BATCH_SIZE:
+                flush()
+            if progress and done % BATCH_SIZE == 0:
+                progress(done)
+        flush()
+        if progress:
+            progress(done)
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+            try:
+                search.mark_changed(db_path, updated_ids)
+            except (OSError, sqlite3.Error) as e:
+                # The next search then compares every row instead of just these.
+                print(f"Could not record overwritten songs for search: {e}", file=sys.stderr)
+    except (sqlite3.Error, ValueError) as e:
+        if conn.in_transaction:
+            conn.rollback()
+        result.error = e
+    finally:
+        conn.close()
+
+
+def _hashes(stored, matches):
+    """Returns `{id: lyrics hash}` for the `(id, name)` pairs of `SongNameIndex.lookup`."""
+    lyrics = stored([song_id for song_id, _ in matches])
+    return {song_id: songdb.lyrics_hash(lyrics.get(song_id)) for song_id, _ in matches}
+
+
+def _plan(index, stored, name, lyrics, collisions):
+    """Returns `(action, name, song IDs to overwrite)` for one bundle song.
+
+    `stored(song_ids)` returns `{id: lyrics}` as `songdb.stored_lyrics` does.
+    For "rename" the name is the one to insert under: the first free "Name
+    (n)", or the renamed song that already has these lyrics ("unchanged").
+    """
+    matches = index.lookup(name)
+    if not matches:
+        return "insert", name, None
+    digest = songdb.lyrics_hash(lyrics)
+    changed_ids = [song_id for song_id, stored_hash in _hashes(stored, matches).items() if stored_hash != digest]
+    if not changed_ids:
+        return "unchanged", name, None
+    if collisions == "skip":
+        return "skipped", name, None
+    if collisions == "overwrite":
+        return "overwrite", name, changed_ids
+    number = 2
+    while True:
+        renamed = f"{name} ({number})"
+        matches = index.lookup(renamed)
+        if not matches:
+            return "rename", renamed, None
+        if digest in _hashes(stored, matches).values():
+            return "unchanged", renamed, None
+        number += 1
+
+
+def _write(conn, inserts, updates):
+    """Writes one batch into the open transaction."""
+    if inserts:
+        conn.executemany(songdb.INSERT_SONG_SQL, inserts)
+    if updates:
+        conn.executemany(songdb.UPDATE_LYRICS_BY_ID_SQL, updates)
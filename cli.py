@@ -0,0 +1,364 @@
+"""Command-line interface for importing decks without the GUI.
+
+Run as `python main.py import [options] PATH...`, or `python main.py watch
+[options] FOLDER...` to keep importing new and modified decks. One JSON
+object is printed per file, then a summary line per import. `import` can
+write to several databases at once (`--db` repeated, or `--all-dbs`); each
+deck is extracted once and every record names its database. Exit codes: 0
+when every file was imported or skipped as a duplicate, 1 when some files
+failed, 2 for usage errors or a missing database, 3 when the import was
+aborted. Before writing, `import` takes a compressed snapshot of songs.db
+unless `--no-snapshot` is given; `python main.py backup` makes a backup on
+demand, `python main.py export BUNDLE` and `python main.py merge BUNDLE`
+copy songs between databases, and `python main.py search QUERY` prints the
+library songs whose name or lyrics match, best first. With `import
+--dry-run` each file's status is the planned action instead, and nothing is
+written.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import backup
+import bundle
+import extractors
+import importer
+import isolation
+import pipeline
+import search
+import tracing
+import watcher
+from extract_cache import ExtractionCache
+
+EXIT_OK = 0
+EXIT_FILES_FAILED = 1
+EXIT_USAGE = 2
+EXIT_ABORTED = 3
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="main.py", description="VerseView Song Adder")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    options = argparse.ArgumentParser(add_help=False)
+    options.add_argument("--font", default=importer.DEFAULT_FONT)
+    options.add_argument("--category", default=importer.DEFAULT_CATEGORY)
+    options.add_argument("--workers", type=int, default=pipeline.default_worker_count(),
+                         help="extraction processes (0 extracts in this process)")
+    options.add_argument("--pptx-engine", choices=list(extractors.PPTX_ENGINES), default=extractors.DEFAULT_PPTX_ENGINE)
+    options.add_argument("--ppt-engine", choices=list(extractors.PPT_ENGINES), default=extractors.DEFAULT_PPT_ENGINE)
+    options.add_argument("--exclude", action="append", default=[], metavar="PATTERN",
+                         help="skip files and folders matching this glob (repeatable)")
+    options.add_argument("--no-cache", action="store_true", help="do not use the extraction cache")
+    options.add_argument("--no-similar", action="store_true", help="skip the near-duplicate check")
+    options.add_argument("--timeout", type=float, default=isolation.DEFAULT_TIMEOUT,
+                         help="seconds a deck may take to extract before it is retried once, then reported as timed out")
+    options.add_argument("--memory-limit", type=int, default=isolation.DEFAULT_MEMORY_LIMIT, metavar="MB",
+                         help="memory an extraction worker may use before the deck is reported as crashed")
+    options.add_argument("--compact-slides", action="store_true",
+                         help="store repeated slides once and record their order in slideseq")
+
+    run = commands.add_parser("import", parents=[options], help="import PowerPoint decks into songs.db")
+    run.add_argument("paths", nargs="+", help="decks, or directories containing decks")
+    run.add_argument("--db", action="append",
+                     help="path to songs.db (found in AppData if omitted); repeat to import into several databases")
+    run.add_argument("--all-dbs", action="store_true",
+                     help="import into every VerseVIEW songs.db found in AppData, extracting each deck once")
+    run.add_argument("--duplicates", choices=importer.DUPLICATE_POLICIES, default="skip",
+                     help="what to do with songs that already exist")
+    run.add_argument("--recursive", action="store_true", help="also import decks in subdirectories")
+    run.add_argument("--max-depth", type=int, help="with --recursive, how many folder levels to descend")
+    run.add_argument("--dry-run", action="store_true",
+                     help="report what would be inserted, updated or left unchanged without writing")
+    run.add_argument("--trace", metavar="FILE", help="write per-stage timings of every file to FILE")
+    run.add_argument("--trace-format", choices=tracing.EXPORT_FORMATS, default="json",
+                     help="format of --trace: plain JSON, or Chrome trace events for chrome://tracing")
+    run.add_argument("--no-snapshot", action="store_true", help="do not back up songs.db before importing")
+    run.add_argument("--snapshot-keep", type=int, default=backup.DEFAULT_SNAPSHOT_KEEP,
+                     help="how many pre-import snapshots to keep")
+
+    watch = commands.add_parser("watch", parents=[options],
+                                help="import new and modified decks from folders as they change")
+    watch.add_argument("paths", nargs="+", help="folders to watch, including their subfolders")
+    watch.add_argument("--db", help="path to songs.db (found in AppData if omitted)")
+    watch.add_argument("--poll", action="store_true", help="rescan periodically instead of using inotify")
+    watch.add_argument("--interval", type=float, default=watcher.DEFAULT_POLL_INTERVAL,
+                       help="seconds between rescans when polling")
+    watch.add_argument("--debounce", type=float, default=watcher.DEFAULT_DEBOUNCE,
+                       help="seconds without file events before importing")
+
+    save = commands.add_parser("backup", help="make a consistent backup of songs.db while it is in use")
+    save.add_argument("--db", help="path to songs.db (found in AppData if omitted)")
+    save.add_argument("--output", help="backup file (a timestamped file next to songs.db if omitted)")
+    save.add_argument("--compress", action="store_true", help="gzip the backup")
+    save.add_argument("--keep", type=int, default=backup.DEFAULT_KEEP,
+                      help="delete all but this many backups afterwards (-1 keeps everything)")
+
+    export = commands.add_parser("export", help="stream every song in songs.db into a bundle file")
+    export.add_argument("bundle", help="bundle to write: .jsonl (or .jsonl.gz) for JSON lines, .db for sqlite")
+    export.add_argument("--db", help="path to songs.db (found in AppData if omitted)")
+    export.add_argument("--format", choices=bundle.FORMATS, help="bundle format (by extension if omitted)")
+
+    merge = commands.add_parser("merge", help="add the songs of a bundle to songs.db")
+    merge.add_argument("bundle", help="a bundle written by export")
+    merge.add_argument("--db", help="path to songs.db (found in AppData if omitted)")
+    merge.add_argument("--collisions", choices=bundle.COLLISION_POLICIES, default="skip",
+                       help="what to do with songs that already exist with different lyrics")
+    merge.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    merge.add_argument("--quiet", action="store_true", help="print only the summary, not one record per song")
+    merge.add_argument("--no-snapshot", action="store_true", help="do not back up songs.db before merging")
+    merge.add_argument("--snapshot-keep", type=int, default=backup.DEFAULT_SNAPSHOT_KEEP,
+                       help="how many pre-import snapshots to keep")
+
+    find = commands.add_parser("search", help="search the names and lyrics of the songs in songs.db")
+    find.add_argument("query", nargs="+", help="words to match; the last one also matches as a prefix")
+    find.add_argument("--db", help="path to songs.db (found in AppData if omitted)")
+    find.add_argument("--limit", type=int, default=20, help="most matches to print")
+    return parser
+
+
+def emit(record):
+    """Writes one JSON-lines record to stdout."""
+    sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+def resolve_db(args):
+    """Returns the songs.db path from the arguments or AppData, reporting it if it is missing."""
+    db_path = args.db or importer.find_songs_db()
+    if not db_path or not os.path.isfile(db_path):
+        emit({"error": f"songs.db not found: {db_path}" if db_path else "songs.db not found, pass --db"})
+        return None
+    return db_path
+
+
+def resolve_dbs(args):
+    """Returns the databases an import writes to: every `--db`, every database found with
+    `--all-dbs`, or else the one found in AppData. Reports a missing one and returns None."""
+    db_paths = list(args.db or [])
+    if args.all_dbs:
+        db_paths += [path for path in importer.find_songs_dbs() if path not in db_paths]
+    if not db_paths:
+        found = importer.find_songs_db()
+        if not found:
+            emit({"error": "songs.db not found, pass --db"})
+            return None
+        db_paths = [found]
+    for db_path in db_paths:
+        if not os.path.isfile(db_path):
+            emit({"error": f"songs.db not found: {db_path}"})
+            return None
+    return db_paths
+
+
+def open_cache(args):
+    if args.no_cache:
+        return None
+    try:
+        return ExtractionCache()
+    except (OSError, sqlite3.Error) as e:
+        print(f"Extraction cache unavailable: {e}", file=sys.stderr)
+        return None
+
+
+def import_options(args, cache):
+    """Returns the `importer.run_import` keyword arguments shared by every command."""
+    return {
+        "category": args.category, "font": args.font, "workers": args.workers,
+        "pptx_engine": args.pptx_engine, "ppt_engine": args.ppt_engine,
+        "cache": cache, "check_similar": not args.no_similar, "compact_slides": args.compact_slides,
+        "timeout": args.timeout, "memory_limit": args.memory_limit,
+    }
+
+
+def emit_outcome(outcome, file_count, cache=None, label_db=False):
+    """Prints one record per file and a summary record for an `importer.ImportResult`.
+
+    With `label_db` every record also names the database it is about.
+    """
+    similar = dict(outcome.near_duplicates)
+    counts = {}
+    target = {"db": outcome.db_path} if label_db else {}
+    for name, status, detail, path in outcome.results:
+        counts[status] = counts.get(status, 0) + 1
+        record = {"file": path, "name": name, "status": status, **target}
+        if detail:
+            record["detail"] = str(detail)
+        if name in similar:
+            record["similar"] = [
+                {"id": song_id, "name": match_name, "score": round(score, 3)}
+                for song_id, match_name, score in similar[name]
+            ]
+        emit(record)
+    summary = {"summary": counts, "files": file_count, "seconds": round(outcome.stats.elapsed(), 3), **target}
+    if outcome.error:
+        summary["error"] = str(outcome.error)
+    if outcome.trace is not None:
+        summary["stages"] = outcome.trace.summary(outcome.db_path)
+    if cache is not None:
+        summary["cache"] = cache.stats()
+    emit(summary)
+
+
+def exit_code(outcome):
+    if outcome.error:
+        return EXIT_ABORTED
+    return EXIT_FILES_FAILED if outcome.failed() else EXIT_OK
+
+
+def import_command(args):
+    db_paths = resolve_dbs(args)
+    if db_paths is None:
+        return EXIT_USAGE
+    trace = tracing.ImportTrace()
+    with trace.span("scan") as fields:
+        files = list(importer.iter_deck_files(
+            args.paths, recursive=args.recursive, max_depth=args.max_depth, exclude=args.exclude
+        ))
+        fields["files"] = len(files)
+    cache = open_cache(args)
+    try:
+        outcomes = importer.run_import_multi(
+            db_paths, files, duplicates=args.duplicates, dry_run=args.dry_run,
+            snapshot_keep=None if args.no_snapshot else args.snapshot_keep, trace=trace,
+            **import_options(args, cache)
+        )
+    except (OSError, sqlite3.Error) as e:
+        emit({"error": f"pre-import snapshot failed, nothing was imported: {e}"})
+        outcomes = None
+    if outcomes is not None:
+        for outcome in outcomes:
+            if outcome.snapshot:
+                emit({"snapshot": outcome.snapshot, "db": outcome.db_path})
+        for outcome in outcomes:
+            emit_outcome(outcome, len(files), cache, label_db=len(outcomes) > 1)
+        if args.trace:
+            try:
+                trace.export(args.trace, args.trace_format)
+            except OSError as e:
+                emit({"error": f"could not write the trace: {e}"})
+    if cache is not None:
+        cache.close()
+    return EXIT_ABORTED if outcomes is None else max(exit_code(outcome) for outcome in outcomes)
+
+
+def watch_command(args):
+    """Runs until interrupted, printing the results of every import."""
+    db_path = resolve_db(args)
+    if db_path is None:
+        return EXIT_USAGE
+    missing = [path for path in args.paths if not os.path.isdir(path)]
+    if missing:
+        emit({"error": f"not a folder: {missing[0]}"})
+        return EXIT_USAGE
+    cache = open_cache(args)
+    sync = watcher.WatchSync(db_path, args.paths, exclude=args.exclude, **import_options(args, cache))
+    emit({"watching": sync.roots, "manifest": sync.manifest.path})
+    try:
+        sync.run(on_batch=lambda outcome: emit_outcome(outcome, outcome.stats.total, cache),
+                 poll=args.poll, interval=args.interval, debounce=args.debounce)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if cache is not None:
+            cache.close()
+    return EXIT_OK
+
+
+def backup_command(args):
+    db_path = resolve_db(args)
+    if db_path is None:
+        return EXIT_USAGE
+    try:
+        path = backup.backup_database(db_path, args.output, compress=args.compress)
+    except (OSError, sqlite3.Error) as e:
+        emit({"error": f"backup failed: {e}"})
+        return EXIT_ABORTED
+    removed = backup.prune_backups(db_path, args.keep) if args.output is None else []
+    emit({"backup": path, "bytes": os.path.getsize(path), "pruned": removed})
+    return EXIT_OK
+
+
+def export_command(args):
+    db_path = resolve_db(args)
+    if db_path is None:
+        return EXIT_USAGE
+    started = time.perf_counter()
+    try:
+        count = bundle.export_songs(db_path, args.bundle, args.format)
+    except (OSError, sqlite3.Error) as e:
+        emit({"error": f"export failed: {e}"})
+        return EXIT_ABORTED
+    emit({"bundle": args.bundle, "songs": count, "bytes": os.path.getsize(args.bundle),
+          "seconds": round(time.perf_counter() - started, 3)})
+    return EXIT_OK
+
+
+def merge_command(args):
+    """Prints one record per song in the bundle, then a summary."""
+    db_path = resolve_db(args)
+    if db_path is None:
+        return EXIT_USAGE
+    on_song = None if args.quiet else lambda name, status: emit({"name": name, "status": status})
+    try:
+        outcome = bundle.merge_bundle(
+            args.bundle, db_path, args.collisions, dry_run=args.dry_run, on_song=on_song,
+            snapshot_keep=None if args.no_snapshot else args.snapshot_keep
+        )
+    except bundle.BundleError as e:
+        emit({"error": str(e)})
+        return EXIT_USAGE
+    except (OSError, sqlite3.Error) as e:
+        emit({"error": f"merge failed, nothing was merged: {e}"})
+        return EXIT_ABORTED
+    if outcome.snapshot:
+        emit({"snapshot": outcome.snapshot})
+    summary = {"summary": outcome.counts, "seconds": round(outcome.seconds, 3)}
+    if outcome.error:
+        summary["error"] = str(outcome.error)
+    emit(summary)
+    return EXIT_ABORTED if outcome.error else EXIT_OK
+
+
+def search_command(args):
+    """Prints one record per matching song, best match first."""
+    db_path = resolve_db(args)
+    if db_path is None:
+        return EXIT_USAGE
+    try:
+        index = search.LyricsSearchIndex(db_path)
+        try:
+            matches = index.search(" ".join(args.query), args.limit)
+        finally:
+            index.close()
+    except sqlite3.Error as e:
+        emit({"error": f"search failed: {e}"})
+        return EXIT_ABORTED
+    for song_id, name, snippet, rank in matches:
+        emit({"id": song_id, "name": name, "snippet": snippet, "rank": round(rank, 6)})
+    return EXIT_OK
+
+
+def main(argv=None):
+    """Parses the arguments, runs the command and returns the exit code."""
+    args = build_parser().parse_args(argv)
+    if args.command == "import":
+        return import_command(args)
+    elif args.command == "watch":
+        return watch_command(args)
+    elif args.command == "backup":
+        return backup_command(args)
+    elif args.command == "export":
+        return export_command(args)
+    elif args.command == "merge":
+        return merge_command(args)
+    elif args.command == "search":
+        return search_command(args)
+    return EXIT_USAGE
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""Persistent cache of extracted lyrics, stored in a small sqlite sidecar database.
+
+Entries are found by path, size and modification time first; when those do
+not match (a moved or touched file) the file's content hash is tried before
+the deck is parsed again. Every entry records the engine and engine version
+that produced it, so changing either invalidates it.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import archives
+import extractors
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def app_data_dir():
+    """Returns the per-user directory for the app's sidecar files, creating it if needed."""
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(base, "VerseViewSongAdder")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def sidecar_path(db_path, kind):
+    """Returns the path of a sidecar database kept for one songs.db, e.g. `similarity_<key>.db`."""
+    key = hashlib.sha1(os.path.normcase(os.path.abspath(db_path)).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(app_data_dir(), f"{kind}_{key}.db")
+
+
+def file_hash(path):
+    """Returns the SHA-1 hex digest of a file's contents, streaming members out of their archive."""
+    digest = hashlib.sha1()
+    with archives.open_binary(path) as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """Size-capped, least-recently-used cache of extracted lyrics.
+
+    Safe to share between threads. `hits` and `misses` count lookups since
+    the cache was opened.
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path or os.path.join(app_data_dir(), "extract_cache.db")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        # The cache can always be rebuilt, so durability is traded for speed.
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS entries (
+            path TEXT NOT NULL,
+            engine TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            lyrics TEXT NOT NULL,
+            nbytes INTEGER NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (path, engine)
+        )''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS entries_hash ON entries (content_hash, engine)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self.conn.commit()
+        self._total_bytes = self.conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+
+    def lookup(self, path, engine):
+        """Returns `(lyrics, content_hash)`; lyrics is None on a miss.
+
+        The content hash is only computed when the stat key misses, and is
+        returned so `put` does not have to read the file again.
+        """
+        version = extractors.ENGINE_VERSIONS[engine]
+        size, mtime_ns = archives.stat_key(path)
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT size, mtime_ns, version, lyrics FROM entries WHERE path = ? AND engine = ?",
+                (path, engine)
+            ).fetchone()
+            if row and row[0] == size and row[1] == mtime_ns and row[2] == version:
+                self._touch(path, engine)
+                self.hits += 1
+                return row[3], None
+
+        content_hash = file_hash(path)
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT lyrics FROM entries WHERE content_hash = ? AND engine = ? AND version = ? LIMIT 1",
+                (content_hash, engine, version)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None, content_hash
+            self.hits += 1
+        # Same content under a new path or timestamp: re-key it so the next lookup is a stat hit.
+        self.put(path, engine, row[0], content_hash)
+        return row[0], content_hash
+
+    def put(self, path, engine, lyrics, content_hash=None):
+        """Stores extracted lyrics for a file. Empty results are not cached."""
+        if not lyrics:
+            return
+        size, mtime_ns = archives.stat_key(path)
+        content_hash = content_hash or file_hash(path)
+        nbytes = len(lyrics.encode("utf-8"))
+        with self._lock:
+            old = self.conn.execute(
+                "SELECT nbytes FROM entries WHERE path = ? AND engine = ?", (path, engine)
+            ).fetchone()
+            self._total_bytes += nbytes - (old[0] if old else 0)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, engine, extractors.ENGINE_VERSIONS[engine], size, mtime_ns,
+                 content_hash, lyrics, nbytes, time.time())
+            )
+            self._evict()
+            self.conn.commit()
+
+    def extract_lyrics(self, path, pptx_engine=extractors.DEFAULT_PPTX_ENGINE,
+                       ppt_engine=extractors.DEFAULT_PPT_ENGINE):
+        """Reads through the cache to `extractors.extract_lyrics`."""
+        engine = extractors.engine_for(path, pptx_engine, ppt_engine)
+        if engine is None:
+            return extractors.extract_lyrics(path, pptx_engine, ppt_engine)
+        try:
+            lyrics, content_hash = self.lookup(path, engine)
+        except OSError:
+            return extractors.extract_lyrics(path, pptx_engine, ppt_engine)
+        if lyrics is None:
+            lyrics = extractors.extract_lyrics(path, pptx_engine, ppt_engine)
+            self.put(path, engine, lyrics, content_hash)
+        return lyrics
+
+    def _touch(self, path, engine):
+        self.conn.execute(
+            "UPDATE entries SET last_used = ? WHERE path = ? AND engine = ?", (time.time(), path, engine)
+        )
+        self.conn.commit()
+
+    def _evict(self):
+        """Drops least recently used entries until the cache fits in `max_bytes`."""
+        if self._total_bytes <= self.max_bytes:
+            return
+        rows = self.conn.execute("SELECT rowid, nbytes FROM entries ORDER BY last_used")
+        doomed = []
+        for rowid, nbytes in rows:
+            if self._total_bytes <= self.max_bytes:
+                break
+            doomed.append((rowid,))
+            self._total_bytes -= nbytes
+        self.conn.executemany("DELETE FROM entries WHERE rowid = ?", doomed)
+
+    def stats(self):
+        """Returns a short hit/miss report."""
+        lookups = self.hits + self.misses
+        rate = 100.0 * self.hits / lookups if lookups else 0.0
+        return f"{self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)"
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,238 @@
+"""Lyrics extraction from PowerPoint decks.
+
+These are plain module-level functions so they can run in worker processes.
+"""
+import importlib.util
+import posixpath
+import sys
+import zipfile
+import xml.etree.ElementTree as ET
+
+import archives
+import ppt_binary
+
+_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_P = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+
+# Element path of a paragraph in a top-level slide shape: sld/cSld/spTree/sp/txBody/p.
+_SHAPE_DEPTH = 4
+_PARAGRAPH_PATH = (_P + "sld", _P + "cSld", _P + "spTree", _P + "sp", _P + "txBody", _A + "p")
+
+
+def extract_text_pptx(path):
+    """Extracts text from a .pptx file, or a binary file object, using the python-pptx library."""
+    # Imported on first use: python-pptx is the slowest import at startup.
+    from pptx import Presentation
+    prs = Presentation(path)
+    all_text = []
+    for slide in prs.slides:
+        lines = []
+        for shape in slide.shapes:
+            if hasattr(shape, "text"):
+                for line in shape.text.splitlines():
+                    line = line.rstrip()
+                    if line:
+                        lines.append(line)
+        slide_block = "<BR>".join(lines)
+        all_text.append(slide_block)
+    return "<slide>".join(all_text)
+
+
+def _rels_path(part_name):
+    directory, name = posixpath.split(part_name)
+    return posixpath.join(directory, "_rels", name + ".rels")
+
+
+def _read_rels(archive, part_name):
+    """Returns the relationships of a package part as an {rId: (type, part name)} dict."""
+    rels = {}
+    root = ET.fromstring(archive.read(_rels_path(part_name)))
+    base = posixpath.dirname(part_name)
+    for rel in root.iter(_PKG_REL + "Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target")
+        if target.startswith("/"):
+            target = target[1:]
+        else:
+            target = posixpath.normpath(posixpath.join(base, target))
+        rels[rel.get("Id")] = (rel.get("Type"), target)
+    return rels
+
+
+def _slide_part_names(archive):
+    """Returns the slide part names in presentation order."""
+    package_rels = _read_rels(archive, "")
+    presentation = next(target for rel_type, target in package_rels.values() if rel_type == _OFFICE_DOCUMENT_REL)
+    presentation_rels = _read_rels(archive, presentation)
+    root = ET.fromstring(archive.read(presentation))
+    slide_ids = root.find(_P + "sldIdLst")
+    if slide_ids is None:
+        return []
+    return [presentation_rels[sld_id.get(_R + "id")][1] for sld_id in slide_ids.findall(_P + "sldId")]
+
+
+def _paragraph_text(paragraph):
+    """Concatenates runs, fields and line breaks the same way python-pptx does."""
+    parts = []
+    for child in paragraph:
+        if child.tag == _A + "br":
+            parts.append("\v")
+        elif child.tag in (_A + "r", _A + "fld"):
+            t = child.find(_A + "t")
+            if t is not None and t.text:
+                parts.append(t.text)
+    return "".join(parts)
+
+
+def _slide_lines(stream):
+    """Streams one slide's XML and returns its non-empty text lines."""
+    lines = []
+    tags = []
+    elements = []
+    paragraphs = []
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            tags.append(elem.tag)
+            elements.append(elem)
+            continue
+        if tuple(tags) == _PARAGRAPH_PATH:
+            paragraphs.append(_paragraph_text(elem))
+        elif len(tags) == _SHAPE_DEPTH and tags[:3] == list(_PARAGRAPH_PATH[:3]):
+            # End of a top-level shape: emit its text and drop it from the tree.
+            for line in "\n".join(paragraphs).splitlines():
+                line = line.rstrip()
+                if line:
+                    lines.append(line)
+            paragraphs = []
+            elements[-2].remove(elem)
+        tags.pop()
+        elements.pop()
+    return lines
+
+
+def extract_text_pptx_xml(path):
+    """Extracts text from a .pptx file by streaming the slide XML straight out of the zip.
+
+    Produces the same output as `extract_text_pptx` without building the
+    python-pptx object model. `path` can also be a seekable binary file object.
+    """
+    all_text = []
+    with zipfile.ZipFile(path) as archive:
+        for part_name in _slide_part_names(archive):
+            with archive.open(part_name) as stream:
+                all_text.append("<BR>".join(_slide_lines(stream)))
+    return "<slide>".join(all_text)
+
+
+# Available .pptx extraction engines, selectable in the settings.
+PPTX_ENGINES = {
+    "python-pptx": extract_text_pptx,
+    "xml": extract_text_pptx_xml,
+}
+DEFAULT_PPTX_ENGINE = "python-pptx"
+
+
+def extract_text_ppt_native(path):
+    """Extracts text from an older .ppt file, or a binary file object, by reading its binary records directly."""
+    all_text = []
+    for shape_texts in ppt_binary.read_slide_texts(path):
+        lines = []
+        for text in shape_texts:
+            for line in text.splitlines():
+                line = line.strip()
+                if line:
+                    lines.append(line)
+        slide_block = "<BR>".join(lines)
+        all_text.append(slide_block)
+    return "<slide>".join(all_text)
+
+
+def com_available():
+    """Returns True if PowerPoint automation through win32com can be attempted."""
+    return importlib.util.find_spec("win32com") is not None
+
+
+def extract_text_ppt(path):
+    """Extracts text from an older .ppt file using the win32com library."""
+    # Imported here because COM is an optional, Windows-only fallback.
+    import pythoncom
+    import win32com.client
+    # COM must be initialised on every thread that uses it, including preview and worker threads.
+    pythoncom.CoInitialize()
+    ppt_app = win32com.client.Dispatch("PowerPoint.Application")
+    presentation = ppt_app.Presentations.Open(path, WithWindow=False)
+    all_text = []
+    for slide in presentation.Slides:
+        lines = []
+        for shape in slide.Shapes:
+            if shape.HasTextFrame and shape.TextFrame.HasText:
+                text = shape.TextFrame.TextRange.Text
+                for line in text.splitlines():
+                    line = line.strip()
+                    if line:
+                        lines.append(line)
+        slide_block = "<BR>".join(lines)
+        all_text.append(slide_block)
+    presentation.Close()
+    ppt_app.Quit()
+    return "<slide>".join(all_text)
+
+
+# Available .ppt extraction engines. "native" falls back to "com" when it cannot read a file.
+PPT_ENGINES = {
+    "native": extract_text_ppt_native,
+    "com": extract_text_ppt,
+}
+DEFAULT_PPT_ENGINE = "native"
+
+# Bump an engine's version whenever its output changes, so cached results are re-extracted.
+ENGINE_VERSIONS = {
+    "python-pptx": 1,
+    "xml": 1,
+    "native": 1,
+    "com": 1,
+}
+
+
+def engine_for(file_path, pptx_engine=DEFAULT_PPTX_ENGINE, ppt_engine=DEFAULT_PPT_ENGINE):
+    """Returns the name of the engine that would extract this file, or None if unsupported."""
+    if file_path.lower().endswith(".pptx"):
+        return pptx_engine
+    elif file_path.lower().endswith(".ppt"):
+        return ppt_engine
+    return None
+
+
+def _extract_ppt(file_path, ppt_engine):
+    if archives.is_member(file_path):
+        # PowerPoint can only open files on disk, so decks inside archives always use the native reader.
+        return extract_text_ppt_native(archives.open_member(file_path))
+    try:
+        return PPT_ENGINES[ppt_engine](file_path)
+    except Exception as e:
+        if ppt_engine == "com" or not com_available():
+            raise
+        print(f"Native .ppt reader failed for {file_path} ({e}), falling back to PowerPoint", file=sys.stderr)
+        return extract_text_ppt(file_path)
+
+
+def extract_lyrics(file_path, pptx_engine=DEFAULT_PPTX_ENGINE, ppt_engine=DEFAULT_PPT_ENGINE):
+    """Determines the file type and calls the appropriate text extraction method.
+
+    Decks inside zip archives (see `archives`) are read into memory and
+    extracted from there.
+    """
+    try:
+        if file_path.lower().endswith(".pptx"):
+            source = archives.open_member(file_path) if archives.is_member(file_path) else file_path
+            return PPTX_ENGINES[pptx_engine](source)
+        elif file_path.lower().endswith(".ppt"):
+            return _extract_ppt(file_path, ppt_engine)
+    except Exception as e:
+        # Diagnostics go to stderr so they never mix with the command-line JSON output.
+        print(f"Error extracting {file_path}: {e}", file=sys.stderr)
+        return ""
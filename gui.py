@@ -0,0 +1,1522 @@
+"""The PyQt5 window: file list, preview, search, settings and the import and backup threads.
+
+Started by `main.py`, which keeps the command line and the extraction
+worker processes from ever importing this module.
+"""
+import sys
+import time
+
+# Taken before the heavy imports, for the startup-timing report.
+PROCESS_START = time.perf_counter()
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from PyQt5.QtWidgets import (
+    QApplication, QWidget, QVBoxLayout, QLabel, QPushButton,
+    QFileDialog, QListView, QProgressBar, QMessageBox, QHBoxLayout,
+    QGroupBox, QDialog, QFormLayout, QLineEdit, QSpinBox, QComboBox,
+    QListWidget, QListWidgetItem, QAbstractItemView, QTextEdit, QStyle, QStyleOptionButton,
+    QStyledItemDelegate, QCheckBox
+)
+from PyQt5.QtCore import (
+    Qt, QSize, QRect, QThread, QTimer, QObject, QEvent, QEventLoop, QAbstractListModel, QModelIndex, pyqtSignal
+)
+from PyQt5.QtGui import QPainter, QMouseEvent, QIcon
+import songdb
+import backup
+import importer
+import extractors
+import pipeline
+import isolation
+import tracing
+import search
+import archives
+from extract_cache import ExtractionCache
+from scanner import DeckScanner
+
+IMPORTS_DONE = time.perf_counter()
+_dark_stylesheet = None
+
+def apply_dark_style(app):
+    """Applies the qdarkstyle theme to the whole application, building the stylesheet only once.
+
+    Dialogs inherit the application stylesheet, so Qt parses it once
+    instead of once per window.
+    """
+    global _dark_stylesheet
+    if _dark_stylesheet is None:
+        # Imported here so the command line and worker processes never load the theme.
+        import qdarkstyle
+        _dark_stylesheet = qdarkstyle.load_stylesheet_pyqt5()
+    if app.styleSheet() != _dark_stylesheet:
+        app.setStyleSheet(_dark_stylesheet)
+
+# Custom Dialog for Settings
+class SettingsDialog(QDialog):
+    """A dialog to customize default font, category and extraction options for song imports."""
+    def __init__(self, parent=None, font="Calibri", category="autoadd", workers=1,
+                 pptx_engine=extractors.DEFAULT_PPTX_ENGINE, ppt_engine=extractors.DEFAULT_PPT_ENGINE,
+                 compact_slides=False, timeout=isolation.DEFAULT_TIMEOUT,
+                 memory_limit=isolation.DEFAULT_MEMORY_LIMIT):
+        super().__init__(parent)
+        self.setWindowTitle("Customize Settings")
+        self.setFixedSize(400, 330)
+        
+        layout = QFormLayout()
+        
+        # User can set a default font.
+        self.font_input = QLineEdit(self)
+        self.font_input.setText(font)
+        layout.addRow("Default Font:", self.font_input)
+        
+        # User can set a default category.
+        self.category_input = QLineEdit(self)
+        self.category_input.setText(category)
+        layout.addRow("Default Category:", self.category_input)
+
+        # User can set how many processes extract decks in parallel (0 = no worker processes).
+        self.workers_input = QSpinBox(self)
+        self.workers_input.setRange(0, max(os.cpu_count() or 1, 1) * 2)
+        self.workers_input.setValue(workers)
+        layout.addRow("Extraction Workers:", self.workers_input)
+
+        # User can pick the .pptx extraction engine ("xml" skips the python-pptx object model).
+        self.engine_input = QComboBox(self)
+        self.engine_input.addItems(list(extractors.PPTX_ENGINES))
+        self.engine_input.setCurrentText(pptx_engine)
+        layout.addRow("PPTX Engine:", self.engine_input)
+
+        # User can pick the .ppt engine ("com" drives an installed PowerPoint).
+        self.ppt_engine_input = QComboBox(self)
+        self.ppt_engine_input.addItems(list(extractors.PPT_ENGINES))
+        self.ppt_engine_input.setCurrentText(ppt_engine)
+        layout.addRow("PPT Engine:", self.ppt_engine_input)
+
+        # User can bound how long, and how much memory, one deck's extraction may take.
+        self.timeout_input = QSpinBox(self)
+        self.timeout_input.setRange(5, 3600)
+        self.timeout_input.setSuffix(" s")
+        self.timeout_input.setValue(int(timeout))
+        layout.addRow("Timeout per File:", self.timeout_input)
+
+        self.memory_input = QSpinBox(self)
+        self.memory_input.setRange(64, 65536)
+        self.memory_input.setSingleStep(256)
+        self.memory_input.setSuffix(" MB")
+        self.memory_input.setValue(memory_limit)
+        layout.addRow("Memory per Worker:", self.memory_input)
+
+        # User can store repeated slides (such as a chorus) once, with their order in slideseq.
+        self.compact_input = QCheckBox("Store repeated slides once", self)
+        self.compact_input.setChecked(compact_slides)
+        layout.addRow("Slides:", self.compact_input)
+        
+        button_layout = QHBoxLayout()
+        ok_button = QPushButton("OK")
+        cancel_button = QPushButton("Cancel")
+        
+        ok_button.clicked.connect(self.accept)
+        cancel_button.clicked.connect(self.reject)
+        
+        button_layout.addWidget(ok_button)
+        button_layout.addWidget(cancel_button)
+        
+        layout.addRow(button_layout)
+        self.setLayout(layout)
+
+    def get_settings(self):
+        """Returns the font, category, worker count, extraction engines, slide compaction and limits entered by the user."""
+        return (self.font_input.text(), self.category_input.text(), self.workers_input.value(),
+                self.engine_input.currentText(), self.ppt_engine_input.currentText(),
+                self.compact_input.isChecked(), self.timeout_input.value(), self.memory_input.value())
+
+# Custom delegate to draw delete buttons
+class ButtonDelegate(QStyledItemDelegate):
+    """Paints a small 'x' button on each list item for individual deletion."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent_widget = parent
+
+    def paint(self, painter: QPainter, option, index):
+        """Paints the button and list item text."""
+        super().paint(painter, option, index)
+        
+        # Calculate the button's position.
+        button_rect = QRect(
+            option.rect.right() - 25,
+            option.rect.top() + (option.rect.height() - 20) // 2,
+            20, 20
+        )
+        
+        button_option = QStyleOptionButton()
+        button_option.rect = button_rect
+        button_option.text = "x"
+        button_option.state = QStyle.State_Enabled
+        
+        # Change button color based on selection state for better visibility.
+        if option.state & QStyle.State_Selected:
+            button_option.palette.setColor(button_option.palette.ButtonText, Qt.white)
+        else:
+            button_option.palette.setColor(button_option.palette.ButtonText, Qt.red)
+        
+        QApplication.style().drawControl(QStyle.CE_PushButton, button_option, painter, None)
+
+    def editorEvent(self, event, model, option, index):
+        """Handles clicks on the 'x' button to delete the corresponding file."""
+        if event.type() == QMouseEvent.MouseButtonPress:
+            button_rect = QRect(
+                option.rect.right() - 25,
+                option.rect.top() + (option.rect.height() - 20) // 2,
+                20, 20
+            )
+            
+            if button_rect.contains(event.pos()):
+                # Delete the file when the 'x' button is clicked.
+                self.parent_widget.delete_single_file(index.row())
+                return True
+        return super().editorEvent(event, model, option, index)
+
+# List model holding the files to import
+class FileListModel(QAbstractListModel):
+    """An ordered list of file paths with O(1) membership checks.
+
+    Rows are inserted and removed in ranges, so views only update the rows
+    that changed instead of rebuilding every item.
+    """
+    # Above this many separate ranges, one reset is cheaper than many removals.
+    MAX_REMOVE_RANGES = 32
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.paths = []
+        self._members = set()
+        self._item_size = QSize(20, 25)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.paths)
+
+    def data(self, index, role=Qt.DisplayRole):
+        """Shows the file name (and archive, for decks inside one), with the full path as a tooltip."""
+        if not index.isValid():
+            return None
+        path = self.paths[index.row()]
+        if role == Qt.DisplayRole:
+            return archives.display_name(path)
+        elif role in (Qt.ToolTipRole, Qt.UserRole):
+            return path
+        elif role == Qt.SizeHintRole:
+            return self._item_size
+        return None
+
+    def __contains__(self, path):
+        return path in self._members
+
+    def add_paths(self, paths):
+        """Appends the paths that are not already listed and returns how many were added."""
+        new_paths = []
+        for path in paths:
+            if path not in self._members:
+                self._members.add(path)
+                new_paths.append(path)
+        if new_paths:
+            first = len(self.paths)
+            self.beginInsertRows(QModelIndex(), first, first + len(new_paths) - 1)
+            self.paths.extend(new_paths)
+            self.endInsertRows()
+        return len(new_paths)
+
+    def remove_rows(self, rows):
+        """Removes the given rows, one contiguous range at a time."""
+        ranges = []
+        for row in sorted(set(rows)):
+            if not 0 <= row < len(self.paths):
+                continue
+            if ranges and ranges[-1][1] == row - 1:
+                ranges[-1][1] = row
+            else:
+                ranges.append([row, row])
+        if len(ranges) > self.MAX_REMOVE_RANGES:
+            doomed = set(rows)
+            self.beginResetModel()
+            self.paths = [path for row, path in enumerate(self.paths) if row not in doomed]
+            self._members = set(self.paths)
+            self.endResetModel()
+            return
+        # Removing from the bottom up keeps the remaining row numbers valid.
+        for first, last in reversed(ranges):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            self._members.difference_update(self.paths[first:last + 1])
+            del self.paths[first:last + 1]
+            self.endRemoveRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.paths = []
+        self._members = set()
+        self.endResetModel()
+
+# Custom list view to handle drag-and-drop and key press events
+class CustomListWidget(QListView):
+    """A QListView over a `FileListModel` with drag-and-drop and delete key functionality."""
+    def __init__(self, main_window, parent=None):
+        super().__init__(parent)
+        self.main_window = main_window
+        self.setModel(FileListModel(self))
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setAcceptDrops(True)
+        self.setDragDropMode(QAbstractItemView.DropOnly)
+        self.setAlternatingRowColors(True)
+        # Every row has the same height, so the view never measures rows it does not show.
+        self.setUniformItemSizes(True)
+        self.setItemDelegate(ButtonDelegate(self.main_window))
+
+    def selected_rows(self):
+        """Returns the selected row numbers, read from the selection ranges."""
+        rows = []
+        for selection_range in self.selectionModel().selection():
+            rows.extend(range(selection_range.top(), selection_range.bottom() + 1))
+        return rows
+
+    def keyPressEvent(self, event):
+        """Triggers deletion of selected items when the delete key is pressed."""
+        if event.key() == Qt.Key_Delete:
+            self.main_window.delete_selected()
+        super().keyPressEvent(event)
+
+    def dragEnterEvent(self, event):
+        """Allows drag-and-drop of files from outside the application."""
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+    
+    def dropEvent(self, event):
+        """Adds dropped files, folders and zip archives to the file list."""
+        # Dropped folders and archives are scanned recursively in the background.
+        self.main_window.start_scan([url.toLocalFile() for url in event.mimeData().urls()])
+        event.accept()
+
+# Background thread for preview extraction
+class PreviewThread(QThread):
+    """Extracts lyrics for the preview pane off the GUI thread.
+
+    Each request replaces whatever is still queued, so stale selections are
+    dropped. The first path of a request is the selected file and the rest
+    are prefetched.
+    """
+    result_ready = pyqtSignal(int, str, str)
+
+    def __init__(self, extract, parent=None):
+        super().__init__(parent)
+        self.extract = extract
+        self._condition = threading.Condition()
+        self._jobs = deque()
+        self._generation = 0
+        self._stopped = False
+
+    def request(self, generation, paths):
+        """Queues paths for extraction, discarding any pending jobs."""
+        with self._condition:
+            self._generation = generation
+            self._jobs = deque(paths)
+            self._condition.notify()
+
+    def stop(self):
+        """Stops the thread once the current extraction finishes."""
+        with self._condition:
+            self._stopped = True
+            self._jobs.clear()
+            self._condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._jobs and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                path = self._jobs.popleft()
+                generation = self._generation
+            lyrics = self.extract(path) or ""
+            self.result_ready.emit(generation, path, lyrics)
+
+# Background thread for library searches
+class SearchThread(QThread):
+    """Runs full-text searches over songs.db off the GUI thread.
+
+    Only the latest query is kept, so typing quickly never queues stale
+    searches. The index for each database is opened on this thread and synced
+    before searching. `results_ready` carries (generation, matches, error).
+    """
+    results_ready = pyqtSignal(int, list, str)
+
+    def __init__(self, parent=None, limit=50):
+        super().__init__(parent)
+        self.limit = limit
+        self._condition = threading.Condition()
+        self._pending = None
+        self._stopped = False
+        self._indexes = {}
+
+    def request(self, generation, db_path, query):
+        """Queues a search, replacing any search still waiting."""
+        with self._condition:
+            self._pending = (generation, db_path, query)
+            self._condition.notify()
+
+    def stop(self):
+        """Stops the thread once the current search finishes."""
+        with self._condition:
+            self._stopped = True
+            self._pending = None
+            self._condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    break
+                (generation, db_path, query), self._pending = self._pending, None
+            try:
+                index = self._indexes.get(db_path)
+                if index is None:
+                    index = self._indexes[db_path] = search.LyricsSearchIndex(db_path)
+                matches = [list(match) for match in index.search(query, self.limit)]
+                self.results_ready.emit(generation, matches, "")
+            except sqlite3.Error as e:
+                self.results_ready.emit(generation, [], str(e))
+        for index in self._indexes.values():
+            index.close()
+
+# Background thread for folder scans
+class ScanThread(QThread):
+    """Walks folders with a `DeckScanner` and streams the decks it finds in chunks.
+
+    `decks_found` carries a list of paths at most `chunk_size` long, sent at
+    least every `interval` seconds while decks keep turning up, so the list
+    fills in while the scan runs. `scan_finished` carries (decks found,
+    folders that could not be read, cancelled). `started` and `seconds`
+    hold when the scan began (epoch seconds) and how long it took.
+    """
+    decks_found = pyqtSignal(list)
+    scan_finished = pyqtSignal(int, int, bool)
+
+    def __init__(self, roots, parent=None, chunk_size=500, interval=0.1):
+        super().__init__(parent)
+        self.scanner = DeckScanner(roots, open_archives=True)
+        self.chunk_size = chunk_size
+        self.interval = interval
+        self.started = None
+        self.seconds = 0.0
+
+    def cancel(self):
+        self.scanner.cancel()
+
+    def run(self):
+        self.started = time.time()
+        began = time.perf_counter()
+        total = 0
+        chunk = []
+        last_sent = time.perf_counter()
+        for path in self.scanner:
+            chunk.append(path)
+            if len(chunk) >= self.chunk_size or time.perf_counter() - last_sent >= self.interval:
+                self.decks_found.emit(chunk)
+                total += len(chunk)
+                chunk = []
+                last_sent = time.perf_counter()
+        if chunk:
+            self.decks_found.emit(chunk)
+            total += len(chunk)
+        self.seconds = time.perf_counter() - began
+        self.scan_finished.emit(total, len(self.scanner.errors), self.scanner.cancelled)
+
+# Dialog for resolving duplicate song names before an import
+class DuplicateDialog(QDialog):
+    """Lists the songs that already exist with different lyrics so the user can pick which ones to overwrite.
+
+    With `db_path` the dialog names the database, for imports into several.
+    """
+    def __init__(self, parent, names, db_path=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Duplicate Songs - {os.path.basename(db_path)}" if db_path else "Duplicate Songs")
+        self.resize(450, 400)
+
+        layout = QVBoxLayout()
+        where = f" in {db_path}" if db_path else ""
+        label = QLabel(f"{len(names)} song(s) already exist{where} with different lyrics. Check the ones to "
+                       "overwrite; unchecked songs are skipped.")
+        label.setWordWrap(True)
+        layout.addWidget(label)
+
+        self.name_list = QListWidget(self)
+        for name in names:
+            item = QListWidgetItem(name)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Unchecked)
+            self.name_list.addItem(item)
+        layout.addWidget(self.name_list)
+
+        button_layout = QHBoxLayout()
+        check_all_button = QPushButton("Check All")
+        uncheck_all_button = QPushButton("Uncheck All")
+        ok_button = QPushButton("Continue")
+        cancel_button = QPushButton("Cancel Import")
+
+        check_all_button.clicked.connect(lambda: self.set_all(Qt.Checked))
+        uncheck_all_button.clicked.connect(lambda: self.set_all(Qt.Unchecked))
+        ok_button.clicked.connect(self.accept)
+        cancel_button.clicked.connect(self.reject)
+
+        for button in (check_all_button, uncheck_all_button, ok_button, cancel_button):
+            button_layout.addWidget(button)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+    def set_all(self, state):
+        """Checks or unchecks every song."""
+        for row in range(self.name_list.count()):
+            self.name_list.item(row).setCheckState(state)
+
+    def overwrite_names(self):
+        """Returns the names the user chose to overwrite."""
+        return {
+            self.name_list.item(row).text()
+            for row in range(self.name_list.count())
+            if self.name_list.item(row).checkState() == Qt.Checked
+        }
+
+# Background thread that runs an import
+class InjectionWorker(QThread):
+    """Runs an `ExtractionPipeline` off the GUI thread and reports its progress.
+
+    `progress` carries (written, total, extract files/sec, write files/sec,
+    ETA in seconds or -1). `file_done` carries (name, action) as each file is
+    applied, and `import_finished` carries (results, error, files not processed).
+    With `snapshot_keep` a pre-import snapshot of every target database is
+    taken before anything is written, and the import is abandoned if one fails.
+    """
+    progress = pyqtSignal(int, int, float, float, float)
+    file_done = pyqtSignal(str, str)
+    import_finished = pyqtSignal(object, object, int)
+
+    def __init__(self, run, writer, parent=None, snapshot_keep=None):
+        super().__init__(parent)
+        self.pipeline = run
+        self.writer = writer
+        self.writer.on_result = self.file_done.emit
+        # A `MultiTargetWriter` writes to several databases, each with its own writer.
+        self.targets = getattr(writer, "targets", [writer])
+        self.snapshot_keep = snapshot_keep
+        self.snapshots = {}
+
+    def cancel(self, commit=True):
+        """Stops the import, committing or rolling back what has finished."""
+        self.pipeline.cancel(commit)
+
+    def emit_progress(self):
+        stats = self.pipeline.stats
+        eta = stats.eta()
+        self.progress.emit(stats.written, stats.total, stats.extract_rate(), stats.write_rate(),
+                           -1.0 if eta is None else eta)
+
+    def run(self):
+        if self.snapshot_keep is not None:
+            for target in self.targets:
+                try:
+                    self.snapshots[target.db_path] = backup.snapshot_before_import(target.db_path, self.snapshot_keep)
+                except (OSError, sqlite3.Error) as e:
+                    self.import_finished.emit(
+                        [], RuntimeError(f"pre-import snapshot of {target.db_path} failed, nothing was imported: {e}"),
+                        self.pipeline.stats.total
+                    )
+                    return
+        self.pipeline.start(self.writer)
+        while self.pipeline.is_running():
+            self.emit_progress()
+            self.msleep(100)
+        self.pipeline.wait()
+        self.emit_progress()
+        stats = self.pipeline.stats
+        not_processed = stats.total - stats.written if self.pipeline.cancelled else 0
+        self.import_finished.emit(self.writer.results, self.pipeline.error, not_processed)
+
+# Background thread for database backups
+class BackupThread(QThread):
+    """Backs up one or more songs.db files with the SQLite backup API off the GUI thread.
+
+    `progress` carries (pages copied, total pages) of the database being
+    copied, and `backup_finished` carries (backup paths, one per line, error
+    message); the error is empty unless a backup failed, which stops the rest.
+    """
+    progress = pyqtSignal(int, int)
+    backup_finished = pyqtSignal(str, str)
+
+    def __init__(self, db_paths, parent=None, compress=False, keep=backup.DEFAULT_KEEP):
+        super().__init__(parent)
+        self.db_paths = list(db_paths)
+        self.compress = compress
+        self.keep = keep
+
+    def run(self):
+        paths = []
+        for db_path in self.db_paths:
+            try:
+                paths.append(backup.backup_database(db_path, compress=self.compress, progress=self.progress.emit))
+            except (OSError, sqlite3.Error) as e:
+                self.backup_finished.emit("\n".join(paths), f"{db_path}: {e}")
+                return
+            backup.prune_backups(db_path, self.keep)
+        self.backup_finished.emit("\n".join(paths), "")
+
+# Main Application Window
+class SongDBInjector(QWidget):
+    """The main application window for injecting songs into a VerseVIEW database."""
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("VerseView Song Adder")
+        self.resize(1200, 800)
+        apply_dark_style(QApplication.instance())
+        self.setWindowIcon(QIcon("app_icon.ico"))
+        # Every database an import writes to; `db_path` is the first, used for search.
+        self.db_path = None
+        self.db_paths = []
+        try:
+            self.extraction_cache = ExtractionCache()
+        except (OSError, sqlite3.Error) as e:
+            # Extraction still works without the cache, it is just slower.
+            print(f"Extraction cache unavailable: {e}", file=sys.stderr)
+            self.extraction_cache = None
+        # Recently previewed lyrics, most recently used last.
+        self.preview_cache = OrderedDict()
+        self.preview_cache_size = 200
+        self.prefetch_count = 5
+        self.preview_generation = 0
+        self.preview_path = None
+        self.preview_thread = PreviewThread(self.extract_lyrics, self)
+        self.preview_thread.result_ready.connect(self.on_preview_ready)
+        self.preview_thread.start()
+        self.search_generation = 0
+        self.search_thread = SearchThread(self)
+        self.search_thread.results_ready.connect(self.on_search_results)
+        self.search_thread.start()
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.run_search)
+        self.injection_worker = None
+        # Set while the dry run that plans a real import is running.
+        self.import_after_plan = False
+        self.backup_thread = None
+        self.snapshot_keep = backup.DEFAULT_SNAPSHOT_KEEP
+        self.scan_threads = []
+        self.scan_found = 0
+        # (start, seconds, decks found) of the scans since the last import, for its trace.
+        self.scan_timings = []
+        self.layout_widgets()
+        self.setup_connections()
+        self.db_search_scheduled = False
+
+    def showEvent(self, event):
+        """Searches for songs.db once the window is on screen, so the search never delays the first paint."""
+        super().showEvent(event)
+        if not self.db_search_scheduled:
+            self.db_search_scheduled = True
+            self.db_label.setText("Searching for songs.db...")
+            QTimer.singleShot(0, self.auto_find_db)
+
+    def layout_widgets(self):
+        """Sets up the UI elements and their layout."""
+        main_layout = QVBoxLayout()
+        main_layout.setContentsMargins(20, 20, 20, 20)
+        main_layout.setSpacing(15)
+
+        title_label = QLabel("VerseView Song Adder\n Add Songs from PPT's Automatically")
+        title_label.setAlignment(Qt.AlignCenter)
+        title_label.setStyleSheet("font-size: 32px; font-weight: bold; color: #E0E0E0; margin-bottom: 10px;")
+        main_layout.addWidget(title_label)
+        
+        # Main split layout.
+        content_layout = QHBoxLayout()
+        content_layout.setSpacing(20)
+
+        # Left side: DB and File management.
+        left_layout = QVBoxLayout()
+        left_layout.setSpacing(15)
+        
+        # Database Selection section.
+        db_group = QGroupBox("Database Selection")
+        db_group.setStyleSheet("font-size: 18px; font-weight: bold;")
+        db_layout = QVBoxLayout()
+        self.db_label = QLabel("Looking for songs.db...")
+        self.db_label.setWordWrap(True)
+        self.db_label.setStyleSheet("font-size: 16px; font-weight: normal; margin-bottom: 5px;")
+        db_layout.addWidget(self.db_label)
+        
+        db_button = QPushButton("Choose .db File Manually")
+        db_button.setFixedHeight(40)
+        db_button.setStyleSheet("font-size: 15px; font-weight: bold; padding: 5px; border-radius: 5px;")
+        db_button.setToolTip("Click to manually select the songs.db file if it was not found automatically.")
+        db_layout.addWidget(db_button)
+        self.db_button = db_button
+        db_group.setLayout(db_layout)
+        left_layout.addWidget(db_group)
+        
+        # File Selection section.
+        file_group = QGroupBox("Song Files (.ppt / .pptx)")
+        file_group.setStyleSheet("font-size: 18px; font-weight: bold;")
+        file_layout = QVBoxLayout()
+
+        file_buttons_layout = QHBoxLayout()
+        file_buttons_layout.setSpacing(10)
+        self.folder_button = QPushButton("Scan Folder")
+        self.folder_button.setFixedHeight(40)
+        self.folder_button.setStyleSheet("font-size: 15px; font-weight: bold; padding: 5px; border-radius: 5px;")
+        self.folder_button.setToolTip("Select a folder to automatically add all PowerPoint files from it.")
+        file_buttons_layout.addWidget(self.folder_button)
+
+        self.add_file_button = QPushButton("Add File(s)")
+        self.add_file_button.setFixedHeight(40)
+        self.add_file_button.setStyleSheet("font-size: 15px; font-weight: bold; padding: 5px; border-radius: 5px;")
+        self.add_file_button.setToolTip("Select one or more PowerPoint files to add to the list.")
+        file_buttons_layout.addWidget(self.add_file_button)
+        
+        self.clear_list_button = QPushButton("Clear List")
+        self.clear_list_button.setFixedHeight(40)
+        self.clear_list_button.setStyleSheet("font-size: 15px; font-weight: bold; padding: 5px; border-radius: 5px;")
+        self.clear_list_button.setToolTip("Remove all files from the list.")
+        file_buttons_layout.addWidget(self.clear_list_button)
+        
+        self.delete_selected_button = QPushButton("Delete Selected")
+        self.delete_selected_button.setFixedHeight(40)
+        self.delete_selected_button.setStyleSheet("font-size: 15px; font-weight: bold; padding: 5px; border-radius: 5px;")
+        self.delete_selected_button.setToolTip("Remove selected files from the list. Use Shift or Ctrl to select multiple files.")
+        file_buttons_layout.addWidget(self.delete_selected_button)
+
+        file_layout.addLayout(file_buttons_layout)
+
+        self.file_list = CustomListWidget(self)
+        self.file_model = self.file_list.model()
+        self.file_list.setStyleSheet("font-size: 14px; padding: 5px;")
+        self.file_list.setToolTip("Drag and drop PowerPoint files here. You can also use the Delete key to remove selected files.")
+        file_layout.addWidget(self.file_list)
+
+        scan_layout = QHBoxLayout()
+        self.scan_label = QLabel("")
+        self.scan_label.setStyleSheet("font-size: 13px; font-weight: normal;")
+        scan_layout.addWidget(self.scan_label, 1)
+        self.stop_scan_button = QPushButton("Stop Scan")
+        self.stop_scan_button.setStyleSheet("font-size: 13px; padding: 3px 10px;")
+        self.stop_scan_button.setToolTip("Stop scanning folders; files found so far stay in the list.")
+        self.stop_scan_button.setVisible(False)
+        scan_layout.addWidget(self.stop_scan_button)
+        file_layout.addLayout(scan_layout)
+        file_group.setLayout(file_layout)
+        left_layout.addWidget(file_group)
+        
+        content_layout.addLayout(left_layout, 2)
+
+        # Right side: Preview and Controls.
+        right_layout = QVBoxLayout()
+        right_layout.setSpacing(15)
+
+        # Preview pane section.
+        preview_group = QGroupBox("Song Preview")
+        preview_group.setStyleSheet("font-size: 18px; font-weight: bold;")
+        preview_layout = QVBoxLayout()
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search library...")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.setToolTip("Search the names and lyrics of the songs already in the database.")
+        self.search_box.setStyleSheet("font-size: 14px; font-weight: normal; padding: 4px;")
+        preview_layout.addWidget(self.search_box)
+        self.search_results = QListWidget()
+        self.search_results.setStyleSheet("font-size: 13px; font-weight: normal;")
+        self.search_results.setWordWrap(True)
+        self.search_results.setMaximumHeight(180)
+        self.search_results.setVisible(False)
+        preview_layout.addWidget(self.search_results)
+        self.preview_text = QTextEdit()
+        self.preview_text.setReadOnly(True)
+        self.preview_text.setStyleSheet("font-size: 14px; padding: 10px; border: 1px solid #555;")
+        preview_layout.addWidget(self.preview_text)
+        preview_group.setLayout(preview_layout)
+        right_layout.addWidget(preview_group, 1)
+
+        # Control Panel section.
+        controls_group = QGroupBox("Settings & Actions")
+        controls_group.setStyleSheet("font-size: 18px; font-weight: bold;")
+        controls_layout = QVBoxLayout()
+        
+        self.custom_font_label = QLabel("Font: Calibri")
+        self.custom_cat_label = QLabel("Category: autoadd")
+        self.custom_font_label.setStyleSheet("font-size: 14px;")
+        self.custom_cat_label.setStyleSheet("font-size: 14px;")
+        controls_layout.addWidget(self.custom_font_label)
+        controls_layout.addWidget(self.custom_cat_label)
+
+        customize_button = QPushButton("Customize Settings")
+        customize_button.setFixedHeight(40)
+        customize_button.setStyleSheet("font-size: 15px; font-weight: bold; padding: 5px; border-radius: 5px;")
+        customize_button.setToolTip("Change the default font and category for new songs.")
+        self.customize_button = customize_button
+        controls_layout.addWidget(customize_button)
+        
+        backup_button = QPushButton("Backup Database")
+        backup_button.setFixedHeight(40)
+        backup_button.setStyleSheet("font-size: 15px; font-weight: bold; padding: 5px; border-radius: 5px;")
+        backup_button.setToolTip("Create a backup copy of the current songs.db before making changes.")
+        self.backup_button = backup_button
+        controls_layout.addWidget(backup_button)
+
+        self.progress = QProgressBar()
+        self.progress.setVisible(False)
+        controls_layout.addWidget(self.progress)
+
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("font-size: 13px; font-weight: normal;")
+        self.status_label.setVisible(False)
+        controls_layout.addWidget(self.status_label)
+
+        self.cancel_button = QPushButton("Cancel Import")
+        self.cancel_button.setFixedHeight(40)
+        self.cancel_button.setStyleSheet("font-size: 15px; font-weight: bold; padding: 5px; border-radius: 5px; background-color: #8b2e2e;")
+        self.cancel_button.setToolTip("Stop the running import and choose whether to keep or roll back the finished songs.")
+        self.cancel_button.setVisible(False)
+        controls_layout.addWidget(self.cancel_button)
+        
+        self.inject_button = QPushButton("Add Songs to Database")
+        self.inject_button.setFixedHeight(50)
+        self.inject_button.setStyleSheet("font-size: 18px; font-weight: bold; padding: 5px; border-radius: 5px; background-color: #2e8b57;")
+        self.inject_button.setToolTip("Click to add all files from the list to the selected database.")
+        controls_layout.addWidget(self.inject_button)
+
+        self.dry_run_button = QPushButton("Preview Changes")
+        self.dry_run_button.setFixedHeight(35)
+        self.dry_run_button.setStyleSheet("font-size: 15px; padding: 5px; border-radius: 5px;")
+        self.dry_run_button.setToolTip("Show which songs would be added, overwritten or left unchanged, without writing anything.")
+        controls_layout.addWidget(self.dry_run_button)
+
+        controls_group.setLayout(controls_layout)
+        controls_group.setFixedWidth(350)
+        right_layout.addWidget(controls_group)
+        
+        content_layout.addLayout(right_layout, 1)
+        
+        main_layout.addLayout(content_layout)
+        self.setLayout(main_layout)
+
+        self.default_font = importer.DEFAULT_FONT
+        self.default_category = importer.DEFAULT_CATEGORY
+        self.extraction_workers = pipeline.default_worker_count()
+        self.pptx_engine = extractors.DEFAULT_PPTX_ENGINE
+        self.ppt_engine = extractors.DEFAULT_PPT_ENGINE
+        self.compact_slides = False
+        self.extraction_timeout = isolation.DEFAULT_TIMEOUT
+        self.memory_limit = isolation.DEFAULT_MEMORY_LIMIT
+
+    def setup_connections(self):
+        """Connects UI elements to their corresponding functions."""
+        self.db_button.clicked.connect(self.choose_db)
+        self.folder_button.clicked.connect(self.scan_folder)
+        self.add_file_button.clicked.connect(self.add_file)
+        self.clear_list_button.clicked.connect(self.clear_list)
+        self.delete_selected_button.clicked.connect(self.delete_selected)
+        self.stop_scan_button.clicked.connect(self.stop_scans)
+        self.file_list.selectionModel().selectionChanged.connect(self.preview_selected_file)
+        self.customize_button.clicked.connect(self.customize_settings)
+        self.backup_button.clicked.connect(self.backup_db)
+        self.inject_button.clicked.connect(self.inject_all)
+        self.dry_run_button.clicked.connect(self.preview_changes)
+        self.cancel_button.clicked.connect(self.cancel_injection)
+        self.search_box.textChanged.connect(self.search_timer.start)
+        self.search_results.currentItemChanged.connect(self.preview_library_song)
+
+    def auto_find_db(self):
+        """Attempts to automatically locate the VerseVIEW songs.db files, keeping every install found."""
+        found = importer.find_songs_dbs()
+        if found:
+            self.set_databases(found, "Auto-selected")
+        else:
+            self.db_label.setText("songs.db not found automatically")
+            self.db_label.setToolTip("Please click 'Choose .db File Manually' to select the database file.")
+
+    def choose_db(self):
+        """Opens a file dialog for manual database selection; several databases can be picked."""
+        paths, _ = QFileDialog.getOpenFileNames(self, "Select Database(s)", "", "*.db")
+        if paths:
+            self.set_databases(paths, "Selected")
+
+    def set_databases(self, paths, how):
+        """Makes `paths` the databases an import writes to, each deck extracted once for all of them."""
+        self.db_paths = list(paths)
+        self.db_path = self.db_paths[0]
+        if len(self.db_paths) == 1:
+            self.db_label.setText(f"{how} DB: {self.db_path}")
+        else:
+            self.db_label.setText(f"{how} {len(self.db_paths)} DBs: {self.db_path} (+{len(self.db_paths) - 1} more)")
+        self.db_label.setToolTip("\n".join(self.db_paths))
+
+    def scan_folder(self):
+        """Scans a selected folder for PowerPoint files and adds them."""
+        folder = QFileDialog.getExistingDirectory(self, "Select Folder")
+        if folder:
+            self.start_scan([folder])
+
+    def start_scan(self, roots):
+        """Scans files and folders recursively in the background, adding decks as they are found."""
+        if not self.scan_threads:
+            self.scan_found = 0
+        thread = ScanThread(roots, self)
+        thread.decks_found.connect(self.add_files_to_list)
+        thread.scan_finished.connect(
+            lambda found, errors, cancelled: self.on_scan_finished(thread, found, errors, cancelled)
+        )
+        self.scan_threads.append(thread)
+        self.scan_label.setText("Scanning...")
+        self.stop_scan_button.setVisible(True)
+        thread.start()
+
+    def stop_scans(self):
+        """Cancels every running folder scan."""
+        for thread in self.scan_threads:
+            thread.cancel()
+
+    def on_scan_finished(self, thread, found, errors, cancelled):
+        """Reports the scan result once the last running scan is done."""
+        thread.wait()
+        self.scan_threads.remove(thread)
+        self.scan_found += found
+        self.scan_timings.append((thread.started, thread.seconds, found))
+        if self.scan_threads:
+            return
+        self.stop_scan_button.setVisible(False)
+        message = f"Scan {'stopped' if cancelled else 'finished'}: {self.scan_found} file(s) found"
+        if errors:
+            message += f", {errors} folder(s) could not be read"
+        self.scan_label.setText(message)
+
+    def add_file(self):
+        """Opens a file dialog for adding one or more PowerPoint files or zip archives of them."""
+        new_files, _ = QFileDialog.getOpenFileNames(
+            self, "Add File(s)", "", "PowerPoint Files and Archives (*.pptx *.ppt *.zip);;PowerPoint Files (*.pptx *.ppt)"
+        )
+        zips = [path for path in new_files if archives.is_archive(path)]
+        decks = [path for path in new_files if not archives.is_archive(path)]
+        if decks:
+            self.add_files_to_list(decks)
+        if zips:
+            # Archives are listed in the background, like folders.
+            self.start_scan(zips)
+
+    @property
+    def files(self):
+        """The listed file paths, in order. Change them through `file_model`."""
+        return self.file_model.paths
+
+    def add_files_to_list(self, new_files):
+        """Adds a list of new files to the application's internal list and UI."""
+        if self.file_model.add_paths(new_files):
+            self.update_file_list()
+        if self.scan_threads:
+            self.scan_label.setText(f"Scanning... {len(self.files)} file(s) in the list")
+
+    def clear_list(self):
+        """Clears all files from the list with a confirmation."""
+        if not self.files:
+            return
+        
+        reply = QMessageBox.question(self, "Clear List",
+                                     "Are you sure you want to clear all files from the list?",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        
+        if reply == QMessageBox.Yes:
+            self.file_model.clear()
+            self.update_file_list()
+
+    def delete_single_file(self, row):
+        """Deletes a single file from the list without confirmation.
+        
+        This is triggered by the 'x' button on a list item.
+        """
+        if 0 <= row < len(self.files):
+            self.file_model.remove_rows([row])
+            self.update_file_list()
+
+    def delete_selected(self):
+        """Deletes selected files, with confirmation for multiple files.
+        
+        This method handles both the 'Delete Selected' button and the keyboard shortcut.
+        It bypasses the confirmation prompt for a single selected file.
+        """
+        selected_rows = self.file_list.selected_rows()
+        if not selected_rows:
+            return
+        
+        if len(selected_rows) == 1:
+            # Delete without confirmation when only one file is selected.
+            self.file_model.remove_rows(selected_rows)
+            self.update_file_list()
+        else:
+            # Show a confirmation prompt for multiple files.
+            reply = QMessageBox.question(self, "Delete Files",
+                                         f"Are you sure you want to delete {len(selected_rows)} selected files?",
+                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            
+            if reply == QMessageBox.Yes:
+                self.file_model.remove_rows(selected_rows)
+                self.update_file_list()
+
+    def update_file_list(self):
+        """Selects a file after the list changes, or clears the preview if the list is empty."""
+        if not self.files:
+            self.preview_path = None
+            self.preview_text.clear()
+        elif not self.file_list.selectionModel().hasSelection():
+            current = self.file_list.currentIndex()
+            row = current.row() if current.isValid() else 0
+            self.file_list.setCurrentIndex(self.file_model.index(row))
+
+    def preview_selected_file(self):
+        """Previews the lyrics of the currently selected file."""
+        current = self.file_list.currentIndex()
+        if not current.isValid() or not self.file_list.selectionModel().isSelected(current):
+            rows = self.file_list.selected_rows()
+            if not rows:
+                self.preview_path = None
+                self.preview_text.clear()
+                return
+            current = self.file_model.index(min(rows))
+        
+        # Prefetch the next files in the list so keyboard navigation is instant.
+        index = current.row()
+        file_path = self.files[index]
+        upcoming = [f for f in self.files[index + 1:index + 1 + self.prefetch_count]
+                    if f not in self.preview_cache]
+
+        self.preview_generation += 1
+        self.preview_path = file_path
+        if file_path in self.preview_cache:
+            self.preview_cache.move_to_end(file_path)
+            self.show_preview(self.preview_cache[file_path])
+            self.preview_thread.request(self.preview_generation, upcoming)
+        else:
+            self.preview_text.setText("Loading preview...")
+            self.preview_thread.request(self.preview_generation, [file_path] + upcoming)
+
+    def on_preview_ready(self, generation, path, lyrics):
+        """Stores a background extraction result and shows it if it is still selected."""
+        # Cached compacted, so a chorus repeated six times is held once.
+        lyrics = songdb.compact_slides(lyrics)
+        self.preview_cache[path] = lyrics
+        self.preview_cache.move_to_end(path)
+        while len(self.preview_cache) > self.preview_cache_size:
+            self.preview_cache.popitem(last=False)
+        if generation == self.preview_generation and path == self.preview_path:
+            self.show_preview(lyrics)
+
+    def show_preview(self, lyrics):
+        """Renders compacted `(lyrics, slideseq)` in the preview pane, as they would be stored."""
+        lyrics, slideseq = lyrics
+        if not self.compact_slides:
+            lyrics, slideseq = songdb.expand_slides(lyrics, slideseq), ""
+        formatted_lyrics = lyrics.replace("<slide>", "\n\n---\n\n").replace("<BR>", "\n")
+        if slideseq:
+            formatted_lyrics += f"\n\n---\n\nSlide order: {slideseq}"
+        self.preview_text.setText(formatted_lyrics)
+
+    def run_search(self):
+        """Searches the library for the text in the search box once typing pauses."""
+        query = self.search_box.text().strip()
+        self.search_generation += 1
+        if not query:
+            self.search_results.clear()
+            self.search_results.setVisible(False)
+            return
+        if not self.db_path:
+            self.show_search_message("Select a database to search it.")
+            return
+        self.search_thread.request(self.search_generation, self.db_path, query)
+
+    def show_search_message(self, message):
+        self.search_results.clear()
+        item = QListWidgetItem(message)
+        item.setFlags(Qt.NoItemFlags)
+        self.search_results.addItem(item)
+        self.search_results.setVisible(True)
+
+    def on_search_results(self, generation, matches, error):
+        """Lists the matches of the latest search, with a snippet of the matching lyrics."""
+        if generation != self.search_generation:
+            return
+        if error:
+            self.show_search_message(f"Search unavailable: {error}")
+            return
+        if not matches:
+            self.show_search_message("No matching songs.")
+            return
+        self.search_results.clear()
+        for song_id, name, snippet, _ in matches:
+            snippet = snippet.replace(search.SLIDE_SEPARATOR, search.LINE_SEPARATOR)
+            item = QListWidgetItem(f"{name}\n    {snippet}" if snippet else name)
+            item.setData(Qt.UserRole, song_id)
+            item.setToolTip(name)
+            self.search_results.addItem(item)
+        self.search_results.setVisible(True)
+
+    def preview_library_song(self, item, previous=None):
+        """Shows the lyrics of a library song picked from the search results."""
+        if item is None or item.data(Qt.UserRole) is None:
+            return
+        song_id = item.data(Qt.UserRole)
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                lyrics = songdb.stored_lyrics(conn, [song_id]).get(song_id, "")
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self.preview_text.setText(f"Could not read the song: {e}")
+            return
+        # Deselecting the file list's preview keeps a late extraction from replacing it.
+        self.preview_path = None
+        self.show_preview(songdb.compact_slides(lyrics))
+
+    def customize_settings(self):
+        """Opens the settings dialog for custom configuration."""
+        dialog = SettingsDialog(self, self.default_font, self.default_category,
+                                self.extraction_workers, self.pptx_engine, self.ppt_engine, self.compact_slides,
+                                self.extraction_timeout, self.memory_limit)
+        if dialog.exec_() == QDialog.Accepted:
+            (font, category, workers, pptx_engine, ppt_engine, compact_slides,
+             self.extraction_timeout, self.memory_limit) = dialog.get_settings()
+            self.default_font = font
+            self.default_category = category
+            self.extraction_workers = workers
+            self.pptx_engine = pptx_engine
+            self.ppt_engine = ppt_engine
+            self.compact_slides = compact_slides
+            # Previews may differ between engines.
+            self.preview_cache.clear()
+            self.preview_selected_file()
+            self.custom_font_label.setText(f"Font: {self.default_font}")
+            self.custom_cat_label.setText(f"Category: {self.default_category}")
+
+    def backup_db(self):
+        """Backs up every selected database on a background thread."""
+        if not self.db_path:
+            QMessageBox.warning(self, "Missing DB", "Please select a database first.")
+            return
+        if self.backup_thread is not None or self.injection_worker is not None:
+            return
+
+        self.backup_thread = BackupThread(self.db_paths, self)
+        self.backup_thread.progress.connect(self.on_backup_progress)
+        self.backup_thread.backup_finished.connect(self.on_backup_finished)
+        self.backup_button.setEnabled(False)
+        self.inject_button.setEnabled(False)
+        self.progress.setMaximum(0)
+        self.progress.setValue(0)
+        self.progress.setVisible(True)
+        self.backup_thread.start()
+
+    def on_backup_progress(self, copied, total):
+        """Shows how many database pages have been copied."""
+        self.progress.setMaximum(total)
+        self.progress.setValue(copied)
+
+    def on_backup_finished(self, path, error):
+        """Reports the finished backup once the backup thread is done."""
+        self.backup_thread.wait()
+        self.backup_thread = None
+        self.progress.setVisible(False)
+        self.backup_button.setEnabled(True)
+        self.inject_button.setEnabled(True)
+        if error:
+            done = f"\n\nFinished before the error:\n{path}" if path else ""
+            QMessageBox.critical(self, "Backup Failed", f"An error occurred during backup: {error}{done}")
+        else:
+            QMessageBox.information(self, "Backup Complete", f"Database backed up to:\n{path}")
+
+    def extract_lyrics(self, file_path):
+        """Determines the file type and calls the appropriate text extraction method."""
+        if self.extraction_cache is not None:
+            return self.extraction_cache.extract_lyrics(file_path, self.pptx_engine, self.ppt_engine)
+        return extractors.extract_lyrics(file_path, self.pptx_engine, self.ppt_engine)
+
+    def extract_name_from_filename(self, file_path):
+        """Extracts the song name from the filename."""
+        return songdb.song_name_from_path(file_path)
+
+    def inject_all(self):
+        """Starts injecting all files into the database on a background worker."""
+        self.start_import(dry_run=False)
+
+    def preview_changes(self):
+        """Runs the import as a dry run, reporting what would be added, updated or left unchanged."""
+        self.start_import(dry_run=True)
+
+    def start_import(self, dry_run):
+        """Extracts every listed file and plans it against the database, writing the changes unless `dry_run`.
+
+        A real import runs as a dry run first, so only the songs whose lyrics
+        differ from the database are offered for overwriting.
+        """
+        if not self.db_path or not self.files:
+            QMessageBox.warning(self, "Missing Info", "Database or files are not selected.")
+            return
+        if self.scan_threads:
+            QMessageBox.warning(self, "Scan Running", "Wait for the folder scan to finish, or stop it, before adding songs.")
+            return
+        if self.backup_thread is not None:
+            QMessageBox.warning(self, "Backup Running", "Wait for the database backup to finish before adding songs.")
+            return
+
+        if not dry_run:
+            confirm = QMessageBox.question(
+                self, "Confirm Injection",
+                f"Inject {len(self.files)} file(s) into the database?",
+                QMessageBox.Yes | QMessageBox.No
+            )
+            if confirm != QMessageBox.Yes:
+                return
+        self.import_after_plan = not dry_run
+        self.launch_import(dry_run=True)
+
+    def launch_import(self, dry_run, overwrite_names=None):
+        """Starts an `InjectionWorker` over the listed files; `overwrite_names` maps each database to the songs to overwrite."""
+        overwrite_names = overwrite_names or {}
+        trace = tracing.ImportTrace()
+        for started, seconds, found in self.scan_timings:
+            trace.record("scan", None, started, seconds, files=found)
+        if not self.import_after_plan:
+            # The planning pass leaves the scans to the trace of the import that writes.
+            self.scan_timings = []
+        writers = []
+        for db_path in self.db_paths:
+            writer = pipeline.SongImportWriter(
+                db_path, self.default_category, self.default_font, overwrite_names.get(db_path, ()),
+                dry_run=dry_run, compact_slides=self.compact_slides
+            )
+            writer.trace = trace
+            writers.append(writer)
+        # Several databases share one extraction pass, each written on its own thread.
+        writer = writers[0] if len(writers) == 1 else pipeline.MultiTargetWriter(writers)
+        run = pipeline.ExtractionPipeline(
+            self.files, workers=self.extraction_workers,
+            pptx_engine=self.pptx_engine, ppt_engine=self.ppt_engine, cache=self.extraction_cache,
+            timeout=self.extraction_timeout, memory_limit=self.memory_limit, trace=trace
+        )
+        snapshot_keep = None if dry_run else self.snapshot_keep
+        self.injection_worker = InjectionWorker(run, writer, self, snapshot_keep)
+        self.injection_worker.progress.connect(self.on_injection_progress)
+        self.injection_worker.file_done.connect(self.on_injection_file_done)
+        self.injection_worker.import_finished.connect(self.on_injection_finished)
+
+        self.progress.setMaximum(len(self.files))
+        self.progress.setValue(0)
+        self.progress.setVisible(True)
+        databases = "the database" if len(self.db_paths) == 1 else f"{len(self.db_paths)} databases"
+        if self.import_after_plan:
+            self.status_label.setText("Checking which songs would change...")
+        elif dry_run:
+            self.status_label.setText("Starting dry run...")
+        else:
+            self.status_label.setText(f"Backing up {databases}, then importing...")
+        self.status_label.setVisible(True)
+        self.cancel_button.setVisible(True)
+        self.set_import_controls_enabled(False)
+        self.injection_worker.start()
+
+    def finish_planned_import(self, targets):
+        """Asks which conflicting songs to overwrite in each database, then starts the real import.
+
+        Only songs the dry run planned as conflicts are listed: songs whose
+        lyrics already match are left alone anyway, so there is nothing to ask.
+        """
+        overwrite_names = {}
+        for target in targets:
+            conflicts = []
+            reported_keys = set()
+            for name, action, _, _ in target.results:
+                key = songdb.normalize_name(name)
+                if action == "conflict" and key not in reported_keys:
+                    conflicts.append(name)
+                    reported_keys.add(key)
+            if conflicts:
+                dialog = DuplicateDialog(self, conflicts, target.db_path if len(targets) > 1 else None)
+                if dialog.exec_() != QDialog.Accepted:
+                    return
+                overwrite_names[target.db_path] = dialog.overwrite_names()
+        self.launch_import(dry_run=False, overwrite_names=overwrite_names)
+
+    def set_import_controls_enabled(self, enabled):
+        """Locks the file list and actions while an import is running."""
+        for widget in (self.inject_button, self.dry_run_button, self.folder_button, self.add_file_button,
+                       self.clear_list_button, self.delete_selected_button, self.db_button,
+                       self.customize_button, self.file_list):
+            widget.setEnabled(enabled)
+
+    def on_injection_progress(self, done, total, extract_rate, write_rate, eta):
+        """Updates the progress bar with throughput and the estimated time left."""
+        self.progress.setValue(done)
+        eta_text = f"{eta:.0f}s left" if eta >= 0 else "estimating..."
+        self.progress.setFormat(f"%v/%m  extract {extract_rate:.1f}/s  write {write_rate:.1f}/s  {eta_text}")
+
+    def on_injection_file_done(self, name, action):
+        """Shows the most recently processed file under the progress bar."""
+        labels = {
+            "insert": "adding", "update": "overwriting", "unchanged": "unchanged",
+            "conflict": "skipped, duplicate", "extract_failed": "error extracting lyrics",
+            "timed_out": "timed out", "crashed": "crashed",
+        }
+        self.status_label.setText(f"{name} ({labels.get(action, action)})")
+
+    def cancel_injection(self):
+        """Asks whether to keep or roll back the finished songs, then stops the import."""
+        if self.injection_worker is None:
+            return
+        box = QMessageBox(self)
+        box.setWindowTitle("Cancel Import")
+        box.setText("Stop the import after the files in progress?")
+        keep_button = box.addButton("Keep Finished Songs", QMessageBox.AcceptRole)
+        rollback_button = box.addButton("Roll Back Everything", QMessageBox.DestructiveRole)
+        box.addButton("Continue Import", QMessageBox.RejectRole)
+        box.exec_()
+        if box.clickedButton() == keep_button:
+            self.injection_worker.cancel(commit=True)
+        elif box.clickedButton() == rollback_button:
+            self.injection_worker.cancel(commit=False)
+        else:
+            return
+        self.cancel_button.setEnabled(False)
+        self.status_label.setText("Cancelling...")
+
+    def on_injection_finished(self, results, error, not_processed):
+        """Shows the injection summary once the worker thread is done."""
+        # The worker emits this as its last step, so waiting here is immediate.
+        self.injection_worker.wait()
+        targets = self.injection_worker.targets
+        # Errors of single databases in a multi-database import; the others still committed.
+        target_errors = getattr(self.injection_worker.writer, "errors", {})
+        dry_run = self.injection_worker.writer.dry_run
+        trace = targets[0].trace
+        snapshots = self.injection_worker.snapshots
+        self.injection_worker = None
+        self.progress.setFormat("%p%")
+        self.progress.setVisible(False)
+        self.status_label.setVisible(False)
+        self.cancel_button.setVisible(False)
+        self.cancel_button.setEnabled(True)
+        self.set_import_controls_enabled(True)
+        if dry_run and self.import_after_plan:
+            self.import_after_plan = False
+            if error or target_errors or not_processed:
+                # The plan is incomplete, so nothing is imported; the report says why.
+                self.show_dry_run_report(targets, error, not_processed, trace, target_errors)
+            else:
+                self.finish_planned_import(targets)
+            return
+        if dry_run:
+            self.show_dry_run_report(targets, error, not_processed, trace, target_errors)
+            return
+
+        summary_message = "Injection Cancelled!\n\n" if not_processed else "Injection Complete!\n\n"
+        for target in targets:
+            if len(targets) > 1:
+                summary_message += f"=== {target.db_path} ===\n\n"
+            summary_message += self.summarize_results(
+                target.results, target.near_duplicates, target_errors.get(target.db_path) or error
+            )
+            if snapshots.get(target.db_path):
+                summary_message += f"Pre-import snapshot: {snapshots[target.db_path]}\n\n"
+        if not_processed:
+            summary_message += f"{not_processed} file(s) were not processed.\n\n"
+        if self.extraction_cache is not None:
+            summary_message += f"Extraction cache: {self.extraction_cache.stats()}\n\n"
+        
+        self.show_report("Injection Summary", summary_message, trace, [target.db_path for target in targets])
+        if not not_processed:
+            self.file_model.clear()
+            self.update_file_list()
+
+    def summarize_results(self, results, near_duplicates, error):
+        """Returns the summary sections for one database's import results."""
+        added_names = []
+        failed_files = []
+        unchanged_names = []
+        for name, status, detail, path in results:
+            name = self.result_label(name, path)
+            if status == "added":
+                added_names.append(name)
+            elif status == "overwritten":
+                added_names.append(f"{name} (Overwritten)")
+            elif status == "unchanged":
+                unchanged_names.append(name)
+            elif status == "replaced":
+                failed_files.append(f"{name} (Replaced by a later file with the same name)")
+            elif status == "skipped":
+                failed_files.append(f"{name} (Skipped, duplicate)")
+            elif status == "extract_failed":
+                failed_files.append(f"{name} (Error extracting lyrics)")
+            elif status == "timed_out":
+                failed_files.append(f"{name} (Timed out)")
+            elif status == "crashed":
+                failed_files.append(f"{name} (Crashed)")
+            elif status == "cancelled":
+                failed_files.append(f"{name} (Rolled back)")
+            else:
+                failed_files.append(f"{name} (DB Error: {detail})")
+        if error:
+            failed_files.append(f"Import aborted: {error}")
+
+        summary_message = ""
+        if added_names:
+            summary_message += "Added/Updated Songs:\n" + "\n".join(added_names) + "\n\n"
+        if failed_files:
+            summary_message += "Failed Files:\n" + "\n".join(failed_files) + "\n\n"
+        if unchanged_names:
+            summary_message += (f"Unchanged ({len(unchanged_names)} song(s) already had these lyrics, not rewritten):\n"
+                                + "\n".join(unchanged_names) + "\n\n")
+        if near_duplicates:
+            lines = []
+            for name, matches in near_duplicates:
+                similar_songs = ", ".join(f"{match_name} ({score:.0%})" for _, match_name, score in matches)
+                lines.append(f"{name} ~ {similar_songs}")
+            summary_message += "Possible Near-Duplicates:\n" + "\n".join(lines) + "\n\n"
+        return summary_message
+
+    def result_label(self, name, path):
+        """Returns a song name for a report, naming the archive of decks that came from one."""
+        parts = archives.split_member(path) if path else None
+        if parts is None:
+            return name
+        return f"{name} [{os.path.basename(parts[0])}]"
+
+    def show_dry_run_report(self, targets, error, not_processed, trace=None, target_errors=None):
+        """Shows what an import would do to each database, grouped by planned action."""
+        sections = [
+            ("insert", "New songs"),
+            ("update", "Would overwrite (lyrics differ)"),
+            ("conflict", "Conflicts (already exist with different lyrics; skipped unless you overwrite them)"),
+            ("unchanged", "Unchanged (already up to date, would not be written)"),
+            ("extract_failed", "Error extracting lyrics"),
+            ("timed_out", "Timed out"),
+            ("crashed", "Crashed"),
+        ]
+        target_errors = target_errors or {}
+        report = "Dry Run: nothing was written to the database.\n\n"
+        for target in targets:
+            if len(targets) > 1:
+                report += f"=== {target.db_path} ===\n\n"
+            groups = {action: [] for action, _ in sections}
+            for name, action, _, path in target.results:
+                groups.setdefault(action, []).append(self.result_label(name, path))
+            for action, title in sections:
+                if groups[action]:
+                    report += f"{title} ({len(groups[action])}):\n" + "\n".join(groups[action]) + "\n\n"
+            if target_errors.get(target.db_path) or error:
+                report += f"Dry run aborted: {target_errors.get(target.db_path) or error}\n\n"
+        if not_processed:
+            report += f"{not_processed} file(s) were not checked.\n\n"
+        self.show_report("Dry Run Report", report, trace, [target.db_path for target in targets])
+
+    def show_report(self, title, text, trace=None, db_paths=()):
+        """Shows an import report with its time by stage, offering to export the trace.
+
+        With several `db_paths` the time by stage is shown for each database.
+        """
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Information)
+        box.setWindowTitle(title)
+        if trace is not None and trace.events:
+            if len(db_paths) > 1:
+                for db_path in db_paths:
+                    text += f"Time by stage ({db_path}):\n" + "\n".join(trace.format_summary(db_path)) + "\n\n"
+            else:
+                text += "Time by stage:\n" + "\n".join(trace.format_summary())
+        box.setText(text.rstrip())
+        export_button = box.addButton("Export Trace...", QMessageBox.ActionRole) if trace is not None else None
+        box.addButton(QMessageBox.Ok)
+        box.exec_()
+        if export_button is not None and box.clickedButton() == export_button:
+            self.export_trace(trace)
+
+    def export_trace(self, trace):
+        """Saves an import trace as JSON or as a Chrome trace."""
+        filters = "Chrome Trace (*.json);;JSON Timings (*.json)"
+        path, chosen = QFileDialog.getSaveFileName(self, "Export Trace", "import-trace.json", filters)
+        if not path:
+            return
+        try:
+            trace.export(path, "chrome" if chosen.startswith("Chrome") else "json")
+        except OSError as e:
+            QMessageBox.critical(self, "Export Failed", f"Could not write the trace: {e}")
+
+    def closeEvent(self, event):
+        """Stops the preview thread, and any running import or scan, before the window closes."""
+        if self.injection_worker is not None:
+            self.injection_worker.cancel(commit=False)
+            self.injection_worker.wait()
+        for thread in self.scan_threads:
+            thread.cancel()
+            thread.wait()
+        if self.backup_thread is not None:
+            self.backup_thread.wait()
+        self.preview_thread.stop()
+        self.search_thread.stop()
+        super().closeEvent(event)
+
+def main(process_start=None):
+    """Initializes and runs the application.
+
+    `process_start` is when the process started, for the startup-timing
+    report; by default it is when this module was first imported.
+    """
+    app = QApplication(sys.argv)
+    if "--startup-probe" in sys.argv[1:]:
+        sys.exit(run_startup_probe(app, process_start or PROCESS_START))
+    win = SongDBInjector()
+    win.show()
+    sys.exit(app.exec_())
+
+class _PaintWatcher(QObject):
+    """Records when a widget first paints."""
+    def __init__(self):
+        super().__init__()
+        self.painted = None
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and self.painted is None:
+            self.painted = time.perf_counter()
+        return False
+
+def run_startup_probe(app, process_start):
+    """Opens the window once, prints the time spent in each startup phase as JSON and exits.
+
+    Run by `startup_timing` under `python -X importtime`; see `python main.py --startup-report`.
+    """
+    import json
+    phases = {"imports": IMPORTS_DONE - process_start}
+    start = time.perf_counter()
+    win = SongDBInjector()
+    phases["window"] = time.perf_counter() - start
+    watcher = _PaintWatcher()
+    win.installEventFilter(watcher)
+    start = time.perf_counter()
+    win.show()
+    deadline = start + 10
+    while watcher.painted is None and time.perf_counter() < deadline:
+        app.processEvents(QEventLoop.AllEvents, 50)
+    phases["first_paint"] = (watcher.painted or time.perf_counter()) - start
+    start = time.perf_counter()
+    win.auto_find_db()
+    phases["auto_find_db"] = time.perf_counter() - start
+    phases["total"] = time.perf_counter() - process_start
+    print(json.dumps({"phases": phases, "painted": watcher.painted is not None}))
+    win.close()
+    return 0
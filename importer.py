@@ -0,0 +1,136 @@
+"""GUI-free import engine: finds decks and the database and runs the import pipeline.
+
+Nothing here imports PyQt5 or win32com, so it can run from the command
+line, a scheduled task or a test.
+"""
+import getpass
+import glob
+import os
+
+import backup
+import extractors
+import isolation
+import pipeline
+from scanner import DeckScanner
+
+DEFAULT_FONT = "Calibri"
+DEFAULT_CATEGORY = "autoadd"
+DUPLICATE_POLICIES = ("skip", "overwrite")
+
+
+def iter_deck_files(paths, recursive=False, max_depth=None, exclude=()):
+    """Yields the decks named by `paths`, listing the decks inside any directories and zip archives given.
+
+    Without `recursive` only the decks directly inside each directory (and
+    the zip archives there) are listed; otherwise `max_depth` limits how
+    deep to look. Decks inside archives are yielded as member paths (see
+    `archives`).
+    """
+    return iter(DeckScanner(paths, max_depth=max_depth if recursive else 0, exclude=exclude, open_archives=True))
+
+
+def find_songs_dbs():
+    """Returns the paths of every VerseVIEW songs.db in the user's AppData, one per install or profile."""
+    user = getpass.getuser()
+    base_path = f"C:/Users/{user}/AppData/Roaming/"
+    search_pattern = os.path.join(base_path, "VerseVIEW*", "vvdata", "songs", "songs.db")
+    return sorted(glob.glob(search_pattern))
+
+
+def find_songs_db():
+    """Returns the path of the VerseVIEW songs.db in the user's AppData, or None."""
+    found = find_songs_dbs()
+    return found[0] if found else None
+
+
+class ImportResult:
+    """The outcome of `run_import`.
+
+    `results` and `near_duplicates` are those of the `pipeline.SongImportWriter`,
+    `error` is the exception that aborted the import (or None) and `stats`
+    is the run's `pipeline.PipelineStats`. `db_path` is the database written. `snapshot` is the path of the
+    pre-import snapshot, or None if none was taken, and `trace` is the
+    run's `tracing.ImportTrace`, or None.
+    """
+
+    def __init__(self, writer, run, snapshot=None, error=None):
+        self.db_path = writer.db_path
+        self.results = writer.results
+        self.near_duplicates = writer.near_duplicates
+        self.error = error or run.error
+        self.stats = run.stats
+        self.snapshot = snapshot
+        self.trace = run.trace
+
+    def failed(self):
+        """Returns the results of files that could not be imported."""
+        return [result for result in self.results if result[1] in pipeline.EXTRACTION_FAILURES + ("failed",)]
+
+
+def run_import(db_path, files, category=DEFAULT_CATEGORY, font=DEFAULT_FONT, duplicates="skip",
+               workers=None, pptx_engine=extractors.DEFAULT_PPTX_ENGINE,
+               ppt_engine=extractors.DEFAULT_PPT_ENGINE, cache=None, check_similar=True, on_result=None,
+               dry_run=False, snapshot_keep=None, compact_slides=False, timeout=isolation.DEFAULT_TIMEOUT,
+               memory_limit=isolation.DEFAULT_MEMORY_LIMIT, trace=None):
+    """Imports decks into songs.db and returns an `ImportResult`.
+
+    `duplicates` is "skip" or "overwrite" and applies to every song that
+    already exists; songs whose stored lyrics already match are left
+    unchanged either way. With `dry_run` nothing is written and each
+    result's status is the planned action ("insert", "update", "unchanged",
+    "conflict", "extract_failed", "timed_out" or "crashed"). `timeout` and
+    `memory_limit` bound each deck's extraction (see
+    `pipeline.ExtractionPipeline`). `on_result(name, action)` is called
+    from the writer thread as each file is applied. With `snapshot_keep`
+    a compressed snapshot of the database is taken first (keeping that many
+    snapshots); if it fails, `OSError` or `sqlite3.Error` is raised and
+    nothing is imported. With `compact_slides` repeated slides are stored
+    once, with their playback order in `slideseq`. Each stage is timed into
+    `trace`, a `tracing.ImportTrace`, if one is given.
+    """
+    return run_import_multi(
+        [db_path], files, category, font, {db_path: duplicates}, workers, pptx_engine, ppt_engine, cache,
+        check_similar, on_result, dry_run, snapshot_keep, compact_slides, timeout, memory_limit, trace
+    )[0]
+
+
+def run_import_multi(db_paths, files, category=DEFAULT_CATEGORY, font=DEFAULT_FONT, duplicates="skip",
+                     workers=None, pptx_engine=extractors.DEFAULT_PPTX_ENGINE,
+                     ppt_engine=extractors.DEFAULT_PPT_ENGINE, cache=None, check_similar=True, on_result=None,
+                     dry_run=False, snapshot_keep=None, compact_slides=False, timeout=isolation.DEFAULT_TIMEOUT,
+                     memory_limit=isolation.DEFAULT_MEMORY_LIMIT, trace=None):
+    """Imports decks into several databases from one extraction pass; returns one `ImportResult` per database.
+
+    Takes the same options as `run_import`. `duplicates` is one policy for
+    every database, or a {db path: policy} dict. With more than one database
+    the results are written concurrently by a `pipeline.MultiTargetWriter`,
+    and a database that fails does not stop the others. Every database is
+    snapshotted (with `snapshot_keep`) before anything is imported;
+    `on_result` only reports the first database.
+    """
+    policies = duplicates if isinstance(duplicates, dict) else dict.fromkeys(db_paths, duplicates)
+    for policy in policies.values():
+        if policy not in DUPLICATE_POLICIES:
+            raise ValueError(f"unknown duplicate policy: {policy}")
+    snapshots = {}
+    if snapshot_keep is not None and not dry_run:
+        for db_path in db_paths:
+            snapshots[db_path] = backup.snapshot_before_import(db_path, snapshot_keep)
+    targets = []
+    for db_path in db_paths:
+        target = pipeline.SongImportWriter(
+            db_path, category, font, check_similar=check_similar, overwrite_all=policies[db_path] == "overwrite",
+            dry_run=dry_run, compact_slides=compact_slides
+        )
+        target.trace = trace
+        targets.append(target)
+    writer = targets[0] if len(targets) == 1 else pipeline.MultiTargetWriter(targets)
+    writer.on_result = on_result
+    run = pipeline.ExtractionPipeline(
+        files, workers=workers, pptx_engine=pptx_engine, ppt_engine=ppt_engine, cache=cache,
+        timeout=timeout, memory_limit=memory_limit, trace=trace
+    )
+    run.run(writer)
+    errors = getattr(writer, "errors", {})
+    return [ImportResult(target, run, snapshots.get(target.db_path), errors.get(target.db_path))
+            for target in targets]
@@ -0,0 +1,316 @@
+"""Crash- and hang-isolated worker processes for deck extraction.
+
+Each worker is a separate process fed one job at a time over a pipe. A
+supervisor thread watches every busy worker: a job that runs past the
+wall-clock `timeout` gets its worker killed and is retried once on a fresh
+worker, and a worker that dies or grows past `memory_limit` fails its job as
+crashed. One malformed deck, or a PowerPoint call that never returns, costs
+at most a worker restart instead of stalling the whole import.
+"""
+import ctypes
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Future
+from multiprocessing.connection import wait
+
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_MEMORY_LIMIT = 1024
+POLL_INTERVAL = 0.1
+
+
+class ExtractionTimeout(Exception):
+    """Raised for a job that was still running when its timeout expired."""
+
+
+class ExtractionCrashed(Exception):
+    """Raised for a job whose worker process died or exceeded the memory limit."""
+
+
+def process_memory(pid):
+    """Returns the resident memory of a process in bytes, or None where it cannot be read."""
+    if sys.platform.startswith("linux"):
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return None
+    if sys.platform == "win32":
+        return _windows_working_set(pid)
+    return None
+
+
+class _ProcessMemoryCounters(ctypes.Structure):
+    _fields_ = [
+        ("cb", ctypes.c_ulong),
+        ("PageFaultCount", ctypes.c_ulong),
+        ("PeakWorkingSetSize", ctypes.c_size_t),
+        ("WorkingSetSize", ctypes.c_size_t),
+        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+        ("PagefileUsage", ctypes.c_size_t),
+        ("PeakPagefileUsage", ctypes.c_size_t),
+    ]
+
+
+def _windows_working_set(pid):
+    process_query_limited_information = 0x1000
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.OpenProcess(process_query_limited_information, False, pid)
+    if not handle:
+        return None
+    try:
+        counters = _ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        if not kernel32.K32GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.WorkingSetSize
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _worker_main(conn):
+    """Runs jobs sent over `conn` until it receives None or the pipe closes."""
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        fn, args = job
+        try:
+            conn.send(("ok", fn(*args)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _Job:
+    def __init__(self, fn, args, future):
+        self.fn = fn
+        self.args = args
+        self.future = future
+        self.attempts = 0
+
+
+class _Worker:
+    """One worker process, its end of the pipe and the job it is running."""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        try:
+            self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+            self.process.start()
+        except BaseException:
+            self.conn.close()
+            raise
+        finally:
+            child_conn.close()
+        self.job = None
+        self.started = None
+
+    def run(self, job):
+        self.job = job
+        self.started = time.monotonic()
+        self.conn.send((job.fn, job.args))
+
+    def finish(self):
+        job, self.job, self.started = self.job, None, None
+        return job
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self, timeout=1.0):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class IsolatedPool:
+    """Runs picklable functions in isolated worker processes, one job per worker at a time.
+
+    `submit()` returns a `concurrent.futures.Future`. A job still running
+    after `timeout` seconds has its worker killed and is retried up to
+    `retries` times before its future fails with `ExtractionTimeout`. If a
+    worker dies, or its resident memory passes `memory_limit` megabytes
+    (checked on Linux and Windows; None disables the check), the job fails
+    with `ExtractionCrashed`, as do the job and every queued job when a new
+    worker process cannot be started. Exceptions raised by the function
+    itself fail the future with a `RuntimeError` carrying their message.
+    """
+
+    def __init__(self, workers, timeout=DEFAULT_TIMEOUT, memory_limit=DEFAULT_MEMORY_LIMIT, retries=1,
+                 poll_interval=POLL_INTERVAL):
+        self.size = max(1, workers)
+        self.timeout = timeout
+        self.memory_limit = memory_limit * 1024 * 1024 if memory_limit else None
+        self.retries = retries
+        self.poll_interval = poll_interval
+        self.restarts = 0
+        # Forking a process that already runs threads (Qt, the pipeline) can
+        # deadlock the child, so workers are always spawned, as on Windows.
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = []
+        self._jobs = deque()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._cancel = False
+        self._supervisor = threading.Thread(target=self._supervise, daemon=True)
+        self._supervisor.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def submit(self, fn, *args):
+        """Queues `fn(*args)` and returns its future."""
+        future = Future()
+        with self._condition:
+            if self._stopped:
+                raise RuntimeError("cannot submit to a pool that was shut down")
+            self._jobs.append(_Job(fn, args, future))
+            self._condition.notify()
+        return future
+
+    def shutdown(self, cancel_futures=False):
+        """Stops the pool. Running jobs are finished first unless `cancel_futures`,
+        which also kills them and cancels every job still queued."""
+        with self._condition:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._cancel = cancel_futures
+            if cancel_futures:
+                while self._jobs:
+                    self._jobs.popleft().future.cancel()
+            self._condition.notify()
+        self._supervisor.join()
+
+    def _busy(self):
+        return [worker for worker in self._workers if worker.job is not None]
+
+    def _assign(self):
+        """Hands queued jobs to idle workers, starting workers as needed."""
+        with self._condition:
+            while self._jobs:
+                idle = [worker for worker in self._workers if worker.job is None]
+                if not idle and len(self._workers) >= self.size:
+                    return
+                job = self._jobs.popleft()
+                # A retried job's future is already running.
+                if not job.future.running() and not job.future.set_running_or_notify_cancel():
+                    continue
+                if idle:
+                    worker = idle[0]
+                else:
+                    try:
+                        worker = _Worker(self._context)
+                    except Exception as e:
+                        # Spawning fails the same way for every job (no processes or memory left,
+                        # an unimportable main module), so fail them all rather than leave them waiting.
+                        error = ExtractionCrashed(f"could not start a worker process: {e}")
+                        job.future.set_exception(error)
+                        while self._jobs:
+                            queued = self._jobs.popleft()
+                            if queued.future.running() or queued.future.set_running_or_notify_cancel():
+                                queued.future.set_exception(error)
+                        return
+                    self._workers.append(worker)
+                try:
+                    worker.run(job)
+                except OSError:
+                    # The worker died while idle; replace it and try again.
+                    self._replace(worker)
+                    self._jobs.appendleft(job)
+
+    def _replace(self, worker):
+        worker.kill()
+        self._workers.remove(worker)
+        self.restarts += 1
+
+    def _fail(self, worker, error):
+        job = worker.finish()
+        self._replace(worker)
+        job.future.set_exception(error)
+
+    def _retry_or_fail(self, worker, error):
+        job = worker.finish()
+        self._replace(worker)
+        job.attempts += 1
+        if job.attempts > self.retries:
+            job.future.set_exception(error)
+            return
+        with self._condition:
+            # A retried job goes to the front, so it is not stuck behind the rest of the queue.
+            self._jobs.appendleft(job)
+
+    def _collect(self, worker):
+        try:
+            status, value = worker.conn.recv()
+        except (EOFError, OSError):
+            # The pipe closes as the process dies; wait briefly for its exit code.
+            worker.process.join(1.0)
+            self._fail(worker, ExtractionCrashed(f"worker exited with code {worker.process.exitcode}"))
+            return
+        job = worker.finish()
+        if status == "ok":
+            job.future.set_result(value)
+        else:
+            job.future.set_exception(RuntimeError(value))
+
+    def _check(self, worker, now):
+        """Kills a worker whose job ran past the timeout or whose memory passed the limit."""
+        if not worker.process.is_alive():
+            self._fail(worker, ExtractionCrashed(f"worker exited with code {worker.process.exitcode}"))
+        elif self.timeout and now - worker.started > self.timeout:
+            self._retry_or_fail(worker, ExtractionTimeout(f"no result after {self.timeout:g}s"))
+        elif self.memory_limit:
+            memory = process_memory(worker.process.pid)
+            if memory is not None and memory > self.memory_limit:
+                self._fail(worker, ExtractionCrashed(
+                    f"worker exceeded the {self.memory_limit // (1024 * 1024)} MB memory limit"
+                ))
+
+    def _supervise(self):
+        while True:
+            self._assign()
+            busy = self._busy()
+            if not busy:
+                with self._condition:
+                    if self._stopped and not self._jobs:
+                        break
+                    if not self._jobs:
+                        self._condition.wait(self.poll_interval)
+                continue
+            if self._cancel:
+                for worker in busy:
+                    job = worker.finish()
+                    self._replace(worker)
+                    job.future.set_exception(CancelledError())
+                continue
+            ready = wait([worker.conn for worker in busy], self.poll_interval)
+            now = time.monotonic()
+            for worker in busy:
+                if worker.conn in ready:
+                    self._collect(worker)
+                else:
+                    self._check(worker, now)
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
@@ -0,0 +1,529 @@
+"""Parallel extraction pipeline that feeds a single database writer.
+
+Decks are extracted in isolated worker processes (see `isolation`) and the
+results stream, in file order, through a bounded queue to one writer thread. The writer thread is the only
+thread that touches the sqlite connection.
+"""
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import archives
+import extractors
+import isolation
+import search
+import similarity
+import songdb
+import tracing
+
+_DONE = object()
+
+# Result statuses of decks that produced no lyrics.
+EXTRACTION_FAILURES = ("extract_failed", "timed_out", "crashed")
+
+
+def default_worker_count():
+    """Returns the default number of extraction processes, leaving one core for the UI."""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+class PipelineStats:
+    """Counters for a pipeline run, with extraction and write rates tracked separately.
+
+    `written` counts the decks the writer has applied, reported through its
+    `on_written` callback, not the ones handed to it: a `MultiTargetWriter`
+    only queues them for its per-database threads.
+    """
+
+    def __init__(self, total):
+        self.total = total
+        self.extracted = 0
+        self.written = 0
+        self.started = time.perf_counter()
+
+    def elapsed(self):
+        return max(time.perf_counter() - self.started, 1e-6)
+
+    def extract_rate(self):
+        """Files extracted per second since the run started."""
+        return self.extracted / self.elapsed()
+
+    def write_rate(self):
+        """Files applied to the database per second since the run started."""
+        return self.written / self.elapsed()
+
+    def eta(self):
+        """Estimated seconds until every file is written, or None before the first write."""
+        rate = self.write_rate()
+        if not self.written or not rate:
+            return None
+        return (self.total - self.written) / rate
+
+
+class SongImportWriter:
+    """Applies extraction results to songs.db from the pipeline's writer thread.
+
+    Duplicates are found through a `songdb.SongNameIndex`, so names that only
+    differ in case, spacing or punctuation count as the same song. Each file
+    is planned before anything is written: its lyrics hash is compared with
+    the stored rows, and it becomes an "insert", an "update", "unchanged"
+    (identical lyrics, never rewritten) or a "conflict" (different lyrics
+    without permission to overwrite). `overwrite_names` holds the names of
+    existing songs the user agreed to overwrite, or `overwrite_all`
+    overwrites every duplicate. Updates only touch the rows whose lyrics
+    differ. `results` collects one `(name, status, detail, path)` tuple per
+    file, where status is "added", "overwritten", "unchanged", "skipped"
+    (a conflict), "replaced" (superseded by a later deck with the same name
+    in this import), "extract_failed", "timed_out", "crashed", "failed" or
+    "cancelled". With `dry_run`
+    nothing is written and the status is the planned action instead.
+    If set, `on_result(name, action)` is called as each file is planned, with
+    action "insert", "update", "unchanged", "conflict" or one of
+    `EXTRACTION_FAILURES`, and `on_written()` once the file has been applied.
+    With `check_similar`, every new song is also looked up in a
+    `similarity.NearDuplicateIndex`, and `near_duplicates` collects
+    `(name, [(id, existing name, score), ...])` for those that resemble a
+    song already in the library or earlier in the same import.
+    If `trace` is set to a `tracing.ImportTrace`, the normalize, dedupe,
+    write and commit stages of every file are timed into it, tagged with
+    `db`, so writers for several databases can share one trace.
+    With `compact_slides`, repeated slides are stored once and their playback
+    order is written to `slideseq` (see `songdb.compact_slides`). Lyrics are
+    always compared in playback order, so compacting never makes an
+    unchanged song look changed.
+    """
+
+    def __init__(self, db_path, category, font, overwrite_names=(), check_similar=True, overwrite_all=False,
+                 dry_run=False, compact_slides=False):
+        self.db_path = db_path
+        self.category = category
+        self.font = font
+        self.overwrite_keys = {songdb.normalize_name(name) for name in overwrite_names}
+        self.overwrite_all = overwrite_all
+        self.check_similar = check_similar
+        self.dry_run = dry_run
+        self.compact_slides = compact_slides
+        self.results = []
+        # Lyrics hash of every song planned so far in this run, by normalized name.
+        self.planned = {}
+        # Deck paths of the queued songs, by normalized name in queue order, for the results of the commit.
+        self.source_paths = {}
+        # IDs of existing songs queued for overwriting, reported to the search index after the commit.
+        self.updated_ids = []
+        self.near_duplicates = []
+        self.on_result = None
+        self.on_written = None
+        self.trace = None
+        self.conn = None
+        self.writer = None
+        self.index = None
+        self.similar = None
+
+    def open(self):
+        """Opens the connection; called on the writer thread."""
+        self.conn = sqlite3.connect(self.db_path)
+        self.index = songdb.SongNameIndex(self.conn)
+        self.writer = songdb.BulkSongWriter(
+            self.conn, self.category, self.font, key=songdb.normalize_name
+        )
+        if self.check_similar:
+            try:
+                self.similar = similarity.NearDuplicateIndex(self.db_path)
+                self.similar.sync(self.conn)
+            except (OSError, sqlite3.Error) as e:
+                # Near-duplicate hints are optional; the import goes on without them.
+                print(f"Near-duplicate index unavailable: {e}", file=sys.stderr)
+                self.similar = None
+
+    def plan(self, name, lyrics):
+        """Returns `(action, song IDs to update)` for one deck, without writing anything."""
+        if not lyrics:
+            return "extract_failed", None
+        key = songdb.normalize_name(name)
+        digest = songdb.lyrics_hash(lyrics)
+        song_ids = [song_id for song_id, _ in self.index.lookup(name)]
+        if key in self.planned:
+            # Already planned earlier in this run: compare with that deck's lyrics.
+            if self.planned[key] == digest:
+                return "unchanged", None
+            changed_ids = song_ids
+        elif song_ids:
+            stored = songdb.stored_lyrics(self.conn, song_ids)
+            changed_ids = [song_id for song_id in song_ids if songdb.lyrics_hash(stored.get(song_id)) != digest]
+            if not changed_ids:
+                return "unchanged", None
+        else:
+            return "insert", None
+        if self.overwrite_all or key in self.overwrite_keys:
+            return "update", changed_ids
+        return "conflict", None
+
+    def stored_form(self, lyrics):
+        """Returns the `(lyrics, slideseq)` to store for a deck, compacted if enabled."""
+        if self.compact_slides:
+            return songdb.compact_slides(lyrics)
+        return lyrics, ""
+
+    def apply(self, path, lyrics, failure=None, detail=None):
+        """Plans one extracted deck and queues it for writing if it changes anything.
+
+        `failure` is "timed_out" or "crashed" if the deck's extraction was
+        abandoned, with the reason in `detail`.
+        """
+        with tracing.span(self.trace, "normalize", path, db=self.db_path):
+            name = songdb.song_name_from_path(path)
+            key = songdb.normalize_name(name)
+        with tracing.span(self.trace, "dedupe", path, db=self.db_path):
+            action, song_ids = (failure, None) if failure else self.plan(name, lyrics)
+            if action in ("insert", "update"):
+                self.planned[key] = songdb.lyrics_hash(lyrics)
+            if action == "insert" and self.similar is not None:
+                matches = self.similar.query(lyrics)
+                if matches:
+                    self.near_duplicates.append((name, matches))
+                self.similar.add_pending(name, lyrics)
+        if self.dry_run:
+            self.results.append((name, action, detail, path))
+        elif action == "unchanged" or action in EXTRACTION_FAILURES:
+            self.results.append((name, action, detail, path))
+        elif action == "conflict":
+            self.results.append((name, "skipped", None, path))
+        else:
+            # Recorded first, so the deck keeps its path if queueing it fails.
+            self.source_paths.setdefault(key, deque()).append(path)
+            with tracing.span(self.trace, "write", path, db=self.db_path):
+                stored, slideseq = self.stored_form(lyrics)
+                if action == "update":
+                    self.writer.queue_update(name, stored, song_ids or None, slideseq=slideseq)
+                    self.updated_ids.extend(song_ids or ())
+                else:
+                    self.writer.queue_insert(name, stored, slideseq=slideseq)
+        if self.on_result is not None:
+            self.on_result(name, action)
+        if self.on_written is not None:
+            self.on_written()
+
+    def close(self, commit=True, error=None):
+        """Commits (or rolls back) the transaction and merges the write results into `results`.
+
+        With `error`, the exception that stopped the run, the transaction is
+        rolled back and every song in it is reported as "failed".
+        """
+        try:
+            if self.writer is None:
+                # open() failed, so nothing was queued.
+                return
+            with tracing.span(self.trace, "commit", db=self.db_path,
+                              committed=commit and not self.dry_run and error is None):
+                if error is not None:
+                    outcome = [(name, "failed", str(error)) for name in self.writer.rollback()]
+                elif commit and not self.dry_run:
+                    outcome = self.writer.commit()
+                    self._mark_searchable()
+                else:
+                    outcome = [(name, "cancelled", None) for name in self.writer.rollback()]
+            for name, action, detail in outcome:
+                # A song's results come in queue order: the decks it replaced, then the one written.
+                paths = self.source_paths.get(songdb.normalize_name(name))
+                self.results.append((name, action, detail, paths.popleft() if paths else None))
+        finally:
+            if self.conn is not None:
+                self.conn.close()
+            if self.similar is not None:
+                self.similar.close()
+
+    def _mark_searchable(self):
+        try:
+            search.mark_changed(self.db_path, self.updated_ids)
+        except (OSError, sqlite3.Error) as e:
+            # The next search then compares every row instead of just these.
+            print(f"Could not record overwritten songs for search: {e}", file=sys.stderr)
+
+
+class MultiTargetWriter:
+    """Fans extraction results out to one `SongImportWriter` per database.
+
+    Each target writer runs on its own thread with its own connection and a
+    bounded queue, so the databases are written concurrently from a single
+    extraction pass and a slow database only holds back the pipeline once
+    its queue is full. Every target keeps its own duplicate handling,
+    results and transaction. A target that fails is rolled back on its own
+    and its exception is stored in `errors` by database path; the others
+    carry on. `on_result` is only reported for the first target, so
+    progress is not counted once per database, and `on_written()` is called
+    once every target has applied a deck (or dropped it after failing).
+    """
+
+    def __init__(self, writers, queue_size=32):
+        self.targets = list(writers)
+        self.queue_size = queue_size
+        self.errors = {}
+        self.on_result = None
+        self.on_written = None
+        self._queues = []
+        self._threads = []
+        self._applied = []
+        self._lock = threading.Lock()
+
+    @property
+    def dry_run(self):
+        return self.targets[0].dry_run
+
+    @property
+    def results(self):
+        """Every target's results, in target order."""
+        return [result for target in self.targets for result in target.results]
+
+    def open(self):
+        """Starts one writer thread per target."""
+        self.targets[0].on_result = self.on_result
+        self._applied = [0] * len(self.targets)
+        for slot, target in enumerate(self.targets):
+            items = queue.Queue(maxsize=self.queue_size)
+            thread = threading.Thread(target=self._run_target, args=(slot, target, items), daemon=True)
+            self._queues.append(items)
+            self._threads.append(thread)
+            thread.start()
+
+    def _run_target(self, slot, target, items):
+        failed = False
+        try:
+            target.open()
+        except Exception as e:
+            self.errors[target.db_path] = e
+            failed = True
+        while True:
+            item = items.get()
+            if item[0] is _DONE:
+                _, commit, error = item
+                break
+            if not failed:
+                try:
+                    target.apply(*item)
+                except Exception as e:
+                    self.errors[target.db_path] = e
+                    failed = True
+            # A failed target keeps draining, so apply() never blocks on it.
+            self._count_applied(slot)
+        try:
+            target.close(commit=commit, error=self.errors.get(target.db_path) or error)
+        except Exception as e:
+            self.errors.setdefault(target.db_path, e)
+
+    def _count_applied(self, slot):
+        # A deck is written once the slowest target has applied it.
+        with self._lock:
+            slowest = min(self._applied)
+            self._applied[slot] += 1
+            if min(self._applied) > slowest and self.on_written is not None:
+                self.on_written()
+
+    def apply(self, path, lyrics, failure=None, detail=None):
+        """Queues one extracted deck for every target."""
+        for items in self._queues:
+            items.put((path, lyrics, failure, detail))
+
+    def close(self, commit=True, error=None):
+        """Lets every target finish its queue, then commits (or rolls back) each one.
+
+        With `error` every target is rolled back and its songs reported as failed.
+        """
+        for items in self._queues:
+            items.put((_DONE, commit, error))
+        for thread in self._threads:
+            thread.join()
+
+
+class ExtractionPipeline:
+    """Runs extraction in isolated worker processes and applies results on a single writer thread.
+
+    `workers` sets the number of worker processes; 0 extracts in-process on
+    the feeder thread, without isolation. A deck still extracting after
+    `timeout` seconds has its worker killed and is retried once, then
+    reported as "timed_out"; a worker that dies or uses more than
+    `memory_limit` MB is reported as "crashed" (see `isolation.IsolatedPool`).
+    With a `tracing.ImportTrace` as `trace`, each file's extraction is timed
+    into it, with the bytes read and slides found.
+    `pptx_engine` and `ppt_engine` pick the extractors from `extractors.PPTX_ENGINES`
+    and `extractors.PPT_ENGINES`. With an `extract_cache.ExtractionCache` as
+    `cache`, cached decks skip the pool and new results are stored in it.
+    At most `queue_size` finished results wait for the writer and at most two
+    files per worker are in flight, so memory stays bounded on huge folders.
+    """
+
+    def __init__(self, files, workers=None, queue_size=32, pptx_engine=extractors.DEFAULT_PPTX_ENGINE,
+                 ppt_engine=extractors.DEFAULT_PPT_ENGINE, cache=None, timeout=isolation.DEFAULT_TIMEOUT,
+                 memory_limit=isolation.DEFAULT_MEMORY_LIMIT, trace=None):
+        self.files = list(files)
+        self.workers = default_worker_count() if workers is None else workers
+        self.pptx_engine = pptx_engine
+        self.ppt_engine = ppt_engine
+        self.cache = cache
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.trace = trace
+        self.results = queue.Queue(maxsize=queue_size)
+        self.stats = PipelineStats(len(self.files))
+        self.error = None
+        self.cancelled = False
+        self._cancel = threading.Event()
+        self._commit_on_cancel = True
+        self._threads = []
+
+    def start(self, writer):
+        """Starts the feeder and writer threads and returns immediately."""
+        self._threads = [
+            threading.Thread(target=self._feed, daemon=True),
+            threading.Thread(target=self._write, args=(writer,), daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def is_running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def wait(self):
+        for thread in self._threads:
+            thread.join()
+
+    def run(self, writer):
+        """Runs the pipeline to completion on the calling thread's behalf."""
+        self.start(writer)
+        self.wait()
+
+    def cancel(self, commit=True):
+        """Stops the run after the files in progress.
+
+        With `commit` the songs already applied are committed, otherwise the
+        whole transaction is rolled back.
+        """
+        self._commit_on_cancel = commit
+        self.cancelled = True
+        self._cancel.set()
+
+    def _publish(self, index, path, lyrics, failure=None, detail=None):
+        self.stats.extracted += 1
+        self.results.put((index, path, lyrics, failure, detail))
+
+    def _feed(self):
+        try:
+            if self.workers <= 0:
+                for index, path in enumerate(self.files):
+                    if self._cancel.is_set():
+                        break
+                    with tracing.span(self.trace, "extract", path) as fields:
+                        if self.cache is not None:
+                            lyrics = self.cache.extract_lyrics(path, self.pptx_engine, self.ppt_engine)
+                        else:
+                            lyrics = extractors.extract_lyrics(path, self.pptx_engine, self.ppt_engine)
+                        if self.trace is not None:
+                            fields.update(bytes=archives.file_size(path), slides=tracing.slide_count(lyrics))
+                    self._publish(index, path, lyrics)
+                return
+
+            in_flight = deque()
+            max_in_flight = self.workers * 2
+            with isolation.IsolatedPool(self.workers, self.timeout, self.memory_limit) as pool:
+                for index, path in enumerate(self.files):
+                    if self._cancel.is_set():
+                        break
+                    start, began = time.time(), time.perf_counter()
+                    lyrics, engine, content_hash = self._lookup(path)
+                    if lyrics is not None and self.trace is not None:
+                        # A cache hit is the whole extraction; misses are timed in the worker.
+                        self.trace.record("extract", path, start, time.perf_counter() - began, cached=True,
+                                          bytes=archives.file_size(path), slides=tracing.slide_count(lyrics))
+                    if lyrics is None:
+                        if self.trace is not None:
+                            future = pool.submit(tracing.timed, extractors.extract_lyrics, path,
+                                                 self.pptx_engine, self.ppt_engine)
+                        else:
+                            future = pool.submit(extractors.extract_lyrics, path, self.pptx_engine, self.ppt_engine)
+                        store = (engine, content_hash)
+                    else:
+                        future = Future()
+                        future.set_result(lyrics)
+                        store = None
+                    in_flight.append((index, path, future, store))
+                    if len(in_flight) >= max_in_flight:
+                        self._publish_next(in_flight)
+                while in_flight and not self._cancel.is_set():
+                    self._publish_next(in_flight)
+                pool.shutdown(cancel_futures=True)
+        except Exception as e:
+            # Set before _DONE is queued, so the writer rolls back instead of committing a partial import.
+            self.error = e
+        finally:
+            self.results.put(_DONE)
+
+    def _count_written(self):
+        self.stats.written += 1
+
+    def _lookup(self, path):
+        """Returns (cached lyrics or None, engine, content hash) for a file."""
+        engine = extractors.engine_for(path, self.pptx_engine, self.ppt_engine)
+        if self.cache is None or engine is None:
+            return None, engine, None
+        try:
+            lyrics, content_hash = self.cache.lookup(path, engine)
+        except OSError:
+            return None, engine, None
+        return lyrics, engine, content_hash
+
+    def _publish_next(self, in_flight):
+        # Waiting on the oldest future keeps the results in file order.
+        index, path, future, store = in_flight.popleft()
+        try:
+            lyrics = future.result()
+            if store is not None and self.trace is not None:
+                lyrics, start, seconds, pid = lyrics
+                self.trace.record("extract", path, start, seconds, pid=pid, tid=pid, cached=False,
+                                  bytes=archives.file_size(path), slides=tracing.slide_count(lyrics))
+        except (isolation.ExtractionTimeout, isolation.ExtractionCrashed) as e:
+            print(f"Error extracting {path}: {e}", file=sys.stderr)
+            # Not cached, so the deck is tried again on the next import.
+            failure = "timed_out" if isinstance(e, isolation.ExtractionTimeout) else "crashed"
+            self._publish(index, path, "", failure, str(e))
+            return
+        except Exception as e:
+            print(f"Error extracting {path}: {e}", file=sys.stderr)
+            lyrics = ""
+        if store is not None and self.cache is not None and store[0] is not None:
+            try:
+                self.cache.put(path, store[0], lyrics, store[1])
+            except OSError:
+                pass
+        self._publish(index, path, lyrics)
+
+    def _write(self, writer):
+        done = False
+        writer.on_written = self._count_written
+        try:
+            writer.open()
+            while True:
+                item = self.results.get()
+                if item is _DONE:
+                    done = True
+                    break
+                if self._cancel.is_set():
+                    # Drain without applying so the feeder can finish.
+                    continue
+                _, path, lyrics, failure, detail = item
+                writer.apply(path, lyrics, failure, detail)
+        except Exception as e:
+            self.error = e
+        finally:
+            # Always end the transaction; after an error it is rolled back, which
+            # releases the write lock and reports the songs in it as failed.
+            try:
+                writer.close(commit=not self._cancel.is_set() or self._commit_on_cancel, error=self.error)
+            except Exception as e:
+                self.error = self.error or e
+            # Keep draining so the feeder never blocks on a full queue.
+            while not done:
+                done = self.results.get() is _DONE
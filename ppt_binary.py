@@ -0,0 +1,286 @@
+"""Pure-Python text reader for legacy binary PowerPoint (.ppt) files.
+
+Reads the OLE2 compound file directly and walks the records of the
+"PowerPoint Document" stream, so no PowerPoint installation is needed.
+"""
+import struct
+
+OLE_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+_END_OF_CHAIN = 0xFFFFFFFE
+_FREE_SECTOR = 0xFFFFFFFF
+_MAX_REG_SECTOR = 0xFFFFFFFA
+_STREAM = 2
+_ROOT = 5
+
+# PowerPoint record types used for text extraction.
+RT_DOCUMENT = 0x03E8
+RT_SLIDE = 0x03EE
+RT_PPDRAWING = 0x040C
+RT_SLIDE_PERSIST_ATOM = 0x03F3
+RT_OUTLINE_TEXT_REF_ATOM = 0x0F9E
+RT_TEXT_HEADER_ATOM = 0x0F9F
+RT_TEXT_CHARS_ATOM = 0x0FA0
+RT_TEXT_BYTES_ATOM = 0x0FA8
+RT_SLIDE_LIST_WITH_TEXT = 0x0FF0
+RT_USER_EDIT_ATOM = 0x0FF5
+RT_CURRENT_USER_ATOM = 0x0FF6
+RT_PERSIST_DIRECTORY_ATOM = 0x1772
+RT_OFFICEART_SPGR_CONTAINER = 0xF003
+RT_OFFICEART_SP_CONTAINER = 0xF004
+RT_OFFICEART_CLIENT_TEXTBOX = 0xF00D
+
+
+class PPTFormatError(ValueError):
+    """Raised when a file is not a readable binary PowerPoint document."""
+
+
+class CompoundFile:
+    """Minimal read-only OLE2 compound file reader."""
+
+    def __init__(self, data):
+        if data[:8] != OLE_SIGNATURE:
+            raise PPTFormatError("not an OLE2 compound file")
+        self.data = data
+        sector_shift, mini_shift = struct.unpack_from("<HH", data, 0x1E)
+        self.sector_size = 1 << sector_shift
+        self.mini_sector_size = 1 << mini_shift
+        (num_fat, first_dir, _, self.mini_cutoff, first_minifat,
+         num_minifat, first_difat, num_difat) = struct.unpack_from("<IIIIIIII", data, 0x2C)
+
+        fat_sectors = [s for s in struct.unpack_from("<109I", data, 0x4C) if s <= _MAX_REG_SECTOR]
+        per_difat = self.sector_size // 4 - 1
+        sector = first_difat
+        for _ in range(num_difat):
+            if sector > _MAX_REG_SECTOR:
+                break
+            entries = struct.unpack_from(f"<{per_difat + 1}I", self._sector(sector))
+            fat_sectors.extend(s for s in entries[:-1] if s <= _MAX_REG_SECTOR)
+            sector = entries[-1]
+        fat_sectors = fat_sectors[:num_fat]
+        fat_bytes = b"".join(self._sector(s) for s in fat_sectors)
+        self.fat = struct.unpack(f"<{len(fat_bytes) // 4}I", fat_bytes)
+
+        directory = self._read_chain(first_dir)
+        self.entries = []
+        for offset in range(0, len(directory) - 127, 128):
+            name_len, entry_type = struct.unpack_from("<HB", directory, offset + 64)
+            name = directory[offset:offset + max(name_len - 2, 0)].decode("utf-16-le", "replace")
+            start, size = struct.unpack_from("<IQ", directory, offset + 116)
+            if self.sector_size == 512:
+                size &= 0xFFFFFFFF
+            self.entries.append((name, entry_type, start, size))
+
+        root = next((e for e in self.entries if e[1] == _ROOT), None)
+        if root is None:
+            raise PPTFormatError("compound file has no root entry")
+        self.mini_stream = self._read_chain(root[2])[:root[3]]
+        minifat_bytes = self._read_chain(first_minifat) if num_minifat else b""
+        self.minifat = struct.unpack(f"<{len(minifat_bytes) // 4}I", minifat_bytes)
+
+    def _sector(self, sector):
+        offset = (sector + 1) * self.sector_size
+        return self.data[offset:offset + self.sector_size]
+
+    def _read_chain(self, sector, table=None, read=None):
+        table = self.fat if table is None else table
+        read = self._sector if read is None else read
+        chunks = []
+        seen = set()
+        while sector <= _MAX_REG_SECTOR:
+            if sector in seen or sector >= len(table):
+                raise PPTFormatError("corrupt sector chain")
+            seen.add(sector)
+            chunks.append(read(sector))
+            sector = table[sector]
+        return b"".join(chunks)
+
+    def _mini_sector(self, sector):
+        offset = sector * self.mini_sector_size
+        return self.mini_stream[offset:offset + self.mini_sector_size]
+
+    def open_stream(self, name):
+        """Returns the contents of the named stream."""
+        for entry_name, entry_type, start, size in self.entries:
+            if entry_type == _STREAM and entry_name == name:
+                if size < self.mini_cutoff:
+                    data = self._read_chain(start, self.minifat, self._mini_sector)[:size]
+                else:
+                    data = self._read_chain(start)[:size]
+                if len(data) < size:
+                    raise PPTFormatError(f"stream {name!r} is truncated")
+                return data
+        raise PPTFormatError(f"stream {name!r} not found")
+
+
+def _record_header(data, offset):
+    """Returns (version, instance, type, length) of the record at `offset`."""
+    ver_instance, rec_type, rec_len = struct.unpack_from("<HHI", data, offset)
+    return ver_instance & 0x0F, ver_instance >> 4, rec_type, rec_len
+
+
+def _iter_records(data, start, end):
+    """Yields (offset, version, instance, type, length) for each child record in [start, end)."""
+    offset = start
+    while offset + 8 <= end:
+        version, instance, rec_type, rec_len = _record_header(data, offset)
+        if offset + 8 + rec_len > end:
+            break
+        yield offset, version, instance, rec_type, rec_len
+        offset += 8 + rec_len
+
+
+def _text_atom(data, offset, rec_type, rec_len):
+    body = data[offset + 8:offset + 8 + rec_len]
+    if rec_type == RT_TEXT_CHARS_ATOM:
+        return body.decode("utf-16-le", "replace")
+    return body.decode("latin-1")
+
+
+def _persist_directory(document, current_user):
+    """Maps persist IDs to stream offsets and returns (directory, document persist ID)."""
+    _, _, rec_type, _ = _record_header(current_user, 0)
+    if rec_type != RT_CURRENT_USER_ATOM:
+        raise PPTFormatError("missing CurrentUserAtom")
+    offset_to_edit = struct.unpack_from("<I", current_user, 16)[0]
+
+    directory = {}
+    doc_persist_id = None
+    seen = set()
+    while offset_to_edit and offset_to_edit not in seen:
+        seen.add(offset_to_edit)
+        _, _, rec_type, _ = _record_header(document, offset_to_edit)
+        if rec_type != RT_USER_EDIT_ATOM:
+            raise PPTFormatError("missing UserEditAtom")
+        last_edit, dir_offset, persist_ref = struct.unpack_from("<III", document, offset_to_edit + 16)
+        if doc_persist_id is None:
+            doc_persist_id = persist_ref
+        _, _, rec_type, rec_len = _record_header(document, dir_offset)
+        if rec_type != RT_PERSIST_DIRECTORY_ATOM:
+            raise PPTFormatError("missing PersistDirectoryAtom")
+        pos = dir_offset + 8
+        end = pos + rec_len
+        while pos + 4 <= end:
+            entry = struct.unpack_from("<I", document, pos)[0]
+            first_id, count = entry & 0xFFFFF, entry >> 20
+            offsets = struct.unpack_from(f"<{count}I", document, pos + 4)
+            for i, persist_offset in enumerate(offsets):
+                # Newer edits come first in the chain and win over older ones.
+                directory.setdefault(first_id + i, persist_offset)
+            pos += 4 + 4 * count
+        offset_to_edit = last_edit
+    return directory, doc_persist_id
+
+
+def _find_document(document, current_user):
+    """Returns (document container offset, persist directory)."""
+    try:
+        directory, doc_persist_id = _persist_directory(document, current_user)
+        offset = directory.get(doc_persist_id)
+        if offset is not None and _record_header(document, offset)[2] == RT_DOCUMENT:
+            return offset, directory
+    except (PPTFormatError, struct.error):
+        directory = {}
+    # Fall back to the first top-level DocumentContainer in the stream.
+    for offset, _, _, rec_type, _ in _iter_records(document, 0, len(document)):
+        if rec_type == RT_DOCUMENT:
+            return offset, directory
+    raise PPTFormatError("no DocumentContainer found")
+
+
+def _slide_list(document, doc_offset):
+    """Returns [(slide persist ID, [text, ...]), ...] from the slide SlideListWithText.
+
+    Each TextHeaderAtom starts one entry, since OutlineTextRefAtom indexes
+    count headers; a header without a text atom leaves its entry None.
+    """
+    _, _, _, doc_len = _record_header(document, doc_offset)
+    slides = []
+    for offset, _, instance, rec_type, rec_len in _iter_records(document, doc_offset + 8, doc_offset + 8 + doc_len):
+        if rec_type != RT_SLIDE_LIST_WITH_TEXT or instance != 0:
+            continue
+        for child, _, _, child_type, child_len in _iter_records(document, offset + 8, offset + 8 + rec_len):
+            if child_type == RT_SLIDE_PERSIST_ATOM:
+                slides.append((struct.unpack_from("<I", document, child + 8)[0], []))
+            elif child_type == RT_TEXT_HEADER_ATOM and slides:
+                slides[-1][1].append(None)
+            elif child_type in (RT_TEXT_CHARS_ATOM, RT_TEXT_BYTES_ATOM) and slides:
+                texts = slides[-1][1]
+                text = _text_atom(document, child, child_type, child_len)
+                if texts and texts[-1] is None:
+                    texts[-1] = text
+                else:
+                    texts.append(text)
+    return slides
+
+
+def _find_child(data, start, end, rec_type):
+    for offset, _, _, child_type, child_len in _iter_records(data, start, end):
+        if child_type == rec_type:
+            return offset, child_len
+    return None
+
+
+def _shape_texts(document, slide_offset, outline_texts):
+    """Returns the text of each top-level shape on a slide, in drawing order."""
+    _, _, _, slide_len = _record_header(document, slide_offset)
+    found = _find_child(document, slide_offset + 8, slide_offset + 8 + slide_len, RT_PPDRAWING)
+    if found is None:
+        return None
+    drawing, drawing_len = found
+    # PPDrawing > OfficeArtDgContainer > OfficeArtSpgrContainer (the slide's shape tree).
+    dg_offset = drawing + 8
+    _, _, _, dg_len = _record_header(document, dg_offset)
+    found = _find_child(document, dg_offset + 8, dg_offset + 8 + dg_len, RT_OFFICEART_SPGR_CONTAINER)
+    if found is None:
+        return None
+    tree, tree_len = found
+
+    texts = []
+    for shape, _, _, shape_type, shape_len in _iter_records(document, tree + 8, tree + 8 + tree_len):
+        # Nested group containers are skipped: like PowerPoint's Shapes collection,
+        # only top-level shapes contribute text.
+        if shape_type != RT_OFFICEART_SP_CONTAINER:
+            continue
+        found = _find_child(document, shape + 8, shape + 8 + shape_len, RT_OFFICEART_CLIENT_TEXTBOX)
+        if found is None:
+            continue
+        box, box_len = found
+        for child, _, _, child_type, child_len in _iter_records(document, box + 8, box + 8 + box_len):
+            if child_type in (RT_TEXT_CHARS_ATOM, RT_TEXT_BYTES_ATOM):
+                texts.append(_text_atom(document, child, child_type, child_len))
+            elif child_type == RT_OUTLINE_TEXT_REF_ATOM:
+                index = struct.unpack_from("<i", document, child + 8)[0]
+                if 0 <= index < len(outline_texts) and outline_texts[index] is not None:
+                    texts.append(outline_texts[index])
+    return texts
+
+
+def read_slide_texts(path):
+    """Returns a list of slides, each a list of shape text strings.
+
+    Shape text keeps PowerPoint's own separators: "\\r" between paragraphs
+    and "\\v" for line breaks. `path` can also be a binary file object.
+    """
+    if hasattr(path, "read"):
+        compound = CompoundFile(path.read())
+    else:
+        with open(path, "rb") as f:
+            compound = CompoundFile(f.read())
+    document = compound.open_stream("PowerPoint Document")
+    try:
+        current_user = compound.open_stream("Current User")
+    except PPTFormatError:
+        current_user = b""
+    try:
+        doc_offset, directory = _find_document(document, current_user)
+        slides = []
+        for persist_id, outline_texts in _slide_list(document, doc_offset):
+            texts = None
+            slide_offset = directory.get(persist_id)
+            if slide_offset is not None and _record_header(document, slide_offset)[2] == RT_SLIDE:
+                texts = _shape_texts(document, slide_offset, outline_texts)
+            # Without a drawing, fall back to the placeholder text of the slide list.
+            slides.append(texts if texts else [text for text in outline_texts if text is not None])
+        return slides
+    except struct.error as e:
+        raise PPTFormatError("truncated PowerPoint Document stream") from e
@@ -0,0 +1,138 @@
+"""Streaming, recursive folder scanner for PowerPoint decks.
+
+Walks directories with `os.scandir`, so file types come from the directory
+listing instead of one `stat` per file, and yields matches as they are
+found. Each directory is entered at most once, by device and inode, which
+also stops symlink and junction loops. Optionally the decks inside zip
+archives are listed too, as member paths (see `archives`).
+"""
+import fnmatch
+import os
+import threading
+import zipfile
+
+import archives
+
+DECK_PATTERNS = ("*.pptx", "*.ppt")
+
+
+def matches(name, patterns):
+    """Returns True if a file name matches any of the glob patterns, ignoring case."""
+    name = name.lower()
+    return any(fnmatch.fnmatchcase(name, pattern.lower()) for pattern in patterns)
+
+
+class DeckScanner:
+    """Iterates over the decks under a set of files and folders.
+
+    `max_depth` limits how far below each folder to look (0 lists only the
+    folder itself, None has no limit). `include` patterns select files by
+    name; `exclude` patterns skip matching files and folders. Files named
+    directly in `roots` are yielded if they match `include`. With
+    `open_archives`, zip archives named in `roots` or found in a folder are
+    opened and their matching members yielded, right after the folder's own
+    files. Iteration stops early once `cancel()` is called. `errors`
+    collects `(path, error)` for folders and archives that could not be read.
+    """
+
+    def __init__(self, roots, max_depth=None, include=DECK_PATTERNS, exclude=(), follow_symlinks=True,
+                 open_archives=False):
+        self.roots = list(roots)
+        self.max_depth = max_depth
+        self.include = tuple(include)
+        self.exclude = tuple(exclude)
+        self.follow_symlinks = follow_symlinks
+        self.open_archives = open_archives
+        self.dirs_scanned = 0
+        self.errors = []
+        self._cancel = threading.Event()
+        self._visited = set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def __iter__(self):
+        for root in self.roots:
+            if self.cancelled:
+                return
+            if os.path.isdir(root):
+                yield from self._walk(root)
+            elif self.open_archives and archives.is_archive(root):
+                yield from self._archive(root)
+            elif matches(os.path.basename(root), self.include):
+                yield root
+
+    def _archive(self, path):
+        """Yields the matching decks inside a zip archive."""
+        try:
+            for member in archives.iter_members(path, self.include, self.exclude):
+                if self.cancelled:
+                    return
+                yield member
+        except (OSError, zipfile.BadZipFile) as e:
+            self.errors.append((path, e))
+
+    def _enter(self, path):
+        """Returns True the first time a directory is reached, by device and inode."""
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            self.errors.append((path, e))
+            return False
+        key = (st.st_dev, st.st_ino)
+        if key in self._visited:
+            return False
+        self._visited.add(key)
+        return True
+
+    def _walk(self, root):
+        if not self._enter(root):
+            return
+        # Depth-first with an explicit stack; each folder's files come before its subfolders.
+        stack = [(root, 0)]
+        while stack:
+            if self.cancelled:
+                return
+            path, depth = stack.pop()
+            files = []
+            zips = []
+            subdirs = []
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if self.cancelled:
+                            return
+                        if self.exclude and matches(entry.name, self.exclude):
+                            continue
+                        try:
+                            if entry.is_dir(follow_symlinks=self.follow_symlinks):
+                                subdirs.append(entry)
+                            elif not entry.is_file(follow_symlinks=self.follow_symlinks):
+                                continue
+                            elif matches(entry.name, self.include):
+                                files.append(entry.path)
+                            elif self.open_archives and archives.is_archive(entry.name):
+                                zips.append(entry.path)
+                        except OSError:
+                            continue
+            except OSError as e:
+                self.errors.append((path, e))
+                continue
+            self.dirs_scanned += 1
+            files.sort()
+            for file_path in files:
+                if self.cancelled:
+                    return
+                yield file_path
+            for archive in sorted(zips):
+                yield from self._archive(archive)
+            if self.max_depth is not None and depth >= self.max_depth:
+                continue
+            for entry in sorted(subdirs, key=lambda entry: entry.name, reverse=True):
+                # One stat per folder (not per file) catches symlinks and junctions back to a folder already seen.
+                if self._enter(entry.path):
+                    stack.append((entry.path, depth + 1))
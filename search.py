@@ -0,0 +1,177 @@
+"""Full-text search over the songs in songs.db, through an FTS5 sidecar index.
+
+The names and lyrics of `sm` are copied, with the `<BR>` and `<slide>`
+markers stripped, into an SQLite FTS5 table kept next to the extraction
+cache. Each FTS row has the song's `sm.id` as its rowid, so syncing only
+rewrites the rows whose name or lyrics changed. Within a session the index
+checks `PRAGMA data_version` before each search and skips the sync when no
+other connection has written to songs.db.
+
+A sync reads only the rows past the highest indexed ID and the songs this
+app rewrote (recorded with `mark_changed`), so an import costs the songs it
+wrote rather than the whole library. Only a change that neither explains,
+such as a song edited or deleted in VerseVIEW, makes it compare every row.
+"""
+import os
+import re
+import sqlite3
+
+import songdb
+from extract_cache import sidecar_path
+
+# Bump when the indexed text changes, so existing indexes are rebuilt.
+INDEX_VERSION = 1
+LINE_SEPARATOR = " / "
+SLIDE_SEPARATOR = " // "
+_LINE_BREAK = re.compile(r"<br>", re.IGNORECASE)
+_SLIDE_BREAK = re.compile(r"<slide>", re.IGNORECASE)
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def searchable_text(lyrics):
+    """Returns lyrics with the VerseVIEW line and slide markers replaced by plain separators."""
+    return _LINE_BREAK.sub(LINE_SEPARATOR, _SLIDE_BREAK.sub(SLIDE_SEPARATOR, lyrics or ""))
+
+
+def match_expression(query):
+    """Turns free text into an FTS5 query that matches every word, the last one as a prefix."""
+    terms = _TERM.findall(query)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def index_path_for(db_path):
+    """Returns the sidecar search index path for a songs.db, one per database."""
+    return sidecar_path(db_path, "search")
+
+
+def mark_changed(db_path, song_ids, path=None):
+    """Records the IDs of songs this app rewrote, so the next sync re-reads just those rows.
+
+    Does nothing when the database has no search index yet.
+    """
+    song_ids = list(song_ids)
+    path = path or index_path_for(db_path)
+    if not song_ids or not os.path.exists(path):
+        return
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("CREATE TABLE IF NOT EXISTS changed (id INTEGER PRIMARY KEY)")
+        conn.executemany("INSERT OR IGNORE INTO changed VALUES (?)", ((song_id,) for song_id in song_ids))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class LyricsSearchIndex:
+    """FTS5 index over the names and lyrics of one songs.db.
+
+    `search()` syncs the index first when songs.db changed. Raises
+    `sqlite3.OperationalError` when this SQLite build lacks FTS5.
+    """
+
+    def __init__(self, db_path, path=None):
+        self.db_path = db_path
+        self.path = path or index_path_for(db_path)
+        self.source = None
+        self._data_version = None
+        self.conn = sqlite3.connect(self.path)
+        # The index can always be rebuilt from songs.db.
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS docs (id INTEGER PRIMARY KEY, fingerprint TEXT NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS changed (id INTEGER PRIMARY KEY)")
+        self.conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS songs_fts USING fts5("
+            "name, lyrics, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        if self._meta("version") != str(INDEX_VERSION):
+            self.conn.execute("DELETE FROM docs")
+            self.conn.execute("DELETE FROM changed")
+            self.conn.execute("DELETE FROM songs_fts")
+            self.conn.execute("DELETE FROM meta")
+            self._set_meta("version", str(INDEX_VERSION))
+        self.conn.commit()
+
+    def _meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def sync(self, full=False):
+        """Brings the index up to date with `sm`; returns the number of rows re-indexed.
+
+        New rows and the rows recorded by `mark_changed` are read directly.
+        If there are none, or with `full`, every row is compared instead.
+        """
+        if self.source is None:
+            self.source = sqlite3.connect(f"file:{os.path.abspath(self.db_path)}?mode=ro", uri=True)
+        version = self.source.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version and not full:
+            return 0
+        stamp = songdb.database_stamp(self.db_path)
+        if self._meta("stamp") == stamp and not full:
+            self._data_version = version
+            return 0
+        marked = [row[0] for row in self.conn.execute("SELECT id FROM changed")]
+        changed, deleted_ids = [], []
+        if not full:
+            # One snapshot for both reads, so a row is never missed between them.
+            self.source.execute("BEGIN")
+            try:
+                max_id = self.conn.execute("SELECT MAX(id) FROM docs").fetchone()[0] or 0
+                rows = {row[0]: row for row in songdb.song_rows(self.source, after_id=max_id)}
+                rows.update((row[0], row) for row in songdb.song_rows(self.source, song_ids=marked))
+            finally:
+                self.source.rollback()
+            changed = list(rows.values())
+            deleted_ids = [song_id for song_id in marked if song_id not in rows]
+        if not changed and not deleted_ids:
+            # Nothing this app wrote explains the change, so compare every row.
+            known = dict(self.conn.execute("SELECT id, fingerprint FROM docs"))
+            changed, deleted_ids = songdb.diff_songs(self.source, known)
+        stale = [(song_id,) for song_id in deleted_ids] + [(row[0],) for row in changed]
+        self.conn.executemany("DELETE FROM docs WHERE id = ?", stale)
+        self.conn.executemany("DELETE FROM songs_fts WHERE rowid = ?", stale)
+        self.conn.executemany(
+            "INSERT INTO songs_fts (rowid, name, lyrics) VALUES (?, ?, ?)",
+            ((song_id, name or "", searchable_text(lyrics)) for song_id, name, lyrics, _ in changed)
+        )
+        self.conn.executemany(
+            "INSERT INTO docs VALUES (?, ?)", ((song_id, fingerprint) for song_id, _, _, fingerprint in changed)
+        )
+        self.conn.executemany("DELETE FROM changed WHERE id = ?", ((song_id,) for song_id in marked))
+        self._set_meta("stamp", stamp)
+        self.conn.commit()
+        self._data_version = version
+        return len(changed)
+
+    def search(self, query, limit=50):
+        """Returns up to `limit` `(id, name, snippet, rank)` matches, best first.
+
+        Name matches weigh ten times more than lyric matches. Matched words
+        are wrapped in `[` and `]` in the snippet.
+        """
+        expression = match_expression(query)
+        if expression is None:
+            return []
+        self.sync()
+        return self.conn.execute(
+            "SELECT rowid, name, snippet(songs_fts, 1, '[', ']', '...', 12), bm25(songs_fts, 10.0, 1.0) AS rank "
+            "FROM songs_fts WHERE songs_fts MATCH ? ORDER BY rank LIMIT ?",
+            (expression, limit)
+        ).fetchall()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def close(self):
+        if self.source is not None:
+            self.source.close()
+        self.conn.close()
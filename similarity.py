@@ -0,0 +1,216 @@
+"""Near-duplicate lyric detection with MinHash signatures and LSH buckets.
+
+Each song's lyrics are reduced to word shingles and a MinHash signature
+(one-permutation hashing, so each shingle is hashed once rather than once
+per signature slot); the signature is split into bands, and songs sharing any band bucket are
+candidates. Only candidates are scored, so checking a deck against a large
+library never compares it with every song. The index lives in a sqlite
+sidecar next to the extraction cache and is brought up to date with the
+rows of `sm` that changed since the last sync.
+"""
+import hashlib
+import re
+import sqlite3
+import struct
+import zlib
+
+import songdb
+from extract_cache import sidecar_path
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.5
+# Bump when shingling or hashing changes, so persisted signatures are rebuilt.
+INDEX_VERSION = 1
+
+_BIN_BITS = NUM_PERM.bit_length() - 1
+_BIN_MASK = NUM_PERM - 1
+_TAG = re.compile(r"<br>|<slide>", re.IGNORECASE)
+
+
+def lyrics_words(lyrics):
+    """Returns the normalized words of VerseVIEW lyrics, ignoring line and slide markers."""
+    return songdb.normalize_name(_TAG.sub(" ", lyrics or "")).split()
+
+
+def shingles(lyrics):
+    """Returns the set of 64-bit hashes of the lyrics' word shingles."""
+    words = lyrics_words(lyrics)
+    if len(words) < SHINGLE_SIZE:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+    hashes = set()
+    for gram in grams:
+        data = gram.encode("utf-8")
+        # Two CRCs make a cheap 64-bit hash.
+        hashes.add((zlib.crc32(data) << 32) | zlib.crc32(data, 0x9E3779B9))
+    return hashes
+
+
+def minhash(lyrics):
+    """Returns the MinHash signature of the lyrics, or None if they have no words.
+
+    The low bits of each shingle hash pick a slot and the rest compete for
+    that slot's minimum. Empty slots borrow the value of the next filled
+    slot, offset by the distance, so short lyrics still give stable signatures.
+    """
+    hashes = shingles(lyrics)
+    if not hashes:
+        return None
+    slots = [None] * NUM_PERM
+    for h in hashes:
+        slot = h & _BIN_MASK
+        value = h >> _BIN_BITS
+        if slots[slot] is None or value < slots[slot]:
+            slots[slot] = value
+    signature = []
+    for slot in range(NUM_PERM):
+        distance = 0
+        while slots[(slot + distance) % NUM_PERM] is None:
+            distance += 1
+        signature.append((slots[(slot + distance) % NUM_PERM] << _BIN_BITS) | distance)
+    return signature
+
+
+def band_keys(signature):
+    """Returns one bucket key per LSH band of a signature."""
+    keys = []
+    for band in range(BANDS):
+        rows = struct.pack(f"<{ROWS}Q", *signature[band * ROWS:(band + 1) * ROWS])
+        keys.append(struct.unpack("<q", hashlib.blake2b(rows, digest_size=8).digest())[0])
+    return keys
+
+
+def similarity(sig_a, sig_b):
+    """Estimates the Jaccard similarity of two signatures."""
+    return sum(a == b for a, b in zip(sig_a, sig_b)) / NUM_PERM
+
+
+def _pack(signature):
+    return struct.pack(f"<{NUM_PERM}Q", *signature)
+
+
+def _unpack(blob):
+    return struct.unpack(f"<{NUM_PERM}Q", blob)
+
+
+def index_path_for(db_path):
+    """Returns the sidecar index path for a songs.db, one per database."""
+    return sidecar_path(db_path, "similarity")
+
+
+class NearDuplicateIndex:
+    """Persisted MinHash/LSH index over the lyrics of one songs.db.
+
+    Call `sync(conn)` with a connection to the songs.db before querying;
+    it only reads `sm` when the database file changed since the last sync,
+    and only re-hashes rows whose name or lyrics changed. Songs that are
+    queued but not yet written can be matched too, through `add_pending`.
+    """
+
+    def __init__(self, db_path, path=None):
+        self.db_path = db_path
+        self.path = path or index_path_for(db_path)
+        self.pending = {}
+        self.conn = sqlite3.connect(self.path)
+        # The index can always be rebuilt from songs.db.
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS docs (
+            id INTEGER PRIMARY KEY,
+            name TEXT,
+            fingerprint TEXT NOT NULL,
+            signature BLOB
+        )''')
+        self.conn.execute("CREATE TABLE IF NOT EXISTS buckets (band INTEGER, bucket INTEGER, id INTEGER)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS buckets_key ON buckets (band, bucket)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS buckets_id ON buckets (id)")
+        version = f"{INDEX_VERSION}:{NUM_PERM}:{BANDS}:{SHINGLE_SIZE}"
+        if self._meta("version") != version:
+            self.conn.execute("DELETE FROM docs")
+            self.conn.execute("DELETE FROM buckets")
+            self.conn.execute("DELETE FROM meta")
+            self._set_meta("version", version)
+        self.conn.commit()
+
+    def _meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def sync(self, conn):
+        """Brings the index up to date with `sm`; returns the number of rows re-indexed."""
+        stamp = songdb.database_stamp(self.db_path)
+        if self._meta("stamp") == stamp:
+            return 0
+        known = dict(self.conn.execute("SELECT id, fingerprint FROM docs"))
+        changed, deleted_ids = songdb.diff_songs(conn, known)
+        stale = [(song_id,) for song_id in deleted_ids] + [(row[0],) for row in changed]
+        self.conn.executemany("DELETE FROM docs WHERE id = ?", stale)
+        self.conn.executemany("DELETE FROM buckets WHERE id = ?", stale)
+        docs = []
+        buckets = []
+        for song_id, name, lyrics, fingerprint in changed:
+            signature = minhash(lyrics)
+            docs.append((song_id, name, fingerprint, _pack(signature) if signature else None))
+            if signature:
+                buckets.extend((band, key, song_id) for band, key in enumerate(band_keys(signature)))
+        self.conn.executemany("INSERT INTO docs VALUES (?, ?, ?, ?)", docs)
+        self.conn.executemany("INSERT INTO buckets VALUES (?, ?, ?)", buckets)
+        self._set_meta("stamp", stamp)
+        self.conn.commit()
+        return len(changed)
+
+    def add_pending(self, name, lyrics):
+        """Makes a song that is about to be inserted visible to later queries in this session."""
+        signature = minhash(lyrics)
+        if signature is None:
+            return
+        for band, key in enumerate(band_keys(signature)):
+            self.pending.setdefault((band, key), []).append((name, signature))
+
+    def query(self, lyrics, top=5, threshold=DEFAULT_THRESHOLD, exclude_ids=()):
+        """Returns up to `top` `(id, name, score)` matches for the lyrics, best first.
+
+        Matches among pending songs have an id of None.
+        """
+        signature = minhash(lyrics)
+        if signature is None:
+            return []
+        candidates = set()
+        pending = {}
+        for band, key in enumerate(band_keys(signature)):
+            candidates.update(
+                row[0] for row in self.conn.execute(
+                    "SELECT id FROM buckets WHERE band = ? AND bucket = ?", (band, key)
+                )
+            )
+            for name, pending_signature in self.pending.get((band, key), ()):
+                pending[name] = pending_signature
+        candidates.difference_update(exclude_ids)
+        matches = []
+        for name, pending_signature in pending.items():
+            score = similarity(signature, pending_signature)
+            if score >= threshold:
+                matches.append((None, name, score))
+        for song_id in candidates:
+            row = self.conn.execute("SELECT name, signature FROM docs WHERE id = ?", (song_id,)).fetchone()
+            if row is None or row[1] is None:
+                continue
+            score = similarity(signature, _unpack(row[1]))
+            if score >= threshold:
+                matches.append((song_id, row[0], score))
+        matches.sort(key=lambda match: (-match[2], match[1]))
+        return matches[:top]
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,407 @@
+"""Database helpers for the VerseVIEW songs.db `sm` (Song Master) table."""
+import hashlib
+import os
+import re
+
+import archives
+
+# Column layout of the `sm` table, in the order new songs are written.
+SM_COLUMNS = (
+    "id", "name", "cat", "font", "font2", "timestamp",
+    "yvideo", "bkgndfname", "key", "copy", "notes",
+    "lyrics", "lyrics2", "title2", "tags",
+    "slideseq", "rating", "chordsavailable", "usagecount", "subcat",
+)
+
+INSERT_SONG_SQL = "INSERT INTO sm ({}) VALUES ({})".format(
+    ", ".join(SM_COLUMNS), ", ".join("?" for _ in SM_COLUMNS)
+)
+UPDATE_LYRICS_SQL = "UPDATE sm SET lyrics = ?, slideseq = ? WHERE name = ?"
+UPDATE_LYRICS_BY_ID_SQL = "UPDATE sm SET lyrics = ?, slideseq = ? WHERE id = ?"
+
+SLIDE_SEPARATOR = "<slide>"
+# `slideseq` lists the 1-based positions of the stored slides in playback order.
+SLIDESEQ_SEPARATOR = ","
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def get_next_id(conn):
+    """Fetches the next available song ID from the database."""
+    cur = conn.cursor()
+    cur.execute("SELECT MAX(id) FROM sm")
+    result = cur.fetchone()
+    return (result[0] or 0) + 1
+
+
+def song_exists(conn, name):
+    """Checks if a song with the given name already exists in the database."""
+    cur = conn.cursor()
+    cur.execute("SELECT id FROM sm WHERE name = ?", (name,))
+    return cur.fetchone() is not None
+
+
+def song_name_from_path(file_path):
+    """Extracts the song name from the filename, or from the member name of a deck inside an archive."""
+    parts = archives.split_member(file_path)
+    base = parts[1].rsplit("/", 1)[-1] if parts else os.path.basename(file_path)
+    name, _ = os.path.splitext(base)
+    return name.strip()
+
+
+def normalize_name(name):
+    """Folds case, punctuation and whitespace so near-identical titles compare equal."""
+    folded = _PUNCTUATION.sub(" ", name.casefold())
+    return _WHITESPACE.sub(" ", folded).strip()
+
+
+def compact_slides(lyrics):
+    """Stores each distinct slide once and returns `(lyrics, slideseq)`.
+
+    The slides of the returned lyrics are the distinct slides in order of
+    first appearance, and `slideseq` gives the playback order. If no slide
+    repeats, the lyrics are returned unchanged with an empty `slideseq`.
+    """
+    slides = (lyrics or "").split(SLIDE_SEPARATOR)
+    positions = {}
+    sequence = []
+    for slide in slides:
+        sequence.append(positions.setdefault(slide, len(positions) + 1))
+    if len(positions) == len(slides):
+        return lyrics, ""
+    return SLIDE_SEPARATOR.join(positions), SLIDESEQ_SEPARATOR.join(map(str, sequence))
+
+
+def expand_slides(lyrics, slideseq):
+    """Reverses `compact_slides`, returning the slides in playback order.
+
+    Lyrics are returned unchanged if `slideseq` is empty or does not refer
+    to their slides.
+    """
+    if not slideseq or not lyrics:
+        return lyrics
+    slides = lyrics.split(SLIDE_SEPARATOR)
+    try:
+        sequence = [int(position) for position in slideseq.split(SLIDESEQ_SEPARATOR)]
+    except ValueError:
+        return lyrics
+    if not all(1 <= position <= len(slides) for position in sequence):
+        return lyrics
+    return SLIDE_SEPARATOR.join(slides[position - 1] for position in sequence)
+
+
+class SongNameIndex:
+    """In-memory index of the song names in `sm`, keyed by `normalize_name`.
+
+    The `id, name` columns are loaded once and reloaded only when
+    `PRAGMA data_version` shows another connection has committed changes.
+    Songs written through this index's own connection must be reported with
+    `add()`, since SQLite does not bump data_version for them.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._by_key = {}
+        self._data_version = None
+        self.refresh()
+
+    def refresh(self, force=False):
+        """Reloads the index if the database changed since it was loaded."""
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version and not force:
+            return
+        by_key = {}
+        for song_id, name in self.conn.execute("SELECT id, name FROM sm"):
+            by_key.setdefault(normalize_name(name or ""), []).append((song_id, name))
+        self._by_key = by_key
+        self._data_version = version
+
+    def lookup(self, name):
+        """Returns the `(id, name)` pairs of the songs whose names match `name`."""
+        self.refresh()
+        return self._by_key.get(normalize_name(name), [])
+
+    def contains(self, name):
+        """Returns True if a song matching `name` exists."""
+        return bool(self.lookup(name))
+
+    def add(self, song_id, name):
+        """Records a song written through this index's own connection."""
+        self._by_key.setdefault(normalize_name(name), []).append((song_id, name))
+
+    def __len__(self):
+        return sum(len(songs) for songs in self._by_key.values())
+
+
+def database_stamp(db_path):
+    """Returns a string that changes whenever songs.db, or its WAL file, is written."""
+    parts = []
+    for suffix in ("", "-wal"):
+        try:
+            st = os.stat(db_path + suffix)
+            parts.append(f"{st.st_size}:{st.st_mtime_ns}")
+        except OSError:
+            parts.append("-")
+    return "|".join(parts)
+
+
+def lyrics_hash(lyrics):
+    """Returns a hash of a song's lyrics, used to tell whether an import would change a row."""
+    return hashlib.sha1((lyrics or "").encode("utf-8")).hexdigest()
+
+
+def stored_lyrics(conn, song_ids):
+    """Returns `{id: lyrics}` for the given song IDs, with compacted slides expanded."""
+    song_ids = list(song_ids)
+    if not song_ids:
+        return {}
+    placeholders = ", ".join("?" * len(song_ids))
+    rows = conn.execute(f"SELECT id, lyrics, slideseq FROM sm WHERE id IN ({placeholders})", song_ids)
+    return {song_id: expand_slides(lyrics, slideseq) for song_id, lyrics, slideseq in rows}
+
+
+def song_fingerprint(name, lyrics):
+    """Returns a hash of a song's name and lyrics, used to spot changed rows."""
+    return hashlib.sha1(f"{name or ''}\0{lyrics or ''}".encode("utf-8")).hexdigest()
+
+
+def song_rows(conn, after_id=None, song_ids=None):
+    """Yields `(id, name, lyrics, fingerprint)` for the rows of `sm`, with compacted slides expanded.
+
+    With `after_id` only rows with a higher ID are read, and with `song_ids`
+    only those rows, so a sidecar index can catch up without a full scan.
+    """
+    if song_ids is not None:
+        song_ids = list(song_ids)
+        for start in range(0, len(song_ids), 500):
+            chunk = song_ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            yield from _fingerprinted(conn.execute(
+                f"SELECT id, name, lyrics, slideseq FROM sm WHERE id IN ({placeholders})", chunk
+            ))
+    elif after_id is not None:
+        yield from _fingerprinted(conn.execute("SELECT id, name, lyrics, slideseq FROM sm WHERE id > ?", (after_id,)))
+    else:
+        yield from _fingerprinted(conn.execute("SELECT id, name, lyrics, slideseq FROM sm"))
+
+
+def _fingerprinted(rows):
+    for song_id, name, lyrics, slideseq in rows:
+        lyrics = expand_slides(lyrics, slideseq)
+        yield song_id, name, lyrics, song_fingerprint(name, lyrics)
+
+
+def diff_songs(conn, known):
+    """Compares `sm` against a {id: fingerprint} snapshot kept by a sidecar index.
+
+    Returns `(changed, deleted_ids)`, where `changed` lists `(id, name, lyrics,
+    fingerprint)` for new or modified rows, with compacted slides expanded.
+    """
+    changed = []
+    seen = set()
+    for row in song_rows(conn):
+        seen.add(row[0])
+        if known.get(row[0]) != row[3]:
+            changed.append(row)
+    deleted_ids = [song_id for song_id in known if song_id not in seen]
+    return changed, deleted_ids
+
+
+def build_song_row(song_id, name, lyrics, category, font, slideseq=""):
+    """Builds an `sm` row tuple with the defaults VerseVIEW expects for a new song."""
+    return (
+        song_id, name, category, font, None, None,
+        "", "", "", "", "", lyrics,
+        "", "", "", slideseq, 0, 0, 0, "null"
+    )
+
+
+class BulkSongWriter:
+    """Buffers song inserts and overwrites and writes them in a single transaction.
+
+    The write lock is taken on the first flush and the next free ID is read once
+    under it, so every insert gets an ID from one reserved block. Buffered rows
+    are written with `executemany` every `batch_size` songs and committed once by
+    `commit()`. With `use_savepoints` each batch runs inside a savepoint; a batch
+    that fails is replayed row by row so only the bad rows are reported as failed.
+    `key` maps song names to the identity used to merge repeated songs within
+    the transaction, for example `normalize_name`. A song queued again while
+    its insert is still buffered replaces it, and the replaced song is
+    reported as "replaced". Every song is written with its `slideseq`, which
+    is empty unless its lyrics were compacted.
+    """
+
+    def __init__(self, conn, category, font, use_savepoints=True, batch_size=200, key=None):
+        self.conn = conn
+        self.category = category
+        self.font = font
+        self.use_savepoints = use_savepoints
+        self.batch_size = batch_size
+        self.key = key or (lambda name: name)
+        self.next_id = None
+        self.results = []
+        # Each op is [action, name, lyrics, ids, slideseq]: ids is the assigned
+        # ID for an insert, or the IDs to update (None to update by name).
+        self._pending = []
+        self._pending_inserts = {}
+        self._flushed_inserts = {}
+        self._savepoint_seq = 0
+
+    def queue_insert(self, name, lyrics, slideseq=""):
+        """Queues a new song for insertion, or an update if this transaction already inserted it."""
+        key = self.key(name)
+        if key in self._pending_inserts:
+            # A second file with the same name replaces the one still in the buffer.
+            self._replace(self._pending_inserts[key], name, lyrics, slideseq)
+            return
+        if key in self._flushed_inserts:
+            # Already written by an earlier batch: overwrite that row rather than add a second one.
+            self.queue_update(name, lyrics, slideseq=slideseq)
+            return
+        op = ["insert", name, lyrics, None, slideseq]
+        self._pending_inserts[key] = op
+        self._pending.append(op)
+        self._maybe_flush()
+
+    def queue_update(self, name, lyrics, song_ids=None, slideseq=""):
+        """Queues an overwrite of the lyrics of existing songs, by ID or else by name."""
+        key = self.key(name)
+        if key in self._pending_inserts:
+            # The song has not been written yet, so overwrite the buffered insert.
+            self._replace(self._pending_inserts[key], name, lyrics, slideseq)
+            return
+        if key in self._flushed_inserts:
+            song_ids = [self._flushed_inserts[key]]
+        self._pending.append(["update", name, lyrics, song_ids, slideseq])
+        self._maybe_flush()
+
+    def _replace(self, op, name, lyrics, slideseq):
+        """Replaces a buffered insert with a later song of the same name, reporting the first as "replaced"."""
+        self.results.append((op[1], "replaced", None))
+        op[1], op[2], op[4] = name, lyrics, slideseq
+
+    def _maybe_flush(self):
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def _begin(self):
+        """Starts the write transaction and reserves the ID block."""
+        if self.next_id is not None:
+            return
+        if self.conn.in_transaction:
+            self.conn.commit()
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.next_id = get_next_id(self.conn)
+
+    def _insert_rows(self, ops):
+        rows = []
+        for op in ops:
+            op[3] = self.next_id
+            rows.append(build_song_row(self.next_id, op[1], op[2], self.category, self.font, op[4]))
+            self.next_id += 1
+        return rows
+
+    def _execute(self, inserts, updates):
+        cur = self.conn.cursor()
+        if inserts:
+            cur.executemany(INSERT_SONG_SQL, self._insert_rows(inserts))
+        by_name = [(lyrics, slideseq, name) for _, name, lyrics, ids, slideseq in updates if ids is None]
+        by_id = [(lyrics, slideseq, song_id)
+                 for _, _, lyrics, ids, slideseq in updates if ids is not None for song_id in ids]
+        if by_name:
+            cur.executemany(UPDATE_LYRICS_SQL, by_name)
+        if by_id:
+            cur.executemany(UPDATE_LYRICS_BY_ID_SQL, by_id)
+
+    def _run_in_savepoint(self, inserts, updates):
+        self._savepoint_seq += 1
+        savepoint = f"bulk_{self._savepoint_seq}"
+        first_id = self.next_id
+        self.conn.execute(f"SAVEPOINT {savepoint}")
+        try:
+            self._execute(inserts, updates)
+        except Exception:
+            self.conn.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+            self.conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+            self.next_id = first_id
+            raise
+        self.conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+
+    def flush(self):
+        """Writes the buffered songs into the open transaction without committing."""
+        if not self._pending:
+            return
+        # The batch stays buffered until the write lock is held, so a failure
+        # here ("database is locked") still reports it from commit() or rollback().
+        self._begin()
+        ops, self._pending = self._pending, []
+        self._pending_inserts = {}
+        inserts = [op for op in ops if op[0] == "insert"]
+        updates = [op for op in ops if op[0] == "update"]
+
+        if not self.use_savepoints:
+            try:
+                self._execute(inserts, updates)
+            except Exception:
+                # Keep the batch so commit() can report it as failed.
+                self._pending = ops + self._pending
+                raise
+            self._record(ops)
+            return
+
+        try:
+            self._run_in_savepoint(inserts, updates)
+            self._record(ops)
+        except Exception:
+            # Replay the batch one row at a time to isolate the bad rows.
+            for op in ops:
+                try:
+                    if op[0] == "insert":
+                        self._run_in_savepoint([op], [])
+                    else:
+                        self._run_in_savepoint([], [op])
+                    self._record([op])
+                except Exception as e:
+                    self.results.append((op[1], "failed", str(e)))
+
+    def _record(self, ops):
+        for action, name, _, song_id, _ in ops:
+            if action == "insert":
+                self._flushed_inserts[self.key(name)] = song_id
+                self.results.append((name, "added", None))
+            else:
+                self.results.append((name, "overwritten", None))
+
+    def commit(self):
+        """Flushes the remaining songs, commits once and returns the per-song results.
+
+        Each result is a `(name, action, error)` tuple where action is "added",
+        "overwritten", "replaced" or "failed". If the transaction cannot be committed every
+        song in it is reported as failed.
+        """
+        try:
+            self.flush()
+            if self.conn.in_transaction:
+                self.conn.commit()
+        except Exception as e:
+            names = [name for name, _, _ in self.results] + [op[1] for op in self._pending]
+            self.rollback()
+            return [(name, "failed", str(e)) for name in names]
+        return self.results
+
+    def rollback(self):
+        """Discards everything written or buffered since the transaction began.
+
+        Returns the names of the songs that were discarded.
+        """
+        discarded = [name for name, action, _ in self.results if action != "failed"]
+        discarded += [op[1] for op in self._pending]
+        if self.conn.in_transaction:
+            self.conn.rollback()
+        self.results = []
+        self._pending = []
+        self._pending_inserts = {}
+        self._flushed_inserts = {}
+        self.next_id = None
+        return discarded
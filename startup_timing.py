@@ -0,0 +1,76 @@
+"""Startup-timing report.
+
+Opens the app once under `python -X importtime` and prints where startup
+time goes: the slowest top-level imports and the time to build the window,
+paint it and find songs.db. Run with `python main.py --startup-report`.
+The exit code is 1 when startup is over budget or a module that should
+load lazily was imported, so regressions show up in scripts.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+STARTUP_BUDGET_SECONDS = 1.5
+# Modules that must only load on first use, never at startup.
+LAZY_MODULES = ("pptx", "win32com", "pythoncom")
+
+
+def parse_importtime(text):
+    """Parses `-X importtime` output into `(module, self seconds, cumulative seconds, depth)` tuples."""
+    imports = []
+    for line in text.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2][1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), int(fields[0]) / 1e6, int(fields[1]) / 1e6, depth))
+    return imports
+
+
+def run_probe(main_path):
+    """Runs the app's startup probe and returns `(phases, imports, wall seconds)`."""
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", main_path, "--startup-probe"],
+        capture_output=True, text=True, timeout=120
+    )
+    wall = time.perf_counter() - start
+    phases = {}
+    for line in completed.stdout.splitlines():
+        if line.startswith("{"):
+            phases = json.loads(line).get("phases", {})
+    return phases, parse_importtime(completed.stderr), wall
+
+
+def format_report(phases, imports, wall, top=15):
+    """Returns the report as text."""
+    lines = [f"Startup: {wall:.3f}s wall clock (budget {STARTUP_BUDGET_SECONDS:.1f}s)", ""]
+    for phase, seconds in phases.items():
+        lines.append(f"  {phase:<14}{seconds * 1000:9.1f} ms")
+    lines += ["", f"Slowest top-level imports (of {len(imports)} modules):"]
+    top_level = sorted((entry for entry in imports if entry[3] == 0), key=lambda entry: -entry[2])
+    for name, _, cumulative, _ in top_level[:top]:
+        lines.append(f"  {cumulative * 1000:9.1f} ms  {name}")
+    eager = sorted({entry[0] for entry in imports if entry[0].split(".")[0] in LAZY_MODULES})
+    if eager:
+        lines += ["", "Imported at startup but should load lazily: " + ", ".join(eager)]
+    return "\n".join(lines)
+
+
+def main(main_path):
+    """Prints the report for the app at `main_path` and returns the exit code."""
+    if getattr(sys, "frozen", False):
+        print("The startup report needs a Python interpreter; run it from source.")
+        return 2
+    phases, imports, wall = run_probe(os.path.abspath(main_path))
+    if not phases:
+        print("The startup probe did not report; is a display available?")
+        return 2
+    print(format_report(phases, imports, wall))
+    eager = any(entry[0].split(".")[0] in LAZY_MODULES for entry in imports)
+    return 1 if eager or wall > STARTUP_BUDGET_SECONDS else 0
@@ -0,0 +1,314 @@
+"""Writes the binary PowerPoint (.ppt) fixtures used by tests/test_ppt_binary.py.
+
+The decks are built record by record and wrapped in an OLE2 compound file,
+so the fixtures do not depend on PowerPoint or on the reader under test.
+Run `python tests/fixtures/make_ppt_fixtures.py` to regenerate them.
+"""
+import os
+import struct
+
+SECTOR_SIZE = 512
+MINI_SECTOR_SIZE = 64
+MINI_CUTOFF = 4096
+_ENTRIES_PER_FAT_SECTOR = SECTOR_SIZE // 4
+_FAT_SECTOR = 0xFFFFFFFD
+_END_OF_CHAIN = 0xFFFFFFFE
+_FREE_SECTOR = 0xFFFFFFFF
+_NO_STREAM = 0xFFFFFFFF
+
+RT_DOCUMENT = 0x03E8
+RT_DOCUMENT_ATOM = 0x03E9
+RT_SLIDE = 0x03EE
+RT_SLIDE_ATOM = 0x03EF
+RT_PPDRAWING_GROUP = 0x040B
+RT_PPDRAWING = 0x040C
+RT_SLIDE_PERSIST_ATOM = 0x03F3
+RT_OUTLINE_TEXT_REF_ATOM = 0x0F9E
+RT_TEXT_HEADER_ATOM = 0x0F9F
+RT_TEXT_CHARS_ATOM = 0x0FA0
+RT_TEXT_BYTES_ATOM = 0x0FA8
+RT_SLIDE_LIST_WITH_TEXT = 0x0FF0
+RT_USER_EDIT_ATOM = 0x0FF5
+RT_CURRENT_USER_ATOM = 0x0FF6
+RT_PERSIST_DIRECTORY_ATOM = 0x1772
+RT_OFFICEART_DGG_CONTAINER = 0xF000
+RT_OFFICEART_DG_CONTAINER = 0xF002
+RT_OFFICEART_SPGR_CONTAINER = 0xF003
+RT_OFFICEART_SP_CONTAINER = 0xF004
+RT_OFFICEART_FBSE = 0xF007
+RT_OFFICEART_FDG = 0xF008
+RT_OFFICEART_FSP = 0xF00A
+RT_OFFICEART_CLIENT_TEXTBOX = 0xF00D
+
+# TextHeaderAtom text types.
+TITLE, BODY, OTHER = 0, 1, 4
+
+FIXTURES = os.path.dirname(os.path.abspath(__file__))
+
+
+# --- PowerPoint records ------------------------------------------------------
+
+def atom(rec_type, body=b"", instance=0):
+    return struct.pack("<HHI", instance << 4, rec_type, len(body)) + body
+
+
+def container(rec_type, children, instance=0):
+    body = b"".join(children)
+    return struct.pack("<HHI", 0xF | instance << 4, rec_type, len(body)) + body
+
+
+def text_atoms(text, text_type=OTHER):
+    """A TextHeaderAtom followed by the text, as bytes when it fits in latin-1."""
+    header = atom(RT_TEXT_HEADER_ATOM, struct.pack("<I", text_type))
+    try:
+        return header + atom(RT_TEXT_BYTES_ATOM, text.encode("latin-1"))
+    except UnicodeEncodeError:
+        return header + atom(RT_TEXT_CHARS_ATOM, text.encode("utf-16-le"))
+
+
+def shape(shape_id, textbox=None):
+    """An OfficeArtSpContainer, with a client textbox when `textbox` holds its records."""
+    children = [atom(RT_OFFICEART_FSP, struct.pack("<II", shape_id, 0xA00), instance=1)]
+    if textbox is not None:
+        children.append(container(RT_OFFICEART_CLIENT_TEXTBOX, [textbox]))
+    return container(RT_OFFICEART_SP_CONTAINER, children)
+
+
+def text_shape(shape_id, text):
+    return shape(shape_id, text_atoms(text))
+
+
+def placeholder_shape(shape_id, outline_index, text_type=BODY):
+    """A shape whose text lives in the SlideListWithText, referenced by index."""
+    return shape(shape_id, atom(RT_TEXT_HEADER_ATOM, struct.pack("<I", text_type))
+                 + atom(RT_OUTLINE_TEXT_REF_ATOM, struct.pack("<i", outline_index)))
+
+
+def group(shapes):
+    """An OfficeArtSpgrContainer; its first shape is the group shape itself."""
+    return container(RT_OFFICEART_SPGR_CONTAINER, [shape(0x400)] + list(shapes))
+
+
+def slide(shapes=None):
+    """A SlideContainer, with a drawing of the given top-level shapes unless `shapes` is None."""
+    children = [atom(RT_SLIDE_ATOM, bytes(24), instance=2)]
+    if shapes is not None:
+        dg = container(RT_OFFICEART_DG_CONTAINER, [
+            atom(RT_OFFICEART_FDG, struct.pack("<II", len(shapes) + 1, 0x400), instance=1),
+            group(shapes),
+        ])
+        children.append(container(RT_PPDRAWING, [dg]))
+    return container(RT_SLIDE, children)
+
+
+def slide_list(slides):
+    """The slide SlideListWithText: (persist ID, [(text type, text or None), ...]) per slide."""
+    children = []
+    for persist_id, outline in slides:
+        children.append(atom(RT_SLIDE_PERSIST_ATOM, struct.pack("<IIiII", persist_id, 0, len(outline), 0, 256 + persist_id)))
+        for text_type, text in outline:
+            if text is None:
+                children.append(atom(RT_TEXT_HEADER_ATOM, struct.pack("<I", text_type)))
+            else:
+                children.append(text_atoms(text, text_type))
+    return container(RT_SLIDE_LIST_WITH_TEXT, children)
+
+
+def document(slides, drawing_group_size=0):
+    children = [atom(RT_DOCUMENT_ATOM, bytes(40), instance=1)]
+    if drawing_group_size:
+        # Real decks keep picture data here; it pushes the stream past the mini-stream cutoff.
+        blip = atom(RT_OFFICEART_FBSE, bytes(drawing_group_size), instance=5)
+        children.append(container(RT_PPDRAWING_GROUP, [container(RT_OFFICEART_DGG_CONTAINER, [blip])]))
+    children.append(slide_list(slides))
+    return container(RT_DOCUMENT, children)
+
+
+class DocumentStream:
+    """Lays out a "PowerPoint Document" stream as a series of saves."""
+
+    def __init__(self):
+        self.data = b""
+        self.last_edit = 0
+
+    def append(self, record):
+        offset = len(self.data)
+        self.data += record
+        return offset
+
+    def save(self, records, doc_persist_id=1):
+        """Appends {persist ID: record} plus a persist directory and UserEditAtom; returns the edit offset."""
+        offsets = {persist_id: self.append(record) for persist_id, record in records.items()}
+        directory = b""
+        for persist_id in sorted(offsets):
+            directory += struct.pack("<II", persist_id | 1 << 20, offsets[persist_id])
+        dir_offset = self.append(atom(RT_PERSIST_DIRECTORY_ATOM, directory))
+        edit = struct.pack("<IHBBIIIIHH", 0, 0, 0, 3, self.last_edit, dir_offset, doc_persist_id,
+                           max(offsets) + 1, 1, 0)
+        self.last_edit = self.append(atom(RT_USER_EDIT_ATOM, edit))
+        return self.last_edit
+
+
+def current_user(edit_offset):
+    user = b"lyrics"
+    body = struct.pack("<IIIHHBBH", 0x14, 0xE391C05F, edit_offset, len(user), 0x03F4, 3, 0, 0)
+    return atom(RT_CURRENT_USER_ATOM, body + user + struct.pack("<I", 8))
+
+
+# --- OLE2 compound file -------------------------------------------------------
+
+def _sectors(data, size):
+    data += bytes(-len(data) % size)
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def _chain(table, start, count):
+    for i in range(count):
+        table.append(start + i + 1 if i < count - 1 else _END_OF_CHAIN)
+    return start if count else _END_OF_CHAIN
+
+
+def _dir_entry(name, entry_type, start, size, child=_NO_STREAM, right=_NO_STREAM):
+    encoded = (name + "\0").encode("utf-16-le")
+    return (encoded.ljust(64, b"\0")
+            + struct.pack("<HBBIII", len(encoded), entry_type, 1, _NO_STREAM, right, child)
+            + bytes(36) + struct.pack("<IQ", start, size))
+
+
+def compound_file(streams):
+    """Returns the bytes of a version 3 compound file holding the `streams` {name: data} in order."""
+    names = list(streams)
+    mini_stream = b""
+    minifat = []
+    big = []
+    starts = {}
+    for name in names:
+        data = streams[name]
+        if len(data) < MINI_CUTOFF:
+            count = len(_sectors(data, MINI_SECTOR_SIZE))
+            starts[name] = _chain(minifat, len(minifat), count)
+            mini_stream += b"".join(_sectors(data, MINI_SECTOR_SIZE))
+        else:
+            big.append(name)
+
+    # Regular sectors after the FAT: directory, mini FAT, mini stream, large streams.
+    dir_sector_count = len(_sectors(bytes(128 * (len(names) + 1)), SECTOR_SIZE))
+    minifat_bytes = struct.pack(f"<{len(minifat)}I", *minifat)
+    payload = [("dir", dir_sector_count), ("minifat", len(_sectors(minifat_bytes, SECTOR_SIZE))),
+               ("mini", len(_sectors(mini_stream, SECTOR_SIZE)))]
+    payload += [(name, len(_sectors(streams[name], SECTOR_SIZE))) for name in big]
+    payload_count = sum(count for _, count in payload)
+    fat_count = 1
+    while fat_count * _ENTRIES_PER_FAT_SECTOR < fat_count + payload_count:
+        fat_count += 1
+
+    fat = [_FAT_SECTOR] * fat_count
+    first = {}
+    for name, count in payload:
+        first[name] = _chain(fat, len(fat), count)
+    fat += [_FREE_SECTOR] * (-len(fat) % _ENTRIES_PER_FAT_SECTOR)
+    starts.update((name, first[name]) for name in big)
+
+    # The streams hang off the root as a chain of right siblings.
+    directory = [_dir_entry("Root Entry", 5, first["mini"], len(mini_stream), child=1)]
+    for i, name in enumerate(names, 1):
+        right = i + 1 if i < len(names) else _NO_STREAM
+        directory.append(_dir_entry(name, 2, starts[name], len(streams[name]), right=right))
+    while len(directory) % (SECTOR_SIZE // 128):
+        directory.append(_dir_entry("", 0, 0, 0))
+    directory_bytes = b"".join(directory)
+
+    difat = list(range(fat_count)) + [_FREE_SECTOR] * (109 - fat_count)
+    header = (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + bytes(16)
+              + struct.pack("<HHHHH", 0x3E, 3, 0xFFFE, 9, 6) + bytes(6)
+              + struct.pack("<IIIIIIIII", 0, fat_count, first["dir"], 0, MINI_CUTOFF,
+                            first["minifat"] if minifat else _END_OF_CHAIN,
+                            len(_sectors(minifat_bytes, SECTOR_SIZE)), _END_OF_CHAIN, 0)
+              + struct.pack("<109I", *difat))
+    body = struct.pack(f"<{len(fat)}I", *fat)
+    body += directory_bytes + b"".join(_sectors(minifat_bytes, SECTOR_SIZE)) + b"".join(_sectors(mini_stream, SECTOR_SIZE))
+    for name in big:
+        body += b"".join(_sectors(streams[name], SECTOR_SIZE))
+    return header.ljust(SECTOR_SIZE, b"\0") + body
+
+
+def presentation(stream):
+    return compound_file({
+        "PowerPoint Document": stream.data,
+        "Current User": current_user(stream.last_edit),
+    })
+
+
+# --- Fixtures -------------------------------------------------------------------
+
+def multi_slide():
+    """Three slides over two saves, in a stream large enough to skip the mini stream.
+
+    Slide 1 mixes placeholder and textbox text, slide 2 has a nested group
+    whose text PowerPoint's Shapes collection does not list, and slide 3 was
+    edited by the second save.
+    """
+    stream = DocumentStream()
+    slides = [
+        (2, [(TITLE, "Amazing Grace"), (BODY, "Amazing grace, how sweet the sound\rThat saved a wretch like me")]),
+        (3, [(TITLE, "Verse 2")]),
+        (4, [(TITLE, "Chorus")]),
+    ]
+    stream.save({
+        1: document(slides, drawing_group_size=5000),
+        2: slide([placeholder_shape(0x401, 0, TITLE), placeholder_shape(0x402, 1),
+                  text_shape(0x403, "  CCLI 22025  ")]),
+        3: slide([placeholder_shape(0x401, 0, TITLE),
+                  text_shape(0x402, "'Twas grace that taught\vmy heart to fear\r\rAnd grace my fears relieved"),
+                  group([text_shape(0x404, "Inside a group")])]),
+        4: slide([text_shape(0x401, "Chorus draft")]),
+    })
+    stream.save({4: slide([text_shape(0x401, "Chorus\rÉglise – ☃ frère")])})
+    return presentation(stream)
+
+
+def placeholder_only():
+    """A slide whose drawing has placeholders but no textboxes, and a header without text."""
+    stream = DocumentStream()
+    slides = [(2, [(TITLE, "How Great Thou Art"), (BODY, None), (BODY, "O Lord my God\rwhen I in awesome wonder")])]
+    stream.save({
+        1: document(slides),
+        2: slide([shape(0x401), shape(0x402)]),
+    })
+    return presentation(stream)
+
+
+def no_drawing():
+    """The first slide has no PPDrawing, so only its SlideListWithText text is known."""
+    stream = DocumentStream()
+    slides = [
+        (2, [(TITLE, "Be Thou My Vision"), (BODY, "Be Thou my vision\vO Lord of my heart")]),
+        (3, [(TITLE, "Verse 2")]),
+    ]
+    stream.save({
+        1: document(slides),
+        2: slide(),
+        3: slide([placeholder_shape(0x401, 0, TITLE), text_shape(0x402, "Be Thou my wisdom")]),
+    })
+    return presentation(stream)
+
+
+def truncated():
+    """multi_slide.ppt cut off part way through its PowerPoint Document stream."""
+    data = multi_slide()
+    return data[:len(data) // 2]
+
+
+FIXTURE_BUILDERS = {
+    "multi_slide.ppt": multi_slide,
+    "placeholder_only.ppt": placeholder_only,
+    "no_drawing.ppt": no_drawing,
+    "truncated.ppt": truncated,
+}
+
+
+if __name__ == "__main__":
+    for file_name, build in FIXTURE_BUILDERS.items():
+        with open(os.path.join(FIXTURES, file_name), "wb") as f:
+            f.write(build())
+        print(file_name)
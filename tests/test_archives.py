@@ -0,0 +1,96 @@
+import os
+import zipfile
+
+import pytest
+
+import archives
+import extractors
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DATE = (2024, 5, 1, 12, 0, 0)
+
+
+def make_zip(path, members):
+    """Writes an archive of {member name: bytes}, every member with the same timestamp."""
+    with zipfile.ZipFile(str(path), "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(zipfile.ZipInfo(name, date_time=DATE), data)
+    return str(path)
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("Library.zip::Hymns/Grace.pptx", ("Library.zip", "Hymns/Grace.pptx")),
+    ("D:\\Songs\\Library.ZIP::Grace.ppt", ("D:\\Songs\\Library.ZIP", "Grace.ppt")),
+    ("Library.zip::", None),
+    ("Notes.txt::Grace.pptx", None),
+    ("Grace.pptx", None),
+])
+def test_split_member(path, expected):
+    assert archives.split_member(path) == expected
+    assert archives.is_member(path) == (expected is not None)
+
+
+def test_display_name_names_the_archive_of_a_member():
+    assert archives.display_name(os.path.join("Songs", "Grace.pptx")) == "Grace.pptx"
+    path = archives.member_path(os.path.join("Songs", "Library.zip"), "Hymns/Grace.pptx")
+    assert archives.display_name(path) == "Grace.pptx (Library.zip)"
+
+
+def test_members_are_read_in_memory_and_streamed(tmp_path):
+    archive = make_zip(tmp_path / "Library.zip", {"Hymns/Grace.pptx": b"grace deck"})
+    path = archives.member_path(archive, "Hymns/Grace.pptx")
+
+    assert archives.read_member(path) == b"grace deck"
+    member = archives.open_member(path)
+    member.seek(6)
+    assert member.read() == b"deck"
+    with archives.open_binary(path) as f:
+        assert f.read() == b"grace deck"
+    assert archives.file_size(path) == len(b"grace deck")
+
+
+def test_iter_members_filters_names_and_skips_resource_forks(tmp_path):
+    archive = make_zip(tmp_path / "Library.zip", {
+        "Grace.pptx": b"", "Hymns/Vision.PPT": b"", "Hymns/readme.txt": b"",
+        "__MACOSX/Hymns/._Vision.PPT": b"", "Drafts/Old.pptx": b"", "Hymns/~$Vision.pptx": b"",
+    })
+    members = archives.iter_members(archive, ("*.pptx", "*.ppt"), exclude=("drafts", "~$*"))
+    assert [archives.split_member(path)[1] for path in members] == ["Grace.pptx", "Hymns/Vision.PPT"]
+
+
+def test_stat_key_changes_with_member_contents(tmp_path):
+    archive = tmp_path / "Library.zip"
+    make_zip(archive, {"Grace.pptx": b"version one", "Vision.pptx": b"vision"})
+    path = archives.member_path(str(archive), "Grace.pptx")
+    key = archives.stat_key(path)
+    assert key[0] == len(b"version one")
+
+    # Repacking with the same contents keeps the key; the same size and time
+    # with different bytes does not, since the CRC is part of it.
+    make_zip(archive, {"Vision.pptx": b"vision", "Grace.pptx": b"version one"})
+    assert archives.stat_key(path) == key
+    make_zip(archive, {"Grace.pptx": b"version two", "Vision.pptx": b"vision"})
+    assert archives.stat_key(path)[0] == key[0]
+    assert archives.stat_key(path) != key
+
+
+def test_missing_members_and_broken_archives_raise_oserror(tmp_path):
+    archive = make_zip(tmp_path / "Library.zip", {"Grace.pptx": b"deck"})
+    with pytest.raises(OSError):
+        archives.stat_key(archives.member_path(archive, "Missing.pptx"))
+    broken = tmp_path / "Broken.zip"
+    broken.write_bytes(b"not a zip")
+    with pytest.raises(OSError):
+        archives.stat_key(archives.member_path(str(broken), "Grace.pptx"))
+    assert archives.file_size(archives.member_path(str(broken), "Grace.pptx")) == 0
+
+
+def test_decks_inside_archives_extract_like_plain_files(tmp_path):
+    with open(os.path.join(FIXTURES, "multi_slide.ppt"), "rb") as f:
+        deck = f.read()
+    archive = make_zip(tmp_path / "Library.zip", {"Hymns/Amazing Grace.ppt": deck})
+    path = archives.member_path(archive, "Hymns/Amazing Grace.ppt")
+
+    expected = extractors.extract_lyrics(os.path.join(FIXTURES, "multi_slide.ppt"), ppt_engine="native")
+    assert expected
+    assert extractors.extract_lyrics(path, ppt_engine="native") == expected
@@ -0,0 +1,94 @@
+import glob
+import gzip
+import os
+import sqlite3
+
+import pytest
+
+import backup
+
+
+def make_db(tmp_path, rows=50):
+    path = str(tmp_path / "songs.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE sm (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.executemany("INSERT INTO sm VALUES (?, ?)", [(i, f"Song {i}" * 20) for i in range(rows)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def count_rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM sm").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def age(paths):
+    """Gives the backups distinct modification times, oldest first, so pruning order is deterministic."""
+    for i, path in enumerate(paths):
+        if os.path.exists(path):
+            os.utime(path, (1_000_000 + i, 1_000_000 + i))
+
+
+def test_backup_is_a_consistent_snapshot_during_a_write(tmp_path):
+    db_path = make_db(tmp_path)
+    writer = sqlite3.connect(db_path)
+    writer.execute("BEGIN IMMEDIATE")
+    writer.execute("DELETE FROM sm")
+    steps = []
+
+    path = backup.backup_database(db_path, pages=1, progress=lambda copied, total: steps.append((copied, total)))
+    writer.rollback()
+    writer.close()
+
+    assert count_rows(path) == 50
+    assert len(steps) > 1 and steps[-1][0] == steps[-1][1]
+    assert os.path.basename(path).startswith("songs.db" + backup.BACKUP_MARKER)
+
+
+def test_compressed_backup_unpacks_to_the_database(tmp_path):
+    db_path = make_db(tmp_path)
+    path = backup.backup_database(db_path, compress=True)
+    assert path.endswith(".gz")
+
+    restored = str(tmp_path / "restored.db")
+    with gzip.open(path, "rb") as packed, open(restored, "wb") as raw:
+        raw.write(packed.read())
+    assert count_rows(restored) == 50
+
+
+def test_failed_backup_leaves_no_partial_file(tmp_path):
+    db_path = make_db(tmp_path)
+    with pytest.raises(sqlite3.Error):
+        backup.backup_database(db_path, str(tmp_path / "missing" / "songs.db.bak"))
+    with pytest.raises(FileNotFoundError):
+        backup.backup_database(str(tmp_path / "nothing.db"))
+    assert not glob.glob(str(tmp_path / "**" / "*.partial*"), recursive=True)
+
+
+def test_backups_in_the_same_second_get_distinct_names(tmp_path):
+    db_path = make_db(tmp_path)
+    paths = {backup.backup_database(db_path) for _ in range(3)}
+    assert len(paths) == 3
+
+
+def test_manual_backups_and_snapshots_are_pruned_separately(tmp_path):
+    db_path = make_db(tmp_path)
+    manual = [backup.backup_database(db_path) for _ in range(4)]
+    age(manual)
+
+    snapshots = []
+    for _ in range(4):
+        snapshots.append(backup.snapshot_before_import(db_path, keep=2))
+        age(snapshots)
+    # Every snapshot prunes the older ones, and never touches a manual backup.
+    assert backup.list_backups(db_path, backup.SNAPSHOT_LABEL) == snapshots[-2:]
+    assert backup.list_backups(db_path) == manual
+
+    assert backup.prune_backups(db_path, keep=-1) == []
+    assert backup.prune_backups(db_path, keep=3) == manual[:1]
+    assert backup.list_backups(db_path) == manual[1:]
+    assert backup.list_backups(db_path, backup.SNAPSHOT_LABEL) == snapshots[-2:]
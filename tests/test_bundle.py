@@ -0,0 +1,103 @@
+import sqlite3
+
+import pytest
+
+import bundle
+import songdb
+
+
+def make_db(path, songs, first_id=1):
+    conn = sqlite3.connect(str(path))
+    conn.execute(f"CREATE TABLE sm ({', '.join(songdb.SM_COLUMNS)}, PRIMARY KEY (id))")
+    conn.executemany(songdb.INSERT_SONG_SQL, [
+        songdb.build_song_row(song_id, name, lyrics, "Hymns", "Arial")
+        for song_id, (name, lyrics) in enumerate(songs, first_id)
+    ])
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+def read_songs(path):
+    conn = sqlite3.connect(str(path))
+    try:
+        return conn.execute("SELECT id, name, lyrics, slideseq FROM sm ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+SONGS = [
+    ("Amazing Grace", "Amazing grace<slide>How sweet the sound<slide>Amazing grace"),
+    ("Be Thou My Vision", "Be Thou my vision<BR>O Lord of my heart"),
+    ("How Great Thou Art", "O Lord my God<slide>Then sings my soul, Église"),
+]
+
+
+@pytest.mark.parametrize("name", ["songs.jsonl", "songs.jsonl.gz", "songs.db"])
+def test_export_then_merge_copies_every_column(tmp_path, name):
+    source = make_db(tmp_path / "source.db", SONGS)
+    target = make_db(tmp_path / "target.db", [("Other", "words")], first_id=7)
+    path = str(tmp_path / name)
+
+    assert bundle.export_songs(source, path) == len(SONGS)
+    result = bundle.merge_bundle(path, target)
+
+    assert result.error is None and result.counts == {"added": 3}
+    merged = read_songs(target)
+    assert [song_id for song_id, *_ in merged] == [7, 8, 9, 10]
+    assert [row[1:] for row in merged[1:]] == [row[1:] for row in read_songs(source)]
+    # Merging the same bundle again changes nothing.
+    assert bundle.merge_bundle(path, target).counts == {"unchanged": 3}
+    assert read_songs(target) == merged
+
+
+def test_merging_twice_with_rename_adds_each_song_once(tmp_path):
+    source = make_db(tmp_path / "source.db", SONGS)
+    target = make_db(tmp_path / "target.db", [("Amazing Grace", "Older words"), ("Amazing Grace (2)", "Other words")])
+    path = str(tmp_path / "songs.jsonl")
+    bundle.export_songs(source, path)
+
+    assert bundle.merge_bundle(path, target, collisions="rename").counts == {"renamed": 1, "added": 2}
+    merged = read_songs(target)
+    assert [name for _, name, _, _ in merged][:3] == ["Amazing Grace", "Amazing Grace (2)", "Amazing Grace (3)"]
+
+    seen = []
+    result = bundle.merge_bundle(path, target, collisions="rename", on_song=lambda *song: seen.append(song))
+    assert result.counts == {"unchanged": 3}
+    assert seen[0] == ("Amazing Grace (3)", "unchanged")
+    assert read_songs(target) == merged
+
+
+@pytest.mark.parametrize("collisions, counts, names", [
+    ("skip", {"added": 1, "unchanged": 1, "skipped": 1}, ["Holy"]),
+    ("overwrite", {"added": 1, "unchanged": 1, "overwritten": 1}, ["Holy"]),
+    ("rename", {"added": 1, "unchanged": 1, "renamed": 1}, ["Holy", "Holy (2)"]),
+])
+def test_songs_repeated_in_one_bundle_see_each_other(tmp_path, collisions, counts, names):
+    source = make_db(tmp_path / "source.db", [("Holy", "Holy holy holy"), ("HOLY!", "Holy holy holy"),
+                                              ("Holy", "Lord God Almighty")])
+    target = make_db(tmp_path / "target.db", [])
+    path = str(tmp_path / "songs.jsonl")
+    bundle.export_songs(source, path)
+
+    result = bundle.merge_bundle(path, target, collisions=collisions)
+    assert result.error is None and result.counts == counts
+    assert [name for _, name, _, _ in read_songs(target)] == names
+
+
+def test_dry_run_plans_without_writing(tmp_path):
+    source = make_db(tmp_path / "source.db", SONGS)
+    target = make_db(tmp_path / "target.db", [("Amazing Grace", "Older words")])
+    path = str(tmp_path / "songs.db")
+    bundle.export_songs(source, path)
+
+    result = bundle.merge_bundle(path, target, collisions="overwrite", dry_run=True)
+    assert result.counts == {"overwritten": 1, "added": 2}
+    assert read_songs(target) == [(1, "Amazing Grace", "Older words", "")]
+
+
+def test_a_file_that_is_not_a_bundle_is_rejected(tmp_path):
+    path = tmp_path / "songs.jsonl"
+    path.write_text('{"songs": 3}\n')
+    with pytest.raises(bundle.BundleError):
+        bundle.read_bundle(str(path))
@@ -0,0 +1,86 @@
+import json
+import sqlite3
+
+import pytest
+
+import backup
+import cli
+import extractors
+import songdb
+
+IMPORT_OPTIONS = ["--workers", "0", "--no-cache", "--no-similar", "--no-snapshot"]
+
+
+def make_db(tmp_path):
+    path = str(tmp_path / "songs.db")
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE sm ({', '.join(songdb.SM_COLUMNS)}, PRIMARY KEY (id))")
+    conn.close()
+    return path
+
+
+def decks(tmp_path, *names):
+    paths = []
+    for name in names:
+        path = tmp_path / name
+        path.write_bytes(b"deck")
+        paths.append(str(path))
+    return paths
+
+
+def records(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+@pytest.fixture
+def lyrics(monkeypatch):
+    """Fakes extraction: decks named "Blank" have no text, any other deck's lyrics are its path."""
+    monkeypatch.setattr(extractors, "extract_lyrics",
+                        lambda path, *engines: "" if "Blank" in path else f"{path} lyrics")
+
+
+def test_import_exits_0_when_every_deck_is_imported(tmp_path, capsys, lyrics):
+    db_path = make_db(tmp_path)
+    assert cli.main(["import", "--db", db_path, *IMPORT_OPTIONS, *decks(tmp_path, "One.pptx", "Two.pptx")]) == cli.EXIT_OK
+    assert records(capsys)[-1]["summary"] == {"added": 2}
+
+    # Importing the same decks again skips them, which is still a success.
+    assert cli.main(["import", "--db", db_path, *IMPORT_OPTIONS, *decks(tmp_path, "One.pptx")]) == cli.EXIT_OK
+
+
+def test_import_exits_1_when_a_deck_fails(tmp_path, capsys, lyrics):
+    db_path = make_db(tmp_path)
+    paths = decks(tmp_path, "One.pptx", "Blank.pptx")
+    assert cli.main(["import", "--db", db_path, *IMPORT_OPTIONS, *paths]) == cli.EXIT_FILES_FAILED
+    assert records(capsys)[-1]["summary"] == {"added": 1, "extract_failed": 1}
+
+
+def test_missing_database_and_bad_arguments_exit_2(tmp_path, capsys):
+    missing = str(tmp_path / "missing.db")
+    assert cli.main(["import", "--db", missing, *IMPORT_OPTIONS, str(tmp_path)]) == cli.EXIT_USAGE
+    assert records(capsys) == [{"error": f"songs.db not found: {missing}"}]
+    assert cli.main(["search", "--db", missing, "grace"]) == cli.EXIT_USAGE
+
+    with pytest.raises(SystemExit) as exited:
+        cli.main(["import", "--duplicates", "sometimes", str(tmp_path)])
+    assert exited.value.code == cli.EXIT_USAGE
+
+
+def test_import_exits_3_when_aborted(tmp_path, capsys, monkeypatch, lyrics):
+    db_path = make_db(tmp_path)
+    paths = decks(tmp_path, "One.pptx")
+
+    def fail_snapshot(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(backup, "snapshot_before_import", fail_snapshot)
+    options = [option for option in IMPORT_OPTIONS if option != "--no-snapshot"]
+    assert cli.main(["import", "--db", db_path, *options, *paths]) == cli.EXIT_ABORTED
+    assert records(capsys) == [{"error": "pre-import snapshot failed, nothing was imported: disk full"}]
+
+    def fail_extraction(path, *engines):
+        raise MemoryError(path)
+
+    monkeypatch.setattr(extractors, "extract_lyrics", fail_extraction)
+    assert cli.main(["import", "--db", db_path, *IMPORT_OPTIONS, *paths]) == cli.EXIT_ABORTED
+    assert "error" in records(capsys)[-1]
@@ -0,0 +1,100 @@
+import itertools
+import os
+import shutil
+import types
+
+import extract_cache
+import extractors
+
+
+class FakeExtractor:
+    """Stands in for `extractors.extract_lyrics` and counts the decks it parses."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, path, *engines):
+        self.calls.append(path)
+        return f"lyrics of {os.path.basename(path)}"
+
+
+def deck(tmp_path, name, content=b"deck"):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+def open_cache(tmp_path, monkeypatch, **kwargs):
+    extractor = FakeExtractor()
+    monkeypatch.setattr(extractors, "extract_lyrics", extractor)
+    # A strictly increasing clock, so recency does not depend on the timer's resolution.
+    clock = itertools.count(1)
+    monkeypatch.setattr(extract_cache, "time", types.SimpleNamespace(time=lambda: next(clock)))
+    return extract_cache.ExtractionCache(str(tmp_path / "cache.db"), **kwargs), extractor
+
+
+def test_second_extraction_is_a_hit(tmp_path, monkeypatch):
+    cache, extractor = open_cache(tmp_path, monkeypatch)
+    path = deck(tmp_path, "Amazing Grace.pptx")
+
+    assert cache.extract_lyrics(path) == "lyrics of Amazing Grace.pptx"
+    assert cache.extract_lyrics(path) == "lyrics of Amazing Grace.pptx"
+    assert extractor.calls == [path]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_changed_file_is_extracted_again(tmp_path, monkeypatch):
+    cache, extractor = open_cache(tmp_path, monkeypatch)
+    path = deck(tmp_path, "Amazing Grace.pptx")
+    cache.extract_lyrics(path)
+
+    deck(tmp_path, "Amazing Grace.pptx", b"edited deck")
+    cache.extract_lyrics(path)
+    assert extractor.calls == [path, path]
+
+
+def test_moved_file_is_found_by_content_hash(tmp_path, monkeypatch):
+    cache, extractor = open_cache(tmp_path, monkeypatch)
+    path = deck(tmp_path, "Amazing Grace.pptx")
+    cache.extract_lyrics(path)
+
+    moved = str(tmp_path / "moved.pptx")
+    shutil.move(path, moved)
+    os.utime(moved, ns=(0, 0))
+    assert cache.lookup(moved, extractors.DEFAULT_PPTX_ENGINE)[0] == "lyrics of Amazing Grace.pptx"
+    assert extractor.calls == [path]
+
+    # The hash hit re-keyed the entry, so the next lookup does not read the file.
+    monkeypatch.setattr(extract_cache, "file_hash", lambda path: 1 / 0)
+    assert cache.lookup(moved, extractors.DEFAULT_PPTX_ENGINE) == ("lyrics of Amazing Grace.pptx", None)
+
+
+def test_engine_version_change_invalidates_entries(tmp_path, monkeypatch):
+    cache, extractor = open_cache(tmp_path, monkeypatch)
+    path = deck(tmp_path, "Amazing Grace.pptx")
+    cache.extract_lyrics(path)
+
+    engine = extractors.DEFAULT_PPTX_ENGINE
+    monkeypatch.setitem(extractors.ENGINE_VERSIONS, engine, extractors.ENGINE_VERSIONS[engine] + 1)
+    cache.extract_lyrics(path)
+    assert extractor.calls == [path, path]
+
+
+def test_byte_cap_evicts_least_recently_used(tmp_path, monkeypatch):
+    cache, _ = open_cache(tmp_path, monkeypatch, max_bytes=10)
+    engine = extractors.DEFAULT_PPTX_ENGINE
+    first, second, third = (deck(tmp_path, f"{name}.pptx", name.encode()) for name in ("one", "two", "three"))
+    cache.put(first, engine, "1111")
+    cache.put(second, engine, "2222")
+    cache.lookup(first, engine)
+    cache.put(third, engine, "3333")
+
+    assert cache.lookup(first, engine)[0] == "1111"
+    assert cache.lookup(second, engine)[0] is None
+    assert cache.lookup(third, engine)[0] == "3333"
+    cache.close()
+
+    # The running total survives reopening, so the cap keeps holding.
+    reopened = extract_cache.ExtractionCache(cache.path, max_bytes=10)
+    assert reopened._total_bytes == 8
+    reopened.close()
@@ -0,0 +1,80 @@
+import copy
+
+import pytest
+
+import extractors
+
+pptx = pytest.importorskip("pptx")
+from pptx.util import Inches  # noqa: E402
+
+
+def add_textbox(shapes, text):
+    box = shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1))
+    box.text_frame.text = text
+    return box
+
+
+def build_deck(path):
+    """Writes a deck that exercises every kind of shape text both engines have to agree on."""
+    prs = pptx.Presentation()
+
+    # Title and body placeholders from the layout, with blank and indented lines.
+    slide = prs.slides.add_slide(prs.slide_layouts[1])
+    slide.shapes.title.text = "Amazing Grace"
+    body = slide.placeholders[1].text_frame
+    body.text = "Amazing grace, how sweet the sound   "
+    body.add_paragraph().text = ""
+    body.add_paragraph().text = "  That saved a wretch like me"
+
+    # Soft line breaks inside one paragraph, and XML entities.
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    paragraph = add_textbox(slide.shapes, "").text_frame.paragraphs[0]
+    paragraph.add_run().text = "Tom & Jerry <live>"
+    paragraph.add_line_break()
+    paragraph.add_run().text = "\"quoted\" 'apostrophe' éè — dash"
+    paragraph.add_line_break()
+    paragraph.add_line_break()
+    paragraph.add_run().text = "after two breaks"
+
+    # Nested groups and a table: only top-level shapes with a text frame count.
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    add_textbox(slide.shapes, "Top level")
+    outer = slide.shapes.add_group_shape()
+    add_textbox(outer.shapes, "In a group")
+    inner = outer.shapes.add_group_shape()
+    add_textbox(inner.shapes, "In a nested group")
+    table = slide.shapes.add_table(2, 2, Inches(1), Inches(3), Inches(4), Inches(1)).table
+    table.cell(0, 0).text = "In a table"
+    add_textbox(slide.shapes, "Last shape")
+
+    # A slide with no text at all, and one with an autoshape.
+    prs.slides.add_slide(prs.slide_layouts[6])
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    shape = slide.shapes.add_shape(1, Inches(1), Inches(1), Inches(2), Inches(2))
+    shape.text_frame.text = "Chorus\nSecond line"
+
+    # Presentation order differs from the order of the slide parts.
+    slide_ids = prs.slides._sldIdLst
+    moved = copy.deepcopy(slide_ids[0])
+    slide_ids.remove(slide_ids[0])
+    slide_ids.append(moved)
+    prs.save(path)
+
+
+@pytest.mark.parametrize("engine", sorted(extractors.PPTX_ENGINES))
+def test_engines_return_identical_text(tmp_path, engine):
+    path = str(tmp_path / "deck.pptx")
+    build_deck(path)
+
+    expected = extractors.extract_text_pptx(path)
+    assert extractors.PPTX_ENGINES[engine](path).encode("utf-8") == expected.encode("utf-8")
+
+
+def test_engines_skip_groups_and_tables(tmp_path):
+    path = str(tmp_path / "deck.pptx")
+    build_deck(path)
+
+    slides = extractors.extract_text_pptx_xml(path).split("<slide>")
+    assert slides[1] == "Top level<BR>Last shape"
+    assert slides[0] == "Tom & Jerry <live><BR>\"quoted\" 'apostrophe' éè — dash<BR>after two breaks"
+    assert slides[-1] == "Amazing Grace<BR>Amazing grace, how sweet the sound<BR>  That saved a wretch like me"
@@ -0,0 +1,81 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+import isolation
+import songdb
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run as a script, so it is the `__main__` that spawned workers import again.
+POOL_SCRIPT = textwrap.dedent("""
+    import sys
+
+    import isolation
+    import main  # The app's entry script.
+
+
+    def qt_loaded():
+        return "PyQt5" in sys.modules
+
+
+    if __name__ == "__main__":
+        with isolation.IsolatedPool(1) as pool:
+            print(pool.submit(qt_loaded).result(timeout=60))
+""")
+
+
+def run(args, tmp_path, block_qt=False):
+    path = [REPO]
+    if block_qt:
+        stub = tmp_path / "blocked" / "PyQt5"
+        stub.mkdir(parents=True)
+        (stub / "__init__.py").write_text("raise ImportError('PyQt5 is blocked')\n")
+        path.insert(0, str(stub.parent))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path))
+    return subprocess.run([sys.executable] + args, cwd=str(tmp_path), env=env, capture_output=True, text=True,
+                          timeout=120)
+
+
+def test_workers_spawned_from_the_entry_script_do_not_load_qt(tmp_path):
+    script = tmp_path / "pool_script.py"
+    script.write_text(POOL_SCRIPT)
+    completed = run([str(script)], tmp_path)
+
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip() == "False"
+
+
+def test_command_line_import_runs_workers_without_qt(tmp_path):
+    db_path = str(tmp_path / "songs.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"CREATE TABLE sm ({', '.join(songdb.SM_COLUMNS)}, PRIMARY KEY (id))")
+    conn.close()
+    deck = tmp_path / "Song.pptx"
+    deck.write_bytes(b"not a deck")
+    completed = run([os.path.join(REPO, "main.py"), "import", str(deck), "--db", db_path, "--workers", "2",
+                     "--no-cache", "--no-snapshot"], tmp_path, block_qt=True)
+
+    records = [json.loads(line) for line in completed.stdout.splitlines()]
+    # The deck is not a real presentation, but its worker must run it rather than crash on import.
+    assert [record["status"] for record in records if "status" in record] == ["extract_failed"]
+
+
+def test_jobs_fail_instead_of_hanging_when_a_worker_cannot_start(monkeypatch):
+    def cannot_start(context):
+        raise OSError("Resource temporarily unavailable")
+
+    monkeypatch.setattr(isolation, "_Worker", cannot_start)
+    with isolation.IsolatedPool(1) as pool:
+        futures = [pool.submit(len, "deck") for _ in range(3)]
+        for future in futures:
+            with pytest.raises(isolation.ExtractionCrashed, match="could not start a worker"):
+                future.result(timeout=10)
+        # The supervisor survives, so later jobs fail too rather than wait forever.
+        with pytest.raises(isolation.ExtractionCrashed):
+            pool.submit(len, "deck").result(timeout=10)
@@ -0,0 +1,151 @@
+import sqlite3
+import threading
+import time
+
+import extractors
+import pipeline
+import songdb
+
+
+class FailingWriter(pipeline.SongImportWriter):
+    """Writes every deck as soon as it is queued, and raises on the second one."""
+
+    def open(self):
+        super().open()
+        self.writer.batch_size = 1
+
+    def apply(self, path, lyrics, failure=None, detail=None):
+        if self.results or self.source_paths:
+            raise sqlite3.OperationalError("database is locked")
+        super().apply(path, lyrics, failure, detail)
+
+
+def test_writer_error_rolls_back_and_reports_queued_songs(tmp_path, monkeypatch):
+    path = str(tmp_path / "songs.db")
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE sm ({', '.join(songdb.SM_COLUMNS)}, PRIMARY KEY (id))")
+    conn.close()
+    monkeypatch.setattr(extractors, "extract_lyrics", lambda path, *engines: f"{path} lyrics")
+    writer = FailingWriter(path, "cat", "font", check_similar=False)
+    run = pipeline.ExtractionPipeline(["One.pptx", "Two.pptx", "Three.pptx"], workers=0)
+    run.run(writer)
+
+    assert isinstance(run.error, sqlite3.OperationalError)
+    assert [(name, status, file) for name, status, _, file in writer.results] == [("One", "failed", "One.pptx")]
+    # The transaction was ended, so the database is free to write again.
+    conn = sqlite3.connect(path, timeout=0)
+    conn.execute("BEGIN IMMEDIATE")
+    assert conn.execute("SELECT COUNT(*) FROM sm").fetchone()[0] == 0
+
+
+def test_each_database_times_only_its_own_write_stages(tmp_path, monkeypatch):
+    import importer
+    import tracing
+
+    db_paths = []
+    for name in ("a.db", "b.db"):
+        path = str(tmp_path / name)
+        conn = sqlite3.connect(path)
+        conn.execute(f"CREATE TABLE sm ({', '.join(songdb.SM_COLUMNS)}, PRIMARY KEY (id))")
+        conn.close()
+        db_paths.append(path)
+    monkeypatch.setattr(extractors, "extract_lyrics", lambda path, *engines: f"{path} lyrics")
+    trace = tracing.ImportTrace()
+    files = ["One.pptx", "Two.pptx", "Three.pptx"]
+    outcomes = importer.run_import_multi(db_paths, files, workers=0, check_similar=False, trace=trace)
+
+    for outcome in outcomes:
+        stages = trace.summary(outcome.db_path)
+        assert stages["extract"]["events"] == len(files)
+        assert stages["normalize"]["events"] == len(files)
+        assert stages["commit"]["events"] == 1
+    assert trace.summary()["normalize"]["events"] == len(files) * len(db_paths)
+
+
+def test_extraction_error_rolls_back_the_import(tmp_path, monkeypatch):
+    path = str(tmp_path / "songs.db")
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE sm ({', '.join(songdb.SM_COLUMNS)}, PRIMARY KEY (id))")
+    conn.close()
+
+    def extract(path, *engines):
+        if path == "Two.pptx":
+            raise MemoryError("out of memory")
+        return f"{path} lyrics"
+
+    monkeypatch.setattr(extractors, "extract_lyrics", extract)
+    writer = pipeline.SongImportWriter(path, "cat", "font", check_similar=False)
+    run = pipeline.ExtractionPipeline(["One.pptx", "Two.pptx"], workers=0)
+    run.run(writer)
+
+    assert isinstance(run.error, MemoryError)
+    assert [(name, status) for name, status, _, _ in writer.results] == [("One", "failed")]
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM sm").fetchone()[0] == 0
+
+
+def test_plan_classifies_each_deck_against_the_stored_lyrics(tmp_path):
+    path = str(tmp_path / "songs.db")
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE sm ({', '.join(songdb.SM_COLUMNS)}, PRIMARY KEY (id))")
+    lyrics, slideseq = songdb.compact_slides("Chorus<slide>Verse<slide>Chorus")
+    conn.executemany(f"INSERT INTO sm VALUES ({', '.join('?' * len(songdb.SM_COLUMNS))})", [
+        songdb.build_song_row(1, "Amazing Grace", "old lyrics", "cat", "font"),
+        songdb.build_song_row(2, "Be Thou My Vision", lyrics, "cat", "font", slideseq),
+        songdb.build_song_row(3, "How Great Thou Art", "old lyrics", "cat", "font"),
+    ])
+    conn.commit()
+    conn.close()
+    writer = pipeline.SongImportWriter(path, "cat", "font", overwrite_names=["amazing grace"], check_similar=False)
+    writer.open()
+
+    assert writer.plan("New Song", "lyrics") == ("insert", None)
+    assert writer.plan("Amazing  Grace!", "new lyrics") == ("update", [1])
+    assert writer.plan("Amazing Grace", "old lyrics") == ("unchanged", None)
+    # Compacted slides are compared in playback order.
+    assert writer.plan("be thou my vision", "Chorus<slide>Verse<slide>Chorus") == ("unchanged", None)
+    assert writer.plan("How Great Thou Art", "new lyrics") == ("conflict", None)
+    assert writer.plan("How Great Thou Art", "") == ("extract_failed", None)
+
+    # A second deck with the same name in one import is compared with the first one.
+    writer.apply("New Song.pptx", "lyrics")
+    assert writer.plan("New Song", "lyrics") == ("unchanged", None)
+    assert writer.plan("New Song", "other lyrics") == ("conflict", None)
+    writer.close(commit=False)
+
+
+class HeldWriter(pipeline.SongImportWriter):
+    """Waits for `release` before applying each deck."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.release = threading.Event()
+
+    def apply(self, path, lyrics, failure=None, detail=None):
+        assert self.release.wait(10)
+        super().apply(path, lyrics, failure, detail)
+
+
+def test_decks_count_as_written_once_every_database_has_applied_them(tmp_path, monkeypatch):
+    paths = []
+    for name in ("fast.db", "slow.db"):
+        path = str(tmp_path / name)
+        conn = sqlite3.connect(path)
+        conn.execute(f"CREATE TABLE sm ({', '.join(songdb.SM_COLUMNS)}, PRIMARY KEY (id))")
+        conn.close()
+        paths.append(path)
+    monkeypatch.setattr(extractors, "extract_lyrics", lambda path, *engines: f"{path} lyrics")
+    fast = pipeline.SongImportWriter(paths[0], "cat", "font", check_similar=False)
+    slow = HeldWriter(paths[1], "cat", "font", check_similar=False)
+    run = pipeline.ExtractionPipeline(["One.pptx", "Two.pptx", "Three.pptx"], workers=0)
+    run.start(pipeline.MultiTargetWriter([fast, slow]))
+
+    deadline = time.monotonic() + 10
+    while len(fast.source_paths) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # Every deck has been handed to both databases, but only one has applied them.
+    assert len(fast.source_paths) == 3
+    assert run.stats.written == 0
+    slow.release.set()
+    run.wait()
+    assert run.error is None and run.stats.written == 3
@@ -0,0 +1,82 @@
+import os
+import struct
+
+import pytest
+
+import extractors
+import ppt_binary
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def record(rec_type, body=b"", instance=0):
+    return struct.pack("<HHI", instance << 4, rec_type, len(body)) + body
+
+
+def test_slide_list_keeps_one_entry_per_text_header():
+    slide_list = record(ppt_binary.RT_SLIDE_LIST_WITH_TEXT, b"".join([
+        record(ppt_binary.RT_SLIDE_PERSIST_ATOM, struct.pack("<I", 5) + bytes(16)),
+        # A header without a text atom still takes an OutlineTextRefAtom index.
+        record(ppt_binary.RT_TEXT_HEADER_ATOM, struct.pack("<I", 0)),
+        record(ppt_binary.RT_TEXT_HEADER_ATOM, struct.pack("<I", 1)),
+        record(ppt_binary.RT_TEXT_CHARS_ATOM, "Verse".encode("utf-16-le")),
+        record(ppt_binary.RT_TEXT_HEADER_ATOM, struct.pack("<I", 4)),
+        record(ppt_binary.RT_TEXT_BYTES_ATOM, b"Chorus"),
+    ]))
+    document = record(ppt_binary.RT_DOCUMENT, slide_list)
+
+    assert ppt_binary._slide_list(document, 0) == [(5, [None, "Verse", "Chorus"])]
+
+
+def fixture(name):
+    return os.path.join(FIXTURES, name)
+
+
+@pytest.mark.parametrize("name, expected", [
+    # Placeholder text comes through OutlineTextRefAtoms, the group's text is skipped,
+    # and the third slide has the text of the second save.
+    ("multi_slide.ppt", "Amazing Grace<BR>Amazing grace, how sweet the sound<BR>That saved a wretch like me<BR>CCLI 22025"
+                        "<slide>Verse 2<BR>'Twas grace that taught<BR>my heart to fear<BR>And grace my fears relieved"
+                        "<slide>Chorus<BR>Église – ☃ frère"),
+    # Placeholders without text of their own fall back to the slide list, minus the empty header.
+    ("placeholder_only.ppt", "How Great Thou Art<BR>O Lord my God<BR>when I in awesome wonder"),
+    ("no_drawing.ppt", "Be Thou My Vision<BR>Be Thou my vision<BR>O Lord of my heart<slide>Verse 2<BR>Be Thou my wisdom"),
+])
+def test_native_engine_extracts_fixture_decks(name, expected):
+    assert extractors.extract_lyrics(fixture(name), ppt_engine="native") == expected
+
+
+def test_read_slide_texts_keeps_powerpoint_separators():
+    with open(fixture("no_drawing.ppt"), "rb") as f:
+        assert ppt_binary.read_slide_texts(f) == [
+            ["Be Thou My Vision", "Be Thou my vision\vO Lord of my heart"],
+            ["Verse 2", "Be Thou my wisdom"],
+        ]
+
+
+def test_compound_file_reads_regular_and_mini_streams():
+    with open(fixture("multi_slide.ppt"), "rb") as f:
+        compound = ppt_binary.CompoundFile(f.read())
+    # The document stream is past the mini-stream cutoff; Current User is inside the mini stream.
+    assert len(compound.open_stream("PowerPoint Document")) >= compound.mini_cutoff
+    current_user = compound.open_stream("Current User")
+    assert ppt_binary._record_header(current_user, 0)[2] == ppt_binary.RT_CURRENT_USER_ATOM
+
+
+def test_persist_directory_prefers_the_newest_edit():
+    with open(fixture("multi_slide.ppt"), "rb") as f:
+        compound = ppt_binary.CompoundFile(f.read())
+    document = compound.open_stream("PowerPoint Document")
+    directory, doc_persist_id = ppt_binary._persist_directory(document, compound.open_stream("Current User"))
+
+    assert sorted(directory) == [1, 2, 3, 4]
+    assert ppt_binary._record_header(document, directory[doc_persist_id])[2] == ppt_binary.RT_DOCUMENT
+    # Slide 4 was saved twice; the second save's copy sits after the first save's UserEditAtom.
+    assert directory[4] > directory[3]
+    assert ppt_binary._shape_texts(document, directory[4], []) == ["Chorus\rÉglise – ☃ frère"]
+
+
+def test_truncated_stream_raises_format_error():
+    with pytest.raises(ppt_binary.PPTFormatError):
+        ppt_binary.read_slide_texts(fixture("truncated.ppt"))
+    assert extractors.extract_lyrics(fixture("truncated.ppt"), ppt_engine="native") == ""
@@ -0,0 +1,83 @@
+import os
+import zipfile
+
+import pytest
+
+from scanner import DeckScanner
+
+
+def make_tree(root, files):
+    for relative in files:
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"deck")
+
+
+def relative(paths, root):
+    return [os.path.relpath(path, root).replace(os.sep, "/") for path in paths]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    make_tree(tmp_path, [
+        "a.pptx", "b.PPT", "notes.txt",
+        "hymns/c.pptx", "hymns/old/d.ppt", "hymns/old/older/e.pptx",
+        "~$lock.pptx", "drafts/f.pptx",
+    ])
+    return tmp_path
+
+
+def test_files_come_before_subfolders_depth_first(tree):
+    assert relative(DeckScanner([str(tree)]), tree) == [
+        "a.pptx", "b.PPT", "~$lock.pptx", "drafts/f.pptx",
+        "hymns/c.pptx", "hymns/old/d.ppt", "hymns/old/older/e.pptx",
+    ]
+
+
+def test_max_depth_limits_how_far_down_to_look(tree):
+    assert relative(DeckScanner([str(tree)], max_depth=0), tree) == ["a.pptx", "b.PPT", "~$lock.pptx"]
+    assert relative(DeckScanner([str(tree)], max_depth=2), tree) == [
+        "a.pptx", "b.PPT", "~$lock.pptx", "drafts/f.pptx", "hymns/c.pptx", "hymns/old/d.ppt",
+    ]
+
+
+def test_include_and_exclude_match_files_and_folders(tree):
+    scanner = DeckScanner([str(tree)], include=("*.pptx",), exclude=("~$*", "OLD"))
+    assert relative(scanner, tree) == ["a.pptx", "drafts/f.pptx", "hymns/c.pptx"]
+    # Files named directly are still filtered by include.
+    assert list(DeckScanner([str(tree / "notes.txt"), str(tree / "a.pptx")])) == [str(tree / "a.pptx")]
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="needs symlinks")
+def test_symlink_loops_and_repeated_roots_are_walked_once(tree):
+    try:
+        os.symlink(str(tree / "hymns"), str(tree / "hymns" / "old" / "back"))
+    except OSError:
+        pytest.skip("symlinks are not permitted here")
+    os.symlink(str(tree / "hymns"), str(tree / "alias"))
+
+    scanner = DeckScanner([str(tree), str(tree / "hymns")], exclude=("drafts",))
+    found = relative(scanner, tree)
+    assert sorted(found) == ["a.pptx", "b.PPT", "hymns/c.pptx", "hymns/old/d.ppt", "hymns/old/older/e.pptx",
+                             "~$lock.pptx"]
+    assert scanner.dirs_scanned == 4
+    assert scanner.errors == []
+
+
+def test_archives_are_opened_only_when_asked(tree):
+    with zipfile.ZipFile(str(tree / "hymns" / "set.zip"), "w") as archive:
+        archive.writestr("set/g.pptx", b"deck")
+        archive.writestr("set/readme.txt", b"")
+
+    found = relative(DeckScanner([str(tree / "hymns")], max_depth=0, open_archives=True), tree)
+    assert found == ["hymns/c.pptx", "hymns/set.zip::set/g.pptx"]
+    assert relative(DeckScanner([str(tree / "hymns")], max_depth=0), tree) == ["hymns/c.pptx"]
+
+
+def test_cancel_stops_the_walk(tree):
+    scanner = DeckScanner([str(tree)])
+    found = []
+    for path in scanner:
+        found.append(path)
+        scanner.cancel()
+    assert len(found) == 1
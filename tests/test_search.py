@@ -0,0 +1,116 @@
+import sqlite3
+
+import pytest
+
+import pipeline
+import search
+import songdb
+
+SONGS = [
+    (1, "Amazing Grace", "Amazing grace how sweet the sound<BR>that saved a wretch like me"),
+    (2, "Be Thou My Vision", "Be Thou my vision<BR>O Lord of my heart<slide>Naught be all else to me save that Thou art"),
+    (3, "How Great Thou Art", "O Lord my God<BR>when I in awesome wonder<slide>Then sings my soul, Église"),
+]
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    """A songs.db with three songs; sidecar indexes are kept under tmp_path."""
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "appdata"))
+    db_path = str(tmp_path / "songs.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"CREATE TABLE sm ({', '.join(songdb.SM_COLUMNS)}, PRIMARY KEY (id))")
+    conn.executemany(songdb.INSERT_SONG_SQL, [
+        songdb.build_song_row(song_id, name, lyrics, "cat", "font") for song_id, name, lyrics in SONGS
+    ])
+    conn.commit()
+    yield db_path, conn
+    conn.close()
+
+
+@pytest.fixture
+def index(library):
+    try:
+        index = search.LyricsSearchIndex(library[0])
+    except sqlite3.OperationalError:
+        pytest.skip("this SQLite build has no FTS5")
+    assert index.sync() == len(SONGS)
+    yield index
+    index.close()
+
+
+def names(matches):
+    return [name for _, name, _, _ in matches]
+
+
+def no_full_scan(monkeypatch):
+    def fail(conn, known):
+        raise AssertionError("compared every row")
+
+    monkeypatch.setattr(songdb, "diff_songs", fail)
+
+
+def test_search_ranks_name_matches_first_and_matches_prefixes(index):
+    assert names(index.search("art")) == ["How Great Thou Art", "Be Thou My Vision"]
+    assert names(index.search("great thou")) == ["How Great Thou Art"]
+    assert names(index.search("awe")) == ["How Great Thou Art"]
+    # Diacritics are folded, and the line markers are not indexed as words.
+    assert names(index.search("eglise")) == ["How Great Thou Art"]
+    assert index.search("br") == []
+    assert index.search("  !! ") == []
+
+
+def test_snippets_mark_the_matched_words(index):
+    [(song_id, _, snippet, _)] = index.search("wretch")
+    assert song_id == 1
+    assert "[wretch]" in snippet and "<BR>" not in snippet
+
+
+def test_new_song_is_indexed_without_a_full_scan(library, index, monkeypatch):
+    db_path, conn = library
+    no_full_scan(monkeypatch)
+    conn.execute(songdb.INSERT_SONG_SQL, songdb.build_song_row(4, "Holy Holy Holy", "Lord God Almighty", "c", "f"))
+    conn.commit()
+
+    assert index.sync() == 1
+    assert names(index.search("almighty")) == ["Holy Holy Holy"]
+    assert index.sync() == 0
+
+
+def test_songs_overwritten_by_an_import_are_reindexed_without_a_full_scan(library, index, monkeypatch):
+    db_path, _ = library
+    writer = pipeline.SongImportWriter(db_path, "cat", "font", overwrite_all=True, check_similar=False)
+    writer.open()
+    writer.apply("Amazing Grace.pptx", "Through many dangers toils and snares")
+    writer.apply("New Song.pptx", "A brand new song")
+    writer.close()
+    no_full_scan(monkeypatch)
+
+    assert index.sync() == 2
+    assert names(index.search("dangers")) == ["Amazing Grace"]
+    assert index.search("wretch") == []
+    assert names(index.search("brand")) == ["New Song"]
+
+
+def test_edits_made_elsewhere_are_found_by_comparing_every_row(library, index):
+    _, conn = library
+    conn.execute("UPDATE sm SET lyrics = 'Be Thou my wisdom' WHERE id = 2")
+    conn.execute("DELETE FROM sm WHERE id = 3")
+    conn.commit()
+
+    assert index.sync() == 1
+    assert names(index.search("wisdom")) == ["Be Thou My Vision"]
+    assert index.search("awesome") == []
+    assert len(index) == 2
+
+
+def test_marked_song_that_was_deleted_is_dropped(library, index, monkeypatch):
+    db_path, conn = library
+    conn.execute("DELETE FROM sm WHERE id = 1")
+    conn.commit()
+    search.mark_changed(db_path, [1])
+    no_full_scan(monkeypatch)
+
+    assert index.sync() == 0
+    assert index.search("grace") == []
+    assert len(index) == 2
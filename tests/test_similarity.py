@@ -0,0 +1,61 @@
+import sqlite3
+
+import similarity
+import songdb
+
+GRACE = ("Amazing grace how sweet the sound that saved a wretch like me<BR>"
+         "I once was lost but now am found was blind but now I see<slide>"
+         "Twas grace that taught my heart to fear and grace my fears relieved<BR>"
+         "How precious did that grace appear the hour I first believed")
+VISION = ("Be Thou my vision O Lord of my heart<BR>naught be all else to me save that Thou art<slide>"
+          "Thou my best thought by day or by night<BR>waking or sleeping Thy presence my light")
+
+
+def make_db(path, songs):
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE sm ({', '.join(songdb.SM_COLUMNS)}, PRIMARY KEY (id))")
+    conn.executemany("INSERT INTO sm VALUES (%s)" % ", ".join("?" * len(songdb.SM_COLUMNS)), [
+        songdb.build_song_row(song_id, name, lyrics, "cat", "font") for song_id, name, lyrics in songs
+    ])
+    conn.commit()
+    return conn
+
+
+def open_index(tmp_path, songs):
+    db_path = str(tmp_path / "songs.db")
+    conn = make_db(db_path, songs)
+    index = similarity.NearDuplicateIndex(db_path, str(tmp_path / "similarity.db"))
+    return conn, index
+
+
+def test_edited_copy_matches_and_unrelated_song_does_not(tmp_path):
+    conn, index = open_index(tmp_path, [(1, "Amazing Grace", GRACE), (2, "Be Thou My Vision", VISION)])
+    assert index.sync(conn) == 2
+
+    edited = GRACE.replace("<slide>", "<BR>").replace("wretch", "soul")
+    matches = index.query(edited)
+    assert [(song_id, name) for song_id, name, _ in matches] == [(1, "Amazing Grace")]
+    assert similarity.DEFAULT_THRESHOLD <= matches[0][2] < 1.0
+    assert index.query(GRACE, exclude_ids={1}) == []
+    assert index.query("") == []
+
+
+def test_sync_reindexes_only_changed_rows(tmp_path):
+    conn, index = open_index(tmp_path, [(1, "Amazing Grace", GRACE), (2, "Be Thou My Vision", VISION)])
+    index.sync(conn)
+    assert index.sync(conn) == 0
+
+    conn.execute("UPDATE sm SET lyrics = ? WHERE id = 2", (GRACE,))
+    conn.execute("DELETE FROM sm WHERE id = 1")
+    conn.commit()
+    assert index.sync(conn) == 1
+    assert len(index) == 1
+    assert [(song_id, score) for song_id, _, score in index.query(GRACE)] == [(2, 1.0)]
+
+
+def test_pending_songs_are_matched_before_they_are_written(tmp_path):
+    conn, index = open_index(tmp_path, [(2, "Be Thou My Vision", VISION)])
+    index.sync(conn)
+    index.add_pending("Amazing Grace", GRACE)
+
+    assert index.query(GRACE) == [(None, "Amazing Grace", 1.0)]
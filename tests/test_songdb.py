@@ -0,0 +1,97 @@
+import sqlite3
+
+import pytest
+
+import songdb
+
+
+def make_db():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"CREATE TABLE sm ({', '.join(songdb.SM_COLUMNS)}, PRIMARY KEY (id))")
+    return conn
+
+
+def song_rows(conn):
+    return conn.execute("SELECT id, name, lyrics FROM sm ORDER BY id").fetchall()
+
+
+def test_buffered_insert_replaced_by_same_name_is_reported():
+    conn = make_db()
+    writer = songdb.BulkSongWriter(conn, "cat", "font", key=songdb.normalize_name)
+    writer.queue_insert("Amazing Grace", "first")
+    writer.queue_insert("amazing  grace", "second")
+    results = writer.commit()
+
+    assert results == [("Amazing Grace", "replaced", None), ("amazing  grace", "added", None)]
+    assert song_rows(conn) == [(1, "amazing  grace", "second")]
+
+
+def test_update_of_buffered_insert_reports_the_replaced_song():
+    conn = make_db()
+    writer = songdb.BulkSongWriter(conn, "cat", "font", key=songdb.normalize_name)
+    writer.queue_insert("Song", "first")
+    writer.queue_update("Song", "second")
+    assert [action for _, action, _ in writer.commit()] == ["replaced", "added"]
+    assert song_rows(conn) == [(1, "Song", "second")]
+
+
+def test_batch_that_cannot_take_the_write_lock_stays_buffered(tmp_path):
+    path = str(tmp_path / "songs.db")
+    make_db().backup(sqlite3.connect(path))
+    blocker = sqlite3.connect(path)
+    blocker.execute("BEGIN IMMEDIATE")
+    writer = songdb.BulkSongWriter(sqlite3.connect(path, timeout=0), "cat", "font", batch_size=1)
+    try:
+        writer.queue_insert("Song", "lyrics")
+    except sqlite3.OperationalError:
+        pass
+    else:
+        raise AssertionError("the flush should have failed on the locked database")
+    blocker.rollback()
+
+    assert writer.rollback() == ["Song"]
+
+
+def test_insert_after_flush_updates_the_flushed_song():
+    conn = make_db()
+    writer = songdb.BulkSongWriter(conn, "cat", "font", key=songdb.normalize_name, batch_size=3)
+    writer.queue_insert("A", "first")
+    writer.flush()
+    writer.queue_insert("a", "second")
+    results = writer.commit()
+
+    assert results == [("A", "added", None), ("a", "overwritten", None)]
+    assert song_rows(conn) == [(1, "A", "second")]
+
+
+@pytest.mark.parametrize("lyrics", [
+    "Verse 1<slide>Chorus<slide>Verse 2<slide>Chorus<slide>Chorus",
+    "Only slide",
+    "Verse<slide>Chorus",
+    "<slide><slide>Verse",
+    "",
+])
+def test_compacted_slides_expand_to_the_original_lyrics(lyrics):
+    compacted, slideseq = songdb.compact_slides(lyrics)
+    assert songdb.expand_slides(compacted, slideseq) == lyrics
+
+
+def test_compact_slides_stores_each_slide_once():
+    assert songdb.compact_slides("A<slide>B<slide>A<slide>A") == ("A<slide>B", "1,2,1,1")
+    assert songdb.compact_slides("A<slide>B") == ("A<slide>B", "")
+
+
+@pytest.mark.parametrize("slideseq", ["1,3", "0", "1,x", "1;2"])
+def test_slideseq_that_does_not_fit_leaves_lyrics_unchanged(slideseq):
+    assert songdb.expand_slides("A<slide>B", slideseq) == "A<slide>B"
+
+
+def test_stored_lyrics_reads_compacted_songs_in_playback_order():
+    conn = make_db()
+    writer = songdb.BulkSongWriter(conn, "cat", "font", key=songdb.normalize_name)
+    lyrics = "Verse 1<slide>Chorus<slide>Verse 2<slide>Chorus"
+    writer.queue_insert("Song", *songdb.compact_slides(lyrics))
+    writer.commit()
+
+    assert conn.execute("SELECT lyrics, slideseq FROM sm").fetchone() == ("Verse 1<slide>Chorus<slide>Verse 2", "1,2,3,2")
+    assert songdb.stored_lyrics(conn, [1]) == {1: lyrics}
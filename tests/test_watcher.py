@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+import watcher
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+
+
+def test_decks_in_excluded_folders_are_not_imported(tmp_path):
+    root = str(tmp_path / "w")
+    kept = os.path.join(root, "New", "Song.pptx")
+    skipped = os.path.join(root, "Old", "Song.pptx")
+    nested = os.path.join(root, "Old", "Deeper", "Other.pptx")
+    for path in (kept, skipped, nested):
+        touch(path)
+    manifest = watcher.ImportManifest(None, path=str(tmp_path / "manifest.db"))
+    sync = watcher.WatchSync(str(tmp_path / "songs.db"), [root], exclude=["Old"], manifest=manifest)
+
+    assert sync._expand([kept, skipped, nested, os.path.join(root, "Old")]) == [kept]
+    assert sync._expand([root]) == [kept]
+    manifest.close()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+def test_inotify_skips_excluded_folders(tmp_path):
+    root = str(tmp_path / "w")
+    os.makedirs(os.path.join(root, "Old", "Deeper"))
+    os.makedirs(os.path.join(root, "Kept"))
+    inotify = watcher.InotifyWatcher([root], exclude=["Old"])
+    try:
+        assert sorted(inotify.watches.values()) == [root, os.path.join(root, "Kept")]
+        os.makedirs(os.path.join(root, "New", "Old"))
+        os.makedirs(os.path.join(root, "Kept", "Old"))
+        touch(os.path.join(root, "Kept", "Song.pptx"))
+
+        changed = inotify.read(1.0)
+        assert os.path.join(root, "Kept", "Old") not in changed
+        assert os.path.join(root, "Kept", "Song.pptx") in changed
+        assert sorted(inotify.watches.values()) == [root, os.path.join(root, "Kept"), os.path.join(root, "New")]
+    finally:
+        inotify.close()
@@ -0,0 +1,140 @@
+"""Per-stage timing of imports, with JSON and Chrome-trace export.
+
+An `ImportTrace` collects one event per stage and file: scan, extract,
+normalize, dedupe (the duplicate check), write and commit. Extraction events
+also carry the bytes read and the number of slides found. Events can be
+summarized per stage for the injection summary, or exported as plain JSON or
+in the Chrome trace-event format (open it in chrome://tracing or Perfetto).
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+STAGES = ("scan", "extract", "normalize", "dedupe", "write", "commit")
+EXPORT_FORMATS = ("json", "chrome")
+
+
+def timed(fn, *args):
+    """Calls `fn(*args)` and returns `(result, start time, seconds, process id)`.
+
+    Module-level so it can wrap calls that run in worker processes.
+    """
+    start = time.time()
+    began = time.perf_counter()
+    value = fn(*args)
+    return value, start, time.perf_counter() - began, os.getpid()
+
+
+def slide_count(lyrics):
+    """Returns the number of slides in extracted lyrics."""
+    return lyrics.count("<slide>") + 1 if lyrics else 0
+
+
+class ImportTrace:
+    """Thread-safe record of timed import stages.
+
+    Each event is a dict with `stage`, `file` (or None), `start` (epoch
+    seconds), `seconds`, `pid`, `tid` and any extra fields such as `bytes`
+    and `slides`. Events of the stages that write to a database carry its
+    path as `db`; scan and extract events are shared by every database.
+    """
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+
+    def record(self, stage, file, start, seconds, pid=None, tid=None, **fields):
+        """Adds one finished event."""
+        event = {
+            "stage": stage, "file": file, "start": start, "seconds": seconds,
+            "pid": os.getpid() if pid is None else pid, "tid": threading.get_ident() if tid is None else tid,
+        }
+        event.update(fields)
+        with self._lock:
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, stage, file=None, **fields):
+        """Times the enclosed block as one event. The yielded dict can add fields."""
+        start = time.time()
+        began = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            self.record(stage, file, start, time.perf_counter() - began, **fields)
+
+    def summary(self, db=None):
+        """Returns `{stage: {"events", "seconds", "max_ms", ...}}` in stage order.
+
+        Extraction also totals `bytes` and `slides`. Stages that overlap, such
+        as extraction in several workers, are summed, so the total can exceed
+        the wall-clock time of the import. With `db`, only the shared events
+        and those of that database are counted.
+        """
+        with self._lock:
+            events = [event for event in self.events if db is None or event.get("db") in (None, db)]
+        stages = {}
+        for event in events:
+            stats = stages.setdefault(event["stage"], {"events": 0, "seconds": 0.0, "max_ms": 0.0})
+            stats["events"] += 1
+            stats["seconds"] += event["seconds"]
+            stats["max_ms"] = max(stats["max_ms"], event["seconds"] * 1000)
+            for field in ("bytes", "slides"):
+                if field in event:
+                    stats[field] = stats.get(field, 0) + event[field]
+        order = {stage: index for index, stage in enumerate(STAGES)}
+        return {
+            stage: {key: round(value, 4) if isinstance(value, float) else value for key, value in stats.items()}
+            for stage, stats in sorted(stages.items(), key=lambda item: order.get(item[0], len(order)))
+        }
+
+    def format_summary(self, db=None):
+        """Returns the per-stage breakdown as text lines for the injection summary, for one database with `db`."""
+        lines = []
+        for stage, stats in self.summary(db).items():
+            line = (f"{stage}: {stats['seconds']:.2f}s over {stats['events']} event(s), "
+                    f"slowest {stats['max_ms']:.0f} ms")
+            if "bytes" in stats:
+                line += f", {stats['bytes'] / (1024 * 1024):.1f} MB read"
+            if "slides" in stats:
+                line += f", {stats['slides']} slides"
+            lines.append(line)
+        return lines
+
+    def to_json(self):
+        """Returns the summary and every event as a JSON-serializable dict."""
+        with self._lock:
+            events = list(self.events)
+        return {"summary": self.summary(), "events": events}
+
+    def to_chrome_trace(self):
+        """Returns the events in the Chrome trace-event format, with times in microseconds."""
+        with self._lock:
+            events = list(self.events)
+        origin = min((event["start"] for event in events), default=0.0)
+        trace_events = []
+        for event in events:
+            args = {key: value for key, value in event.items()
+                    if key not in ("stage", "start", "seconds", "pid", "tid") and value is not None}
+            trace_events.append({
+                "name": event["stage"] if not event["file"] else f"{event['stage']} {os.path.basename(event['file'])}",
+                "cat": event["stage"], "ph": "X",
+                "ts": round((event["start"] - origin) * 1e6, 1), "dur": round(event["seconds"] * 1e6, 1),
+                "pid": event["pid"], "tid": event["tid"], "args": args,
+            })
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def export(self, path, format="json"):
+        """Writes the trace to `path` as "json" or "chrome"."""
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"unknown trace format: {format}")
+        data = self.to_chrome_trace() if format == "chrome" else self.to_json()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+
+def span(trace, stage, file=None, **fields):
+    """`trace.span(...)` when tracing, otherwise a no-op context."""
+    return nullcontext(fields) if trace is None else trace.span(stage, file, **fields)
@@ -0,0 +1,347 @@
+"""Watch-folder mode: keeps songs.db in step with a folder of decks.
+
+A manifest records the path, modification time, size and content hash of
+every deck that was imported. On start every deck is checked against it;
+after that only the files reported by inotify (or, where inotify is not
+available, a polling rescan) are checked. Bursts of events are debounced
+into one import, and new or modified decks are upserted through the normal
+import pipeline. Deleting a deck only removes it from the manifest; the
+song stays in the database.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import sqlite3
+import struct
+import sys
+import threading
+import time
+
+import importer
+import songdb
+from extract_cache import file_hash, sidecar_path
+from scanner import DECK_PATTERNS, DeckScanner, matches
+
+DEFAULT_DEBOUNCE = 2.0
+DEFAULT_POLL_INTERVAL = 10.0
+# A steady stream of events is still imported at least this often.
+MAX_BATCH_DELAY = 30.0
+
+
+def is_excluded(path, roots, patterns):
+    """Returns True if a file or folder name in `path` below its watched root matches `patterns`.
+
+    Like `DeckScanner`, every name between the root and the path is tested,
+    so a deck inside an excluded folder is excluded too.
+    """
+    if not patterns:
+        return False
+    for root in roots:
+        relative = os.path.relpath(path, root)
+        if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+            continue
+        return any(matches(part, patterns) for part in relative.split(os.sep) if part != os.curdir)
+    return False
+
+
+class ImportManifest:
+    """Records which version of each deck has been imported into one songs.db."""
+
+    def __init__(self, db_path, path=None):
+        self.path = path or sidecar_path(db_path, "manifest")
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            imported_at REAL NOT NULL
+        )''')
+        self.conn.commit()
+
+    def changed(self, paths):
+        """Returns `{path: (stat, content hash)}` for the decks that are new or modified.
+
+        The content hash is only read when the size or modification time
+        differs; a touched but unchanged file just has its entry refreshed.
+        """
+        changed = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            row = self.conn.execute(
+                "SELECT mtime_ns, size, content_hash FROM files WHERE path = ?", (path,)
+            ).fetchone()
+            if row and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+                continue
+            try:
+                content_hash = file_hash(path)
+            except OSError:
+                continue
+            if row and row[2] == content_hash:
+                self.conn.execute(
+                    "UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?", (st.st_mtime_ns, st.st_size, path)
+                )
+                continue
+            changed[path] = (st, content_hash)
+        self.conn.commit()
+        return changed
+
+    def record(self, path, st, content_hash):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+            (path, st.st_mtime_ns, st.st_size, content_hash, time.time())
+        )
+
+    def forget(self, path):
+        """Drops a deleted deck, and any decks under a deleted folder."""
+        prefix = path.rstrip("/\\") + os.sep
+        self.conn.execute(
+            "DELETE FROM files WHERE path = ? OR substr(path, 1, ?) = ?", (path, len(prefix), prefix)
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+# inotify event flags, from <sys/inotify.h>.
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+_EVENT = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Reports changed paths under a set of folders using Linux inotify, through ctypes.
+
+    Folders matching `exclude` are not watched, and changes to files matching it are not reported.
+    """
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+    def __init__(self, roots, exclude=()):
+        self.exclude = tuple(exclude)
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        try:
+            for root in roots:
+                self._add_tree(root)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_tree(self, root):
+        for dirpath, dirnames, _ in os.walk(root):
+            dirnames[:] = [name for name in dirnames if not matches(name, self.exclude)]
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(dirpath), self.MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error in (errno.ENOENT, errno.EACCES):
+                    continue
+                # Most likely ENOSPC: the per-user watch limit is exhausted.
+                raise OSError(error, f"inotify_add_watch failed for {dirpath}")
+            self.watches[wd] = dirpath
+
+    def read(self, timeout):
+        """Waits up to `timeout` seconds and returns the changed paths, or None to rescan everything."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed = set()
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, name_len = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + name_len].rstrip(b"\0")
+            offset += _EVENT.size + name_len
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            directory = self.watches.get(wd)
+            if directory is None or not name:
+                continue
+            if self.exclude and matches(os.fsdecode(name), self.exclude):
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                # A new or moved-in folder: watch it, and check the decks already inside it.
+                try:
+                    self._add_tree(path)
+                except OSError:
+                    return None
+            changed.add(path)
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher:
+    """Reports changed decks by rescanning the folders every `interval` seconds."""
+
+    def __init__(self, roots, interval=DEFAULT_POLL_INTERVAL, exclude=()):
+        self.roots = list(roots)
+        self.interval = interval
+        self.exclude = exclude
+        self.snapshot = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def _scan(self):
+        snapshot = {}
+        for path in DeckScanner(self.roots, exclude=self.exclude):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def read(self, timeout):
+        """Waits up to `timeout` seconds and returns the decks added, modified or removed."""
+        remaining = self._next_scan - time.monotonic()
+        if remaining > timeout:
+            time.sleep(timeout)
+            return set()
+        time.sleep(max(remaining, 0))
+        self._next_scan = time.monotonic() + self.interval
+        snapshot = self._scan()
+        changed = {path for path, key in snapshot.items() if self.snapshot.get(path) != key}
+        changed.update(path for path in self.snapshot if path not in snapshot)
+        self.snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+def make_watcher(roots, poll=False, interval=DEFAULT_POLL_INTERVAL, exclude=()):
+    """Returns an `InotifyWatcher` where possible, otherwise a `PollingWatcher`."""
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(roots, exclude)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}), polling every {interval:g}s", file=sys.stderr)
+    return PollingWatcher(roots, interval, exclude)
+
+
+class WatchSync:
+    """Imports new and modified decks under `roots` into songs.db, now and whenever they change.
+
+    Existing songs are overwritten with the new lyrics, so a modified deck
+    updates its song. Keyword arguments are passed to `importer.run_import`.
+    """
+
+    def __init__(self, db_path, roots, exclude=(), manifest=None, **import_options):
+        self.db_path = db_path
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.exclude = tuple(exclude)
+        self.manifest = manifest or ImportManifest(db_path)
+        self.import_options = import_options
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def _expand(self, paths):
+        """Turns changed paths into the decks to check, forgetting the ones that are gone."""
+        decks = []
+        for path in paths:
+            if not os.path.exists(path):
+                self.manifest.forget(path)
+            elif is_excluded(path, self.roots, self.exclude):
+                continue
+            elif os.path.isdir(path):
+                decks.extend(DeckScanner([path], exclude=self.exclude))
+            elif matches(os.path.basename(path), DECK_PATTERNS):
+                decks.append(path)
+        self.manifest.commit()
+        return decks
+
+    def sync(self, paths=None):
+        """Imports the new or modified decks among `paths` (all decks when None).
+
+        Returns the `importer.ImportResult`, or None when nothing changed.
+        """
+        if paths is None:
+            decks = DeckScanner(self.roots, exclude=self.exclude)
+        else:
+            decks = self._expand(paths)
+        changed = self.manifest.changed(decks)
+        if not changed:
+            return None
+        outcome = importer.run_import(
+            self.db_path, list(changed), duplicates="overwrite", **self.import_options
+        )
+        imported = {
+            songdb.normalize_name(name) for name, status, _, _ in outcome.results
+            if status in ("added", "overwritten", "unchanged")
+        }
+        for path, (st, content_hash) in changed.items():
+            # Decks that failed are left out, so they are tried again when they next change.
+            if songdb.normalize_name(songdb.song_name_from_path(path)) in imported:
+                self.manifest.record(path, st, content_hash)
+        self.manifest.commit()
+        return outcome
+
+    def run(self, on_batch=None, poll=False, interval=DEFAULT_POLL_INTERVAL, debounce=DEFAULT_DEBOUNCE):
+        """Syncs everything once, then watches for changes until `stop()` is called.
+
+        `on_batch(outcome)` is called after every import.
+        """
+        outcome = self.sync()
+        if outcome is not None and on_batch is not None:
+            on_batch(outcome)
+        watcher = make_watcher(self.roots, poll, interval, self.exclude)
+        pending = set()
+        rescan = False
+        first_event = last_event = None
+        try:
+            while not self._stop.is_set():
+                changes = watcher.read(0.5)
+                now = time.monotonic()
+                if changes is None or changes:
+                    if changes is None:
+                        rescan = True
+                    else:
+                        pending.update(changes)
+                    last_event = now
+                    first_event = first_event or now
+                if not (pending or rescan):
+                    continue
+                if now - last_event < debounce and now - first_event < MAX_BATCH_DELAY:
+                    continue
+                outcome = self.sync(None if rescan else pending)
+                pending = set()
+                rescan = False
+                first_event = last_event = None
+                if outcome is not None and on_batch is not None:
+                    on_batch(outcome)
+        finally:
+            watcher.close()
+            self.manifest.close()